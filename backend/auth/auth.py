@@ -1,7 +1,10 @@
 from fastapi import Depends, HTTPException, Request
-from sqlmodel import select
-from ..db.db import SessionDep
+from sqlmodel import select, func
+from ..db.db import SessionDep, AsyncSessionDep
+from ..db.pool import envBool
 from ..models.cliente import Cliente
+from ..models.carrito import Carrito
+from ..models.wishlist import Wishlist
 from ..models.administrador import Administrador
 
 """
@@ -10,8 +13,16 @@ from ..models.administrador import Administrador
     Provee funciones para verificar la sesión actual del usuario (Cliente o Administrador)
     y proteger las rutas que requieren autenticación, asegurando que solo usuarios
     autorizados accedan a recursos protegidos.
+
+    principalActual / principalActualAsync resuelven en una consulta el cliente junto con los IDs
+    de su carrito y su wishlist y los dejan en request.state para el resto de la petición. Con
+    SESION_IDS=true los IDs se guardan además en la cookie de sesión (firmada) junto con el cliente
+    dueño, y las peticiones siguientes de ese mismo cliente solo lo leen por su llave primaria.
 """
 
+# Guardar los IDs del carrito y la wishlist en la sesion
+idsEnSesion = envBool("SESION_IDS", False)
+
 # Dependencia para saber que cliente esta en la sesion
 def clienteActual(request: Request, session: SessionDep):
     # Busca el id del cliente
@@ -42,4 +53,121 @@ def adminActual(request: Request, session: SessionDep):
     adminDB = session.get(Administrador, administradorID)
     if not adminDB:
         raise HTTPException(404, "Administrador no encontrado")
-    return adminDB
\ No newline at end of file
+    return adminDB
+
+
+
+# Dependencia asincrona para saber que cliente esta en la sesion
+async def clienteActualAsync(request: Request, session: AsyncSessionDep):
+    # Busca el id del cliente
+    clienteID = request.session.get("clienteID")
+
+    # Si no ha iniciado sesion, se lo pide
+    if not clienteID:
+        raise HTTPException(401, "Debes iniciar sesión")
+    
+    # Caso si no existe el cliente
+    clienteDB = await session.get(Cliente, clienteID)
+    if not clienteDB or not clienteDB.activo:
+        raise HTTPException(404, "Cliente inactivo no encontrado")
+    return clienteDB
+
+
+
+# Dependencia asincrona para saber que administrador esta en la sesion
+async def adminActualAsync(request: Request, session: AsyncSessionDep):
+    # Busca el id del administrador
+    administradorID = request.session.get("administradorID")
+
+    # Si no ha iniciado sesion, se lo pide
+    if not administradorID:
+        raise HTTPException(401, "Acceso restringido a administradores")
+    
+    # Caso si no existe el administrador
+    adminDB = await session.get(Administrador, administradorID)
+    if not adminDB:
+        raise HTTPException(404, "Administrador no encontrado")
+    return adminDB
+
+
+
+# Cliente de la sesion con los IDs de su carrito y su wishlist (None si no tiene)
+class Principal:
+    def __init__(self, cliente: Cliente, carritoID: int | None, wishlistID: int | None):
+        self.cliente = cliente
+        self.carritoID = carritoID
+        self.wishlistID = wishlistID
+
+
+
+# Funcion para armar la consulta del cliente con los IDs de su carrito y su wishlist
+def consultaPrincipal(clienteID: int):
+    carritoID = select(func.min(Carrito.id)).where(Carrito.clienteID == Cliente.id).scalar_subquery()
+    wishlistID = select(func.min(Wishlist.id)).where(Wishlist.clienteID == Cliente.id).scalar_subquery()
+    return select(Cliente, carritoID, wishlistID).where(Cliente.id == clienteID)
+
+
+
+# Funcion para leer de la sesion el cliente y, si estan guardados, los IDs de su carrito y su wishlist
+def idsDeSesion(request: Request) -> tuple[int, tuple[int, int] | None]:
+    clienteID = request.session.get("clienteID")
+
+    # Si no ha iniciado sesion, se lo pide
+    if not clienteID:
+        raise HTTPException(401, "Debes iniciar sesión")
+
+    # Los IDs guardados solo valen para el cliente que los guardo (otro pudo iniciar sesion despues)
+    ids = (request.session.get("carritoID"), request.session.get("wishlistID"))
+    propios = request.session.get("idsClienteID") == clienteID
+    return clienteID, ids if idsEnSesion and propios and all(ids) else None
+
+
+
+# Funcion para armar el principal y guardarlo en la peticion (y sus IDs en la sesion si aplica)
+def guardarPrincipal(request: Request, cliente: Cliente | None, carritoID: int | None, wishlistID: int | None) -> Principal:
+    # Caso si no existe el cliente
+    if not cliente or not cliente.activo:
+        raise HTTPException(404, "Cliente inactivo no encontrado")
+
+    if idsEnSesion and carritoID and wishlistID:
+        request.session.update(idsClienteID=cliente.id, carritoID=carritoID, wishlistID=wishlistID)
+    request.state.principal = Principal(cliente, carritoID, wishlistID)
+    return request.state.principal
+
+
+
+# Dependencia con el cliente de la sesion y los IDs de su carrito y su wishlist
+def principalActual(request: Request, session: SessionDep) -> Principal:
+    # Ya resuelto en esta peticion
+    if hasattr(request.state, "principal"):
+        return request.state.principal
+
+    clienteID, ids = idsDeSesion(request)
+    if ids:
+        return guardarPrincipal(request, session.get(Cliente, clienteID), *ids)
+
+    fila = session.exec(consultaPrincipal(clienteID)).first()
+    return guardarPrincipal(request, *(fila or (None, None, None)))
+
+
+
+# Funcion para iniciar la sesion de un cliente (descarta los IDs guardados de otro cliente)
+def iniciarSesionCliente(request: Request, clienteID: int):
+    for llave in ("idsClienteID", "carritoID", "wishlistID"):
+        request.session.pop(llave, None)
+    request.session["clienteID"] = clienteID
+
+
+
+# Dependencia asincrona con el cliente de la sesion y los IDs de su carrito y su wishlist
+async def principalActualAsync(request: Request, session: AsyncSessionDep) -> Principal:
+    # Ya resuelto en esta peticion
+    if hasattr(request.state, "principal"):
+        return request.state.principal
+
+    clienteID, ids = idsDeSesion(request)
+    if ids:
+        return guardarPrincipal(request, await session.get(Cliente, clienteID), *ids)
+
+    fila = (await session.exec(consultaPrincipal(clienteID))).first()
+    return guardarPrincipal(request, *(fila or (None, None, None)))
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import httpx
+
+"""
+    Benchmark del arranque en frío de la aplicación.
+
+    Mide el tiempo de importación de backend.main (con python -X importtime) y el tiempo
+    hasta la primera respuesta: lanza uvicorn en un proceso nuevo y consulta la ruta
+    indicada hasta que responde. Cada repetición arranca un proceso limpio.
+
+    Debe correr desde la raíz del repositorio contra una DB con el esquema migrado (DB_URL):
+        python -m backend.benchmarks.arranqueEnFrio --repeticiones 5 --ruta /productos/
+"""
+
+# Modulo que se importa al arrancar la app
+moduloApp = "backend.main"
+
+
+
+# Funcion para medir la importacion de un modulo en un proceso limpio
+def medirImportacion(modulo: str = moduloApp) -> tuple[float, dict]:
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, env=os.environ.copy()
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{proceso.stderr[-2000:]}")
+
+    # Cada linea: "import time: propio | acumulado | modulo" (en microsegundos)
+    modulos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos[nombre.strip()] = int(acumulado) / 1000
+
+    return modulos[modulo], modulos
+
+
+
+# Funcion para obtener un puerto libre
+def puertoLibre() -> int:
+    with socket.socket() as conexion:
+        conexion.bind(("127.0.0.1", 0))
+        return conexion.getsockname()[1]
+
+
+
+# Funcion para medir el tiempo hasta la primera respuesta de un proceso nuevo
+def medirPrimeraRespuesta(ruta: str, limite: float) -> float:
+    puerto = puertoLibre()
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{moduloApp}:app", "--port", str(puerto), "--log-level", "warning"],
+        env=os.environ.copy()
+    )
+    try:
+        while time.perf_counter() - inicio < limite:
+            try:
+                respuesta = httpx.get(f"http://127.0.0.1:{puerto}{ruta}", timeout=limite)
+                respuesta.raise_for_status()
+                return (time.perf_counter() - inicio) * 1000
+            except httpx.TransportError:
+                time.sleep(0.01)
+        raise TimeoutError(f"La app no respondió en {limite}s")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+
+# Ejecutar el benchmark
+def main(args):
+    importaciones, respuestas = [], []
+    for _ in range(args.repeticiones):
+        total, modulos = medirImportacion()
+        importaciones.append(total)
+        respuestas.append(medirPrimeraRespuesta(args.ruta, args.limite))
+
+    print(f"Importación de {moduloApp}: mediana {statistics.median(importaciones):.1f} ms")
+    print(f"Primera respuesta de {args.ruta}: mediana {statistics.median(respuestas):.1f} ms (min {min(respuestas):.1f}, max {max(respuestas):.1f})")
+
+    # Modulos de terceros que mas pesan en la ultima importacion
+    print("Paquetes más costosos:")
+    paquetes = {nombre: ms for nombre, ms in modulos.items() if "." not in nombre and nombre != "backend"}
+    for nombre, ms in sorted(paquetes.items(), key=lambda par: par[1], reverse=True)[:args.top]:
+        print(f"  {nombre:<24} {ms:>8.1f} ms")
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide la importación y el tiempo hasta la primera respuesta de la app")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--ruta", default="/productos/")
+    parser.add_argument("--limite", type=float, default=60, help="Segundos máximos esperando la primera respuesta")
+    parser.add_argument("--top", type=int, default=10)
+    main(parser.parse_args())
\ No newline at end of file
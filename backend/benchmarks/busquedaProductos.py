@@ -0,0 +1,101 @@
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+import httpx
+from ..main import app
+from ..db.sembrar import sembrar, tiposProducto, materiales, estilos, colores
+
+"""
+    Benchmark de la búsqueda de productos (/productos/buscar).
+
+    Siembra un catálogo sintético (50k productos por defecto), lanza búsquedas de una,
+    dos y tres palabras (algunas con errores de escritura o incompletas) contra la app
+    y reporta las latencias p50, p95 y p99 de la primera página y del recorrido con cursor.
+
+    Debe correr contra una DB de pruebas con el esquema migrado (DB_URL):
+        python -m backend.benchmarks.busquedaProductos --productos 50000 --busquedas 500
+"""
+
+# Vocabulario de las busquedas (el mismo con el que se siembran los productos)
+vocabulario = tiposProducto + materiales + estilos + colores
+
+
+
+# Funcion para generar una busqueda de 1 a 3 palabras
+def generarBusqueda(rng: random.Random) -> str:
+    palabras = [rng.choice(vocabulario).lower() for _ in range(rng.choice((1, 1, 2, 2, 3)))]
+    # Una de cada cinco busquedas llega incompleta (el usuario sigue escribiendo)
+    if rng.random() < 0.2:
+        palabras[-1] = palabras[-1][:max(3, len(palabras[-1]) - 2)]
+    # Una de cada diez tiene un error de escritura (dos letras intercambiadas)
+    elif rng.random() < 0.125 and len(palabras[0]) > 3:
+        i = rng.randrange(len(palabras[0]) - 1)
+        palabras[0] = palabras[0][:i] + palabras[0][i + 1] + palabras[0][i] + palabras[0][i + 2:]
+    return " ".join(palabras)
+
+
+
+# Funcion para calcular los percentiles de una lista de tiempos
+def percentiles(tiempos: list[float]) -> dict:
+    cortes = statistics.quantiles(tiempos, n=100)
+    return {"p50": round(cortes[49], 2), "p95": round(cortes[94], 2), "p99": round(cortes[98], 2), "max": round(max(tiempos), 2)}
+
+
+
+# Ejecutar el benchmark
+async def main(args):
+    if args.productos:
+        print(f"Sembrando {args.productos} productos...")
+        sembrar(clientes=0, categorias=args.categorias, productos=args.productos, pedidos=0)
+
+    rng = random.Random(args.semilla)
+    primeraPagina, siguientes, resultados = [], [], []
+    transporte = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        # Calentar la ruta (conexiones del pool y compilacion de la consulta)
+        await cliente.get("/productos/buscar", params={"q": "collar"})
+
+        for _ in range(args.busquedas):
+            parametros = {"q": generarBusqueda(rng), "limite": args.limite}
+
+            inicio = time.perf_counter()
+            respuesta = await cliente.get("/productos/buscar", params=parametros)
+            primeraPagina.append((time.perf_counter() - inicio) * 1000)
+            respuesta.raise_for_status()
+            pagina = respuesta.json()
+            resultados.append(len(pagina["productos"]))
+
+            # Segunda pagina con el cursor (mide que no crezca con la profundidad)
+            if pagina["siguienteCursor"]:
+                inicio = time.perf_counter()
+                respuesta = await cliente.get("/productos/buscar", params={**parametros, "cursor": pagina["siguienteCursor"]})
+                siguientes.append((time.perf_counter() - inicio) * 1000)
+                respuesta.raise_for_status()
+
+    resumen = {
+        "busquedas": args.busquedas,
+        "sinResultados": sum(1 for cantidad in resultados if cantidad == 0),
+        "primeraPaginaMs": percentiles(primeraPagina),
+        "siguientePaginaMs": percentiles(siguientes) if len(siguientes) > 1 else None
+    }
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide la latencia de /productos/buscar sobre un catálogo sintético")
+    parser.add_argument("--productos", type=int, default=50000, help="Productos a sembrar (0 para usar los datos existentes)")
+    parser.add_argument("--categorias", type=int, default=40)
+    parser.add_argument("--busquedas", type=int, default=500)
+    parser.add_argument("--limite", type=int, default=24)
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--salida", default=None)
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
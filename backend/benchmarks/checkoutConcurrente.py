@@ -0,0 +1,168 @@
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import httpx
+import logging
+from fastapi import FastAPI, Request
+from sqlmodel import Session, select
+from starlette.middleware.sessions import SessionMiddleware
+from ..db.db import engine
+from ..db.pool import configuracionPool
+from ..models.cliente import Cliente
+from ..models.carrito import Carrito
+from ..models.categoria import Categoria
+from ..models.producto import Producto
+from ..models.detalleCarrito import DetalleCarrito
+from ..routers import carrito_router
+
+"""
+    Benchmark de pedidos concurrentes sobre un producto con poco stock.
+
+    Crea un producto "caliente" con poco stock y otro con stock de sobra, y N clientes con
+    ambos productos en el carrito (las líneas en orden aleatorio). Luego lanza todos los
+    POST /carrito/pedir a la vez y mide pedidos por segundo y latencias. Al final comprueba
+    que no se vendió de más: el stock descontado es igual a las unidades de los pedidos
+    aceptados y nunca queda negativo. Si hay sobreventa el proceso termina con código 1.
+
+    Los pedidos en vuelo se limitan a las conexiones del pool (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW):
+    con más, los hilos esperan conexiones que no se liberan hasta el pool_timeout. Para lanzar
+    los 300 a la vez se sube el overflow:
+
+        DB_POOL_MAX_OVERFLOW=300 python -m backend.benchmarks.checkoutConcurrente --clientes 300 --stock 50
+"""
+
+# App minima con el router del carrito y una ruta para iniciar sesion sin contrasena
+app = FastAPI()
+app.add_middleware(SessionMiddleware, secret_key="josue")
+app.include_router(carrito_router.router)
+
+@app.post("/bench/entrar/{clienteID}")
+def entrar(clienteID: int, request: Request):
+    request.session["clienteID"] = clienteID
+    return {"ok": True}
+
+
+
+# Funcion para crear los productos y los clientes con su carrito
+def sembrar(clientes: int, stock: int, unidades: int, rng: random.Random) -> tuple[int, int, list[int]]:
+    sufijo = uuid.uuid4().hex[:8]
+    with Session(engine) as session:
+        categoria = session.exec(select(Categoria)).first()
+        if not categoria:
+            categoria = Categoria(nombre=f"Bench {sufijo}", descripcion="Benchmark")
+            session.add(categoria)
+            session.flush()
+
+        caliente = Producto(nombre=f"Caliente {sufijo}", descripcion="Benchmark", precio=10000, stock=stock, sku=f"BENCH-C-{sufijo}", categoriaID=categoria.id)
+        frio = Producto(nombre=f"Frio {sufijo}", descripcion="Benchmark", precio=5000, stock=clientes * unidades, sku=f"BENCH-F-{sufijo}", categoriaID=categoria.id)
+        session.add_all([caliente, frio])
+        session.flush()
+
+        ids = []
+        for numero in range(clientes):
+            cliente = Cliente(nombre=f"Bench {numero}", email=f"bench{numero}.{sufijo}@meraki.co", contrasenaHash="-")
+            session.add(cliente)
+            session.flush()
+            carrito = Carrito(clienteID=cliente.id)
+            session.add(carrito)
+            session.flush()
+
+            # Lineas en orden aleatorio: el descuento debe bloquear siempre en el mismo orden
+            productos = [caliente, frio]
+            rng.shuffle(productos)
+            for producto in productos:
+                session.add(DetalleCarrito(carritoID=carrito.id, productoID=producto.id, cantidad=unidades, precioUnidad=producto.precio, subtotal=producto.precio * unidades))
+            ids.append(cliente.id)
+
+        session.commit()
+        return caliente.id, frio.id, ids
+
+
+
+# Funcion para hacer el pedido de un cliente: (codigo de estado, latencia en ms)
+async def pedir(transporte, clienteID: int, inicio: asyncio.Event, semaforo: asyncio.Semaphore) -> tuple[int, float]:
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        await cliente.post(f"/bench/entrar/{clienteID}")
+        await inicio.wait()
+        async with semaforo:
+            tiempo = time.perf_counter()
+            respuesta = await cliente.post("/carrito/pedir")
+            return respuesta.status_code, (time.perf_counter() - tiempo) * 1000
+
+
+
+# Funcion para obtener un percentil de una lista ordenada
+def percentil(valores: list[float], p: float) -> float:
+    return round(valores[min(len(valores) - 1, int(len(valores) * p))], 1) if valores else 0.0
+
+
+
+# Ejecutar el benchmark
+async def main(args) -> dict:
+    rng = random.Random(args.semilla)
+    calienteID, frioID, clientes = sembrar(args.clientes, args.stock, args.unidades, rng)
+
+    # Todos los clientes inician sesion y esperan la senal para pedir a la vez
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    inicio, semaforo = asyncio.Event(), asyncio.Semaphore(args.concurrencia)
+    tareas = [asyncio.create_task(pedir(transporte, clienteID, inicio, semaforo)) for clienteID in clientes]
+    await asyncio.sleep(0.5)
+    tiempo = time.perf_counter()
+    inicio.set()
+    resultados = await asyncio.gather(*tareas)
+    duracion = time.perf_counter() - tiempo
+
+    with Session(engine) as session:
+        stockCaliente = session.get(Producto, calienteID).stock
+        stockFrio = session.get(Producto, frioID).stock
+
+    codigos = [codigo for codigo, _ in resultados]
+    latencias = sorted(latencia for _, latencia in resultados)
+    aceptados = codigos.count(200)
+    vendidas = aceptados * args.unidades
+
+    return {
+        "clientes": args.clientes,
+        "stockInicial": args.stock,
+        "unidadesPorPedido": args.unidades,
+        "concurrencia": args.concurrencia,
+        "aceptados": aceptados,
+        "rechazados": codigos.count(400),
+        "errores": len(codigos) - aceptados - codigos.count(400),
+        "stockFinal": stockCaliente,
+        "pedidosPorSegundo": round(len(codigos) / duracion, 1),
+        "p50Ms": percentil(latencias, 0.5),
+        "p95Ms": percentil(latencias, 0.95),
+        # Sin sobreventa: lo descontado coincide con lo vendido en los dos productos y nada queda negativo
+        "sinSobreventa": stockCaliente >= 0 and args.stock - stockCaliente == vendidas
+                         and args.clientes * args.unidades - stockFrio == vendidas
+                         and aceptados <= args.stock // args.unidades
+    }
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide pedidos concurrentes y comprueba que no se venda más que el stock")
+    parser.add_argument("--clientes", type=int, default=300)
+    parser.add_argument("--stock", type=int, default=50, help="Stock inicial del producto caliente")
+    parser.add_argument("--unidades", type=int, default=1, help="Unidades de cada producto por pedido")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--salida", default=None)
+    args = parser.parse_args()
+
+    # Pedidos en vuelo: tantos como conexiones tenga el pool
+    args.concurrencia = configuracionPool()["pool_size"] + configuracionPool()["max_overflow"]
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    resumen = asyncio.run(main(args))
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if resumen["sinSobreventa"] else 1)
\ No newline at end of file
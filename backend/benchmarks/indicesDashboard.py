@@ -0,0 +1,140 @@
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, text
+from sqlmodel import select, join
+from ..db.db import engine
+from ..db.migrar import crearIndices
+from ..db.sembrar import sembrar
+from ..db.instrumentacion import planEjecucion
+from ..models import Pedido, DetallePedido, Producto, Cliente, Categoria, Carrito, Wishlist, TransaccionPuntos, DetalleCarrito
+from ..utils.enums import EstadoPedido
+
+"""
+    Benchmark del paquete de índices sobre las consultas del dashboard y de pedidos.
+
+    Siembra pedidos sintéticos (1M por defecto), elimina los índices del paquete, mide el plan
+    y el tiempo de cada consulta, vuelve a crear los índices y repite la medición.
+    Escribe el resultado en JSON para comparar el antes y el después.
+
+    Debe correr contra una DB de pruebas con el esquema migrado (DB_URL):
+        python -m backend.benchmarks.indicesDashboard --pedidos 1000000 --salida indices.json
+"""
+
+# Modelos con indices del paquete
+modelosIndexados = (Pedido, DetallePedido, DetalleCarrito, Producto, Carrito, Categoria, Wishlist, TransaccionPuntos)
+
+
+
+# Consultas del dashboard (mismas condiciones que dashboardAdmin_router) y de pedido_router
+def consultas(clienteID: int, pedidoID: int) -> dict:
+    ahora = datetime.now()
+    inicioMes = datetime(ahora.year, ahora.month, 1)
+    ventasPorProducto = select(Producto.nombre, func.sum(DetallePedido.cantidad), func.sum(DetallePedido.subtotal)).select_from(
+        join(DetallePedido, Pedido).join(Producto)
+    )
+
+    return {
+        "ventasMes": select(func.sum(Pedido.total)).where(
+            Pedido.fecha >= inicioMes, Pedido.fecha < ahora, Pedido.estado == EstadoPedido.PAGADO, Pedido.pagadoConPuntos == False
+        ),
+        "pedidosRecientes": select(func.count(Pedido.id)).where(
+            Pedido.fecha >= ahora - timedelta(days=7), Pedido.estado == EstadoPedido.PAGADO
+        ),
+        "pedidosTabla": select(Pedido.id, Pedido.fecha, Pedido.estado, Pedido.total, Cliente.nombre).join(Cliente).where(
+            Pedido.estado == EstadoPedido.PAGADO
+        ).order_by(Pedido.fecha.desc()).limit(4),
+        "ventasMensuales": select(Pedido).where(
+            Pedido.fecha >= ahora - timedelta(days=180), Pedido.estado == EstadoPedido.PAGADO, Pedido.pagadoConPuntos == False
+        ),
+        "productosMasVendidos": ventasPorProducto.where(Pedido.estado == EstadoPedido.PAGADO).group_by(
+            Producto.id, Producto.nombre
+        ).order_by(func.sum(DetallePedido.cantidad).desc()).limit(3),
+        "pedidosRecientesAdmin": select(Pedido.id, Pedido.fecha, Pedido.estado, Pedido.total, Cliente.nombre).join(Cliente).where(
+            Pedido.estado != EstadoPedido.CANCELADO
+        ).order_by(Pedido.fecha.desc()).limit(5),
+        "misPedidos": select(Pedido).where(Pedido.clienteID == clienteID),
+        "detallesPedido": select(DetallePedido).where(DetallePedido.pedidoID == pedidoID)
+    }
+
+
+
+# Funcion para medir el tiempo y el plan de cada consulta
+def medir(repeticiones: int) -> dict:
+    with engine.connect() as conexion:
+        clienteID = conexion.execute(select(func.max(Pedido.clienteID))).scalar()
+        pedidoID = conexion.execute(select(func.max(Pedido.id))).scalar()
+
+        resultados = {}
+        for nombre, consulta in consultas(clienteID, pedidoID).items():
+            # Capturar la sentencia y los parametros tal como llegan al driver
+            capturada = {}
+            def capturar(conn, cursor, sentencia, parametros, contexto, executemany):
+                capturada.update(sentencia=sentencia, parametros=parametros)
+            event.listen(engine, "before_cursor_execute", capturar)
+
+            tiempos = []
+            try:
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    conexion.execute(consulta).all()
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+            finally:
+                event.remove(engine, "before_cursor_execute", capturar)
+
+            resultados[nombre] = {
+                "medianaMs": round(statistics.median(tiempos), 3),
+                "plan": planEjecucion(conexion, capturada["sentencia"], capturada["parametros"])
+            }
+            print(f"  {nombre:<24} {resultados[nombre]['medianaMs']:>10.2f} ms")
+
+    return resultados
+
+
+
+# Funcion para quitar o crear los indices del paquete
+def cambiarIndices(crear: bool):
+    with engine.begin() as conexion:
+        if crear:
+            crearIndices(conexion, *modelosIndexados)
+        else:
+            for modelo in modelosIndexados:
+                for indice in modelo.__table__.indexes:
+                    indice.drop(conexion, checkfirst=True)
+
+        # Actualizar las estadisticas del planificador
+        conexion.execute(text("ANALYZE"))
+
+
+
+# Ejecutar el benchmark
+def main(args):
+    if args.pedidos:
+        print(f"Sembrando {args.pedidos} pedidos...")
+        sembrar(clientes=args.clientes, productos=args.productos, pedidos=args.pedidos, lineas=args.lineas)
+
+    print("Sin índices:")
+    cambiarIndices(crear=False)
+    antes = medir(args.repeticiones)
+
+    print("Con índices:")
+    cambiarIndices(crear=True)
+    despues = medir(args.repeticiones)
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump({"antes": antes, "despues": despues}, archivo, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {args.salida}")
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide las consultas del dashboard con y sin el paquete de índices")
+    parser.add_argument("--pedidos", type=int, default=1000000, help="Pedidos a sembrar (0 para usar los datos existentes)")
+    parser.add_argument("--lineas", type=int, default=4, help="Máximo de productos distintos por pedido")
+    parser.add_argument("--clientes", type=int, default=10000)
+    parser.add_argument("--productos", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default="indicesDashboard.json")
+    main(parser.parse_args())
\ No newline at end of file
@@ -0,0 +1,87 @@
+import json
+import time
+import argparse
+import numpy as np
+from ..utils.coCompras import contarPares, sumarPares, vecinosFrecuentes
+from ..utils.relacionados import maximoLineasPedido, vecinosPorProducto
+
+"""
+    Benchmark del índice de productos comprados juntos.
+
+    Genera líneas de pedido sintéticas (1M por defecto, con popularidad tipo Zipf y de 1 a 6
+    productos por pedido) y mide por separado el conteo de pares, la extracción de los K
+    vecinos y la suma incremental de un lote de pedidos nuevos. Con --db mide además la
+    construcción completa desde la DB configurada en DB_URL (por ejemplo tras sembrar datos).
+
+        python -m backend.benchmarks.relacionados --lineas 1000000 --productos 5000
+"""
+
+# Funcion para generar lineas (pedidoID, productoID) sinteticas
+def generarLineas(rng: np.random.Generator, totalLineas: int, totalProductos: int, exponente: float) -> tuple[np.ndarray, np.ndarray]:
+    lineasPorPedido = rng.integers(1, 7, size=totalLineas // 2)
+    lineasPorPedido = lineasPorPedido[:np.searchsorted(np.cumsum(lineasPorPedido), totalLineas) + 1]
+    pedidos = np.repeat(np.arange(1, len(lineasPorPedido) + 1), lineasPorPedido)[:totalLineas]
+
+    # Popularidad Zipf: pocos productos concentran la mayoria de las compras
+    pesos = 1 / np.arange(1, totalProductos + 1) ** exponente
+    productos = rng.choice(np.arange(1, totalProductos + 1), size=len(pedidos), p=pesos / pesos.sum())
+    return pedidos, productos
+
+
+
+# Funcion para medir una funcion en milisegundos
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, round((time.perf_counter() - inicio) * 1000, 1)
+
+
+
+# Ejecutar el benchmark
+def main(args):
+    rng = np.random.default_rng(args.semilla)
+    pedidos, productos = generarLineas(rng, args.lineas, args.productos, args.exponente)
+
+    (claves, conteos), msPares = medir(contarPares, pedidos, productos, maximoLineasPedido)
+    (ids, vecinos, frecuencias), msVecinos = medir(vecinosFrecuentes, claves, conteos, vecinosPorProducto)
+
+    # Lote incremental: pedidos nuevos sumados a la matriz existente
+    nuevosPedidos, nuevosProductos = generarLineas(rng, args.incremental, args.productos, args.exponente)
+    (nuevasClaves, nuevosConteos), msParesNuevos = medir(contarPares, nuevosPedidos + pedidos.max(), nuevosProductos, maximoLineasPedido)
+    _, msSuma = medir(sumarPares, claves, conteos, nuevasClaves, nuevosConteos)
+
+    resumen = {
+        "lineas": int(len(pedidos)),
+        "pedidos": int(pedidos.max()),
+        "pares": int(len(claves)),
+        "productosConVecinos": int(len(ids)),
+        "memoriaVecinosKB": round((ids.nbytes + vecinos.nbytes + frecuencias.nbytes) / 1024, 1),
+        "memoriaParesMB": round((claves.nbytes + conteos.nbytes) / 1024 ** 2, 1),
+        "contarParesMs": msPares,
+        "vecinosMs": msVecinos,
+        "incrementalMs": round(msParesNuevos + msSuma, 1)
+    }
+
+    if args.db:
+        from ..utils.relacionados import Indice
+        indice, resumen["construccionDbMs"] = medir(Indice.construir)
+        resumen["lineasDb"] = int(len(indice.pedidos))
+
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide la construcción del índice de productos comprados juntos")
+    parser.add_argument("--lineas", type=int, default=1000000)
+    parser.add_argument("--productos", type=int, default=5000)
+    parser.add_argument("--exponente", type=float, default=1.1, help="Exponente Zipf de la popularidad")
+    parser.add_argument("--incremental", type=int, default=300, help="Líneas del lote incremental")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--db", action="store_true", help="Medir también la construcción desde DB_URL")
+    parser.add_argument("--salida", default=None)
+    main(parser.parse_args())
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+import time
+import argparse
+import httpx
+from fastapi import FastAPI
+from sqlmodel import select
+from ..db.db import SessionDep, AsyncSessionDep
+from ..models.producto import Producto
+
+"""
+    Benchmark de sesiones sincronas vs asincronas.
+
+    Monta dos endpoints equivalentes (uno con SessionDep en el threadpool y otro con
+    AsyncSessionDep en el event loop) que ejecutan la consulta del catalogo, les lanza
+    peticiones concurrentes y compara las peticiones por segundo de cada uno.
+
+    Uso: python -m backend.benchmarks.sesionesAsync --peticiones 2000 --concurrencia 100
+"""
+
+# App minima con los dos caminos de acceso a la DB
+app = FastAPI()
+
+@app.get("/sync")
+def catalogoSync(session: SessionDep):
+    return session.exec(select(Producto).where(Producto.activo == True)).all()
+
+@app.get("/async")
+async def catalogoAsync(session: AsyncSessionDep):
+    return (await session.exec(select(Producto).where(Producto.activo == True))).all()
+
+
+
+# Funcion para medir las peticiones por segundo de una ruta
+async def medir(ruta: str, peticiones: int, concurrencia: int) -> float:
+    transporte = httpx.ASGITransport(app=app)
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        # Calentar la ruta (conexiones del pool y compilacion de la consulta)
+        await cliente.get(ruta)
+
+        async def peticion():
+            async with semaforo:
+                respuesta = await cliente.get(ruta)
+                respuesta.raise_for_status()
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(peticion() for _ in range(peticiones)))
+        duracion = time.perf_counter() - inicio
+
+    return peticiones / duracion
+
+
+
+# Ejecutar el benchmark
+async def main(peticiones: int, concurrencia: int):
+    for ruta in ("/sync", "/async"):
+        rps = await medir(ruta, peticiones, concurrencia)
+        print(f"{ruta:<8} {peticiones} peticiones, concurrencia {concurrencia}: {rps:.1f} req/s")
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara SessionDep contra AsyncSessionDep")
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.peticiones, args.concurrencia))
\ No newline at end of file
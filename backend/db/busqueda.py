@@ -0,0 +1,52 @@
+import re
+from sqlalchemy import func, cast, or_, Float, literal_column, table, column
+from sqlmodel import select
+from ..models.producto import Producto
+
+"""
+    Módulo de búsqueda de texto completo de productos.
+
+    Construye la consulta de búsqueda según el motor: en PostgreSQL usa la columna tsvector
+    producto.busqueda y la similitud de trigramas del nombre (tolera errores de escritura);
+    en SQLite usa la tabla FTS5 producto_fts con coincidencia por prefijo.
+    Ambas se crean en la migración v0004_busquedaProductos.
+"""
+
+# Maximo de terminos que se toman del texto buscado
+maximoTerminos = 8
+
+# Columna tsvector de PostgreSQL (fuera del modelo, solo existe en ese motor)
+columnaBusqueda = literal_column("producto.busqueda")
+
+# Tabla virtual FTS5 de SQLite
+productoFts = table("producto_fts", column("rowid"))
+
+# Pesos de bm25 para nombre, descripcion y categoria
+pesosFts = (10.0, 2.0, 4.0)
+
+
+
+# Funcion para separar el texto buscado en terminos (sin la sintaxis de consulta del motor)
+def terminosBusqueda(texto: str) -> list[str]:
+    return re.findall(r"\w+", texto.lower())[:maximoTerminos]
+
+
+
+# Funcion para construir la consulta de busqueda: (consulta, rango, descendente)
+def consultaBusqueda(dialecto: str, texto: str):
+    if dialecto == "postgresql":
+        tsquery = func.websearch_to_tsquery("spanish", texto)
+        rango = cast(func.ts_rank_cd(columnaBusqueda, tsquery) + func.similarity(Producto.nombre, texto), Float)
+        consulta = select(Producto, rango).where(or_(columnaBusqueda.op("@@")(tsquery), Producto.nombre.op("%")(texto)))
+        return consulta, rango, True
+
+    if dialecto == "sqlite":
+        # Todos los terminos deben aparecer, cada uno como prefijo ("plat" encuentra "plata")
+        expresion = " ".join(f'"{termino}"*' for termino in terminosBusqueda(texto))
+        rango = cast(func.bm25(literal_column("producto_fts"), *pesosFts), Float)
+        consulta = select(Producto, rango).join(productoFts, productoFts.c.rowid == Producto.id).where(
+            literal_column("producto_fts").op("MATCH")(expresion)
+        )
+        return consulta, rango, False
+
+    raise ValueError(f"La búsqueda de productos no está soportada en {dialecto}")
\ No newline at end of file
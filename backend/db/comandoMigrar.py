@@ -0,0 +1,38 @@
+import sys
+from .db import engine, createAllTables
+from .migrar import versionActual, migracionesDisponibles
+
+"""
+    Línea de comandos de las migraciones.
+
+    Va aparte de db/migrar para que "python -m" no cargue ese módulo dos veces (db/db lo importa
+    al arrancar la app, y correrlo como __main__ creaba una segunda copia).
+
+    Uso:
+        python -m backend.db.comandoMigrar estado
+        python -m backend.db.comandoMigrar aplicar
+"""
+
+# Punto de entrada de la linea de comandos
+def main(argumentos: list[str]):
+    comando = argumentos[0] if argumentos else "estado"
+
+    if comando == "estado":
+        with engine.connect() as conexion:
+            actual = versionActual(conexion)
+        print(f"Versión aplicada: {actual}")
+        for version, nombre in migracionesDisponibles():
+            print(f"  [{'x' if version <= actual else ' '}] {nombre}")
+
+    elif comando == "aplicar":
+        aplicadas = createAllTables()
+        print(f"Migraciones aplicadas: {', '.join(aplicadas) if aplicadas else 'ninguna, el esquema ya estaba al día'}")
+
+    else:
+        print("Uso: python -m backend.db.comandoMigrar [estado|aplicar]")
+        sys.exit(1)
+
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
@@ -1,18 +1,27 @@
-from sqlmodel import create_engine, Session, SQLModel, select
+from sqlmodel import create_engine, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from fastapi import FastAPI, Depends
 from typing import Annotated
+from contextlib import asynccontextmanager
 from datetime import datetime as dt
 from passlib.context import CryptContext
 from ..models.administrador import Administrador
+from .pool import configuracionPool, envBool, QueuePoolMedido, AsyncQueuePoolMedido
+from .migrar import aplicarMigraciones, verificarEsquema
+from .replica import EstadoReplica
+from .instrumentacion import motoresSincronos
 import os
+import asyncio
 from dotenv import load_dotenv
 
 """
     Módulo de configuración de la base de datos.
 
     Gestiona la conexión con PostgreSQL, la creación del motor de base de datos,
-    la gestión de sesiones y la inicialización de tablas y datos semilla
-    (como el administrador por defecto).
+    la gestión de sesiones y la inicialización de tablas (mediante migraciones)
+    y datos semilla (como el administrador por defecto).
 """
 
 # Cargar variables de entorno
@@ -20,12 +29,52 @@ load_dotenv()
 
 # URL de la base de datos en Render
 db_url = os.getenv("DB_URL")
+
+# URL opcional de la replica de lectura
+replica_url = os.getenv("DB_REPLICA_URL")
 nombre = os.getenv("NOMBRE")
 email = os.getenv("EMAIL")
 contrasena = os.getenv("CONTRASENA")
 
+# Drivers asincronos para cada motor soportado
+driversAsincronos = {
+    "postgresql": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite"
+}
+
+
+
+# Funcion para traducir la URL de la DB a su driver asincrono
+def urlAsincrona(url: str):
+    urlDB = make_url(url)
+    driver = driversAsincronos.get(urlDB.get_backend_name(), urlDB.drivername)
+    return urlDB.set(drivername=driver)
+
+
+
+# Configuracion del pool (DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING)
+poolConfig = configuracionPool()
+
 # Crear motor de la base de datos
-engine = create_engine(db_url)
+engine = create_engine(db_url, poolclass=QueuePoolMedido, **poolConfig)
+
+# Crear motor asincrono (comparte la misma DB que el motor sincrono)
+asyncEngine = create_async_engine(urlAsincrona(db_url), poolclass=AsyncQueuePoolMedido, **poolConfig)
+
+# Crear motores de la replica de lectura (si esta configurada)
+replica = None
+if replica_url:
+    # Limitar el tiempo de conexion para detectar rapido una replica caida
+    argsReplica = {"connect_timeout": 3} if make_url(replica_url).get_backend_name() == "postgresql" else {}
+    replica = EstadoReplica(
+        create_engine(replica_url, poolclass=QueuePoolMedido, connect_args=argsReplica, **poolConfig),
+        create_async_engine(urlAsincrona(replica_url), poolclass=AsyncQueuePoolMedido, connect_args=argsReplica, **poolConfig)
+    )
+
+# Los planes de las consultas lentas del motor asincrono se capturan con el sincrono
+motoresSincronos[asyncEngine.sync_engine] = engine
+if replica:
+    motoresSincronos[replica.asyncEngine.sync_engine] = replica.engine
 
 # Contexto de contrasena
 contrasenaContext = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -39,13 +88,38 @@ def hashearContrasena(contrasena: str) -> str:
 
 
 
-# Funcion para crear tablas y admin por defecto
-def createAllTables(app: FastAPI):
-    SQLModel.metadata.create_all(engine)
+# Funcion para crear tablas y admin por defecto (DDL completo, solo cuando se pide)
+def createAllTables() -> list[str]:
+    aplicadas = aplicarMigraciones(engine)
     # Cuando crea las tablas, ingresa al admin
     crearAdminPredeterminado()
+    return aplicadas
+
+
+
+# Ciclo de vida de la app: verifica que el esquema este al dia y lanza el calentamiento
+@asynccontextmanager
+async def cicloVida(app: FastAPI):
+    if envBool("DB_MIGRAR_AL_INICIAR", False):
+        createAllTables()
+    else:
+        verificarEsquema(engine)
+
+    # Primera verificacion de la replica (hasta que responda se lee de la principal)
+    if replica:
+        replica.disponible()
+
+    # Abrir conexiones, compilar plantillas y ejecutar las consultas del catalogo en segundo plano
+    # (el servidor no atiende hasta salir de aqui: /salud responde 503 mientras calienta)
+    from ..utils.calentamiento import calentar, estadoCalentamiento
+    calentamiento = asyncio.create_task(calentar()) if envBool("APP_CALENTAR", True) else None
+    if not calentamiento:
+        estadoCalentamiento.update(estado="listo", listo=True)
     yield
 
+    if calentamiento:
+        calentamiento.cancel()
+
 
 
 # Creacion del usuario admin por defecto
@@ -65,6 +139,21 @@ def crearAdminPredeterminado():
 
 
 
+# Metricas de los pools de conexiones
+def metricasPool() -> dict:
+    return {
+        "configuracion": poolConfig,
+        "sincrono": engine.pool.metricas.resumen(engine.pool),
+        "asincrono": asyncEngine.pool.metricas.resumen(asyncEngine.pool),
+        "replica": {
+            **replica.resumen(),
+            "sincrono": replica.engine.pool.metricas.resumen(replica.engine.pool),
+            "asincrono": replica.asyncEngine.pool.metricas.resumen(replica.asyncEngine.pool)
+        } if replica else None
+    }
+
+
+
 # Sesion de la DB
 def getSession():
     with Session(engine) as session:
@@ -72,5 +161,35 @@ def getSession():
 
         
 
+# Sesion asincrona de la DB
+async def getAsyncSession():
+    async with AsyncSession(asyncEngine, expire_on_commit=False) as session:
+        yield session
+
+
+
+# Sesion de solo lectura (replica si esta sana, si no la principal)
+def getReadSession():
+    motor = replica.engine if replica and replica.disponible() else engine
+    with Session(motor) as session:
+        yield session
+
+
+
+# Sesion asincrona de solo lectura (replica si esta sana, si no la principal)
+async def getAsyncReadSession():
+    motor = replica.asyncEngine if replica and replica.disponible() else asyncEngine
+    async with AsyncSession(motor, expire_on_commit=False) as session:
+        yield session
+
+
+
 # Dependencia de la DB
-SessionDep = Annotated[Session, Depends(getSession)]
\ No newline at end of file
+SessionDep = Annotated[Session, Depends(getSession)]
+
+# Dependencia asincrona de la DB (para endpoints async def)
+AsyncSessionDep = Annotated[AsyncSession, Depends(getAsyncSession)]
+
+# Dependencias de solo lectura (para endpoints GET que toleran datos de la replica)
+ReadSessionDep = Annotated[Session, Depends(getReadSession)]
+AsyncReadSessionDep = Annotated[AsyncSession, Depends(getAsyncReadSession)]
\ No newline at end of file
@@ -0,0 +1,190 @@
+import unicodedata
+from sqlalchemy import String, and_, case, cast, func, literal_column, null, select, union_all
+from sqlalchemy.orm import aliased
+from ..models.producto import Producto
+from ..models.categoria import Categoria
+from ..models.varianteProducto import VarianteProducto
+from ..utils.enums import TipoVariante
+
+"""
+    Filtros y facetas del catálogo.
+
+    Las opciones de color y tamaño de cada producto se guardan como filas de VarianteProducto
+    con su valor normalizado, de modo que filtrar y contar por variante se resuelve desde el
+    índice (tipo, valor, productoID) en lugar de leer todos los productos.
+
+    Los conteos de todas las facetas (categoría, color, tamaño y rango de precio) salen de una
+    sola consulta UNION ALL. Cada faceta se cuenta con los filtros de las demás pero no con el
+    suyo, así el cliente ve cuántos productos sumaría al marcar otro valor de la misma faceta.
+    La página de productos viaja en la misma sentencia como una rama más de la unión.
+"""
+
+# Largo maximo del valor de una variante
+largoMaximoVariante = 50
+
+# Rangos de precio de la faceta de precio en COP (el ultimo no tiene limite superior)
+rangosPrecio = [(0, 20000), (20000, 50000), (50000, 100000), (100000, 200000), (200000, None)]
+
+# Facetas de variantes y su tipo
+facetasVariante = {"color": TipoVariante.COLOR, "tamano": TipoVariante.TAMANO}
+
+
+
+# Funcion para normalizar el valor de una opcion (sin tildes, mayusculas ni espacios extra)
+def normalizarOpcion(texto: str) -> str:
+    sinTildes = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return " ".join(sinTildes.lower().split())[:largoMaximoVariante]
+
+
+
+# Funcion para separar las opciones escritas en el formulario ("Dorado, Plateado") en {valor: etiqueta}
+def separarOpciones(texto: str | None) -> dict[str, str]:
+    opciones = {}
+    for etiqueta in (texto or "").split(","):
+        etiqueta = " ".join(etiqueta.split())[:largoMaximoVariante]
+        valor = normalizarOpcion(etiqueta)
+        if valor and valor not in opciones:
+            opciones[valor] = etiqueta
+    return opciones
+
+
+
+# Funcion para reemplazar las variantes de un tipo de un producto (conserva las filas que siguen)
+def asignarVariantes(producto: Producto, tipo: TipoVariante, texto: str | None):
+    opciones = separarOpciones(texto)
+    actuales = {variante.valor: variante for variante in producto.variantes if variante.tipo == tipo}
+
+    for valor, variante in actuales.items():
+        if valor in opciones:
+            variante.etiqueta = opciones[valor]
+
+    producto.variantes = [
+        variante for variante in producto.variantes if variante.tipo != tipo or variante.valor in opciones
+    ] + [
+        VarianteProducto(tipo=tipo, valor=valor, etiqueta=etiqueta) for valor, etiqueta in opciones.items() if valor not in actuales
+    ]
+
+
+
+# Funcion para obtener la clave y la etiqueta de un rango de precio
+def claveRango(desde: int, hasta: int | None) -> str:
+    return f"{desde}-{hasta if hasta is not None else ''}"
+
+def etiquetaRango(desde: int, hasta: int | None) -> str:
+    pesos = lambda valor: f"${valor:,}".replace(",", ".")
+    if hasta is None:
+        return f"Más de {pesos(desde)}"
+    return f"Hasta {pesos(hasta)}" if desde == 0 else f"{pesos(desde)} - {pesos(hasta)}"
+
+
+
+# Funcion para armar las condiciones de cada faceta a partir de los filtros recibidos
+def condicionesFacetas(categorias: list[int] | None, colores: list[str] | None, tamanos: list[str] | None,
+                       precioMin: int | None, precioMax: int | None, disponible: bool | None) -> dict[str, list]:
+    condiciones = {"base": [Producto.activo == True]}
+
+    # Disponibilidad (no es faceta, aplica a todos los conteos)
+    if disponible is not None:
+        condiciones["base"].append(Producto.stock > 0 if disponible else Producto.stock <= 0)
+
+    # Categorias (cualquiera de las marcadas)
+    if categorias:
+        condiciones["categoria"] = [Producto.categoriaID.in_(categorias)]
+
+    # Variantes: el producto debe tener alguno de los valores marcados de cada tipo
+    for faceta, valores in (("color", colores), ("tamano", tamanos)):
+        valores = [normalizarOpcion(valor) for valor in valores or []]
+        if valores:
+            condiciones[faceta] = [Producto.id.in_(
+                select(VarianteProducto.productoID).where(VarianteProducto.tipo == facetasVariante[faceta], VarianteProducto.valor.in_(valores))
+            )]
+
+    # Rango de precio
+    precio = []
+    if precioMin is not None:
+        precio.append(Producto.precio >= precioMin)
+    if precioMax is not None:
+        precio.append(Producto.precio <= precioMax)
+    if precio:
+        condiciones["precio"] = precio
+
+    return condiciones
+
+
+
+# Funcion para obtener las condiciones de todas las facetas menos una
+def filtros(condiciones: dict[str, list], excluir: str | None = None) -> list:
+    return [condicion for faceta, lista in condiciones.items() if faceta != excluir for condicion in lista]
+
+
+
+# Funcion para armar la consulta con los conteos de todas las facetas
+def consultaFacetas(condiciones: dict[str, list]):
+    # Categorias
+    porCategoria = (
+        select(literal_column("'categoria'").label("faceta"), cast(Producto.categoriaID, String).label("valor"),
+               func.min(Categoria.nombre).label("etiqueta"), func.count().label("cantidad"))
+        .join(Categoria, Categoria.id == Producto.categoriaID)
+        .where(*filtros(condiciones, "categoria"))
+        .group_by(Producto.categoriaID)
+    )
+
+    # Colores y tamanos (una variante por producto y valor, asi que count() cuenta productos)
+    porVariante = [
+        select(literal_column(f"'{faceta}'"), VarianteProducto.valor, func.min(VarianteProducto.etiqueta), func.count())
+        .join(Producto, Producto.id == VarianteProducto.productoID)
+        .where(VarianteProducto.tipo == tipo, *filtros(condiciones, faceta))
+        .group_by(VarianteProducto.valor)
+        for faceta, tipo in facetasVariante.items()
+    ]
+
+    # Rangos de precio (se agrupa sobre una subconsulta para no repetir el CASE)
+    rango = case(
+        *[(and_(Producto.precio >= desde, *([Producto.precio < hasta] if hasta is not None else [])), literal_column(f"'{claveRango(desde, hasta)}'"))
+          for desde, hasta in rangosPrecio]
+    ).label("rango")
+    precios = select(rango).where(*filtros(condiciones, "precio")).subquery()
+    porPrecio = select(literal_column("'precio'"), precios.c.rango, precios.c.rango, func.count()).where(precios.c.rango.is_not(None)).group_by(precios.c.rango)
+
+    return union_all(porCategoria, *porVariante, porPrecio)
+
+
+
+# Funcion para armar en una sola sentencia la pagina de productos y los conteos de las facetas
+def consultaPaginaFacetas(condiciones: dict[str, list], pagina):
+    productos = pagina.subquery()
+    conteos = consultaFacetas(condiciones).subquery()
+
+    # La rama de productos va primero para que la union tome los tipos de sus columnas
+    filas = union_all(
+        select(literal_column("'producto'").label("faceta"), null().label("valor"), null().label("etiqueta"), null().label("cantidad"), productos),
+        select(conteos, *[null() for _ in productos.c])
+    ).subquery()
+
+    # Las filas de conteo no tienen producto (la entidad llega como None)
+    return select(filas.c.faceta, filas.c.valor, filas.c.etiqueta, filas.c.cantidad, aliased(Producto, filas, adapt_on_names=True))
+
+
+
+# Funcion para agrupar las filas de la consulta por faceta
+def agruparFacetas(filas) -> dict[str, list[dict]]:
+    facetas = {"categoria": [], **{faceta: [] for faceta in facetasVariante}}
+    conteosPrecio = {}
+
+    for faceta, valor, etiqueta, cantidad, *_ in filas:
+        if faceta == "producto":
+            continue
+        if faceta == "precio":
+            conteosPrecio[valor] = cantidad
+        else:
+            facetas[faceta].append({"valor": valor, "etiqueta": etiqueta, "cantidad": cantidad})
+
+    # Los valores con mas productos primero; los rangos de precio en su orden y con los vacios
+    for lista in facetas.values():
+        lista.sort(key=lambda item: (-item["cantidad"], item["etiqueta"]))
+    facetas["precio"] = [
+        {"valor": claveRango(desde, hasta), "etiqueta": etiquetaRango(desde, hasta), "cantidad": conteosPrecio.get(claveRango(desde, hasta), 0)}
+        for desde, hasta in rangosPrecio
+    ]
+
+    return facetas
\ No newline at end of file
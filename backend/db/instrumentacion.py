@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime as dt
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+"""
+    Módulo de instrumentación de consultas SQL.
+
+    Escucha los eventos de ejecución de SQLAlchemy (en todos los motores, síncronos y
+    asíncronos) para contar las consultas y el tiempo en la DB de cada petición, marca
+    las formas de sentencia que se repiten dentro de una misma petición (patrón N+1)
+    y guarda las consultas lentas (con su plan de ejecución opcional) en un buffer circular.
+"""
+
+# Veces que una misma forma de sentencia puede repetirse antes de marcarla como N+1
+umbralRepeticiones = int(os.getenv("DB_N1_UMBRAL", 5))
+
+# Umbral (ms) a partir del cual una consulta se considera lenta (0 para desactivar)
+umbralLentaMs = float(os.getenv("DB_SLOW_QUERY_MS", 500))
+
+# Cantidad de consultas lentas que se conservan
+tamanoBufferLentas = int(os.getenv("DB_SLOW_QUERY_BUFFER", 100))
+
+# Capturar el plan de ejecucion de las consultas lentas (ejecuta la consulta otra vez)
+explicarLentas = os.getenv("DB_SLOW_QUERY_EXPLAIN", "false").strip().lower() in ("1", "true", "si", "yes")
+
+# Buffer circular de consultas lentas
+consultasLentas: deque = deque(maxlen=tamanoBufferLentas)
+
+# Hilo de fondo para capturar los planes sin bloquear la peticion
+ejecutorPlanes = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+# Motor sincrono equivalente a cada motor asincrono (los planes se capturan fuera del event loop)
+motoresSincronos = {}
+
+# Contador de la peticion en curso
+contadorActual: ContextVar["ContadorConsultas | None"] = ContextVar("contadorActual", default=None)
+
+# Contadores globales activos (usados por las pruebas para medir un bloque completo)
+contadoresGlobales: list["ContadorConsultas"] = []
+lockGlobales = threading.Lock()
+
+# Patron para reducir listas de parametros (IN (?, ?, ?)) a una sola forma
+patronListas = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)\s*,?)+\)")
+
+
+
+# Funcion para obtener la forma de una sentencia (sin depender del numero de parametros)
+def formaSentencia(sentencia: str) -> str:
+    return patronListas.sub("(?)", " ".join(sentencia.split()))
+
+
+
+# Acumulador de consultas de una peticion
+class ContadorConsultas:
+    def __init__(self, endpoint: str = None):
+        self.endpoint = endpoint
+        self.lock = threading.Lock()
+        self.consultas = 0
+        self.tiempoDB = 0.0
+        self.formas = Counter()
+
+    # Registrar una sentencia ejecutada
+    def registrar(self, sentencia: str, duracion: float):
+        with self.lock:
+            self.consultas += 1
+            self.tiempoDB += duracion
+            self.formas[formaSentencia(sentencia)] += 1
+
+    # Formas que superan el umbral de repeticiones (posibles N+1)
+    def repetidas(self, umbral: int = None) -> list[tuple[str, int]]:
+        umbral = umbralRepeticiones if umbral is None else umbral
+        return [(forma, veces) for forma, veces in self.formas.most_common() if veces > umbral]
+
+    @property
+    def tiempoMs(self) -> float:
+        return self.tiempoDB * 1000
+
+
+
+# Funcion para obtener el plan de ejecucion de una sentencia tal como llego al driver
+def planEjecucion(conexion, sentencia: str, parametros) -> str:
+    if conexion.dialect.name == "postgresql":
+        prefijo = "EXPLAIN (ANALYZE, BUFFERS) "
+    else:
+        prefijo = "EXPLAIN QUERY PLAN "
+    filas = conexion.exec_driver_sql(prefijo + sentencia, parametros).all()
+    return "\n".join(" ".join(str(valor) for valor in fila) for fila in filas)
+
+
+
+# Funcion para capturar el plan de una consulta lenta (corre en el hilo de fondo)
+def capturarPlan(registro: dict, motor, sentencia: str, parametros):
+    try:
+        with motor.connect() as conexion:
+            registro["plan"] = planEjecucion(conexion, sentencia, parametros)
+            conexion.rollback()
+    except Exception as e:
+        registro["plan"] = f"No se pudo obtener el plan: {e}"
+
+
+
+# Funcion para registrar una consulta lenta
+def registrarLenta(conexion, sentencia: str, parametros, duracion: float, executemany: bool):
+    contador = contadorActual.get()
+    registro = {
+        "fecha": dt.now().isoformat(),
+        "duracionMs": round(duracion * 1000, 1),
+        "endpoint": contador.endpoint if contador else None,
+        "sentencia": " ".join(sentencia.split()),
+        "parametros": repr(parametros)[:500],
+        "plan": None
+    }
+    consultasLentas.append(registro)
+    logging.warning(f"Consulta lenta ({registro['duracionMs']}ms) en {registro['endpoint']}: {registro['sentencia'][:300]} {registro['parametros'][:200]}")
+
+    # Solo se explican SELECT individuales (EXPLAIN ANALYZE vuelve a ejecutar la sentencia)
+    if explicarLentas and not executemany and sentencia.lstrip().upper().startswith("SELECT"):
+        motor = motoresSincronos.get(conexion.engine, conexion.engine)
+        ejecutorPlanes.submit(capturarPlan, registro, motor, sentencia, parametros)
+
+
+
+# Funcion para leer las consultas lentas (mas recientes primero)
+def listaConsultasLentas() -> list[dict]:
+    return list(reversed(consultasLentas))
+
+
+
+# Eventos de SQLAlchemy para todos los motores
+# El inicio se guarda en el contexto de ejecucion: si la sentencia falla no queda nada pendiente en la conexion
+@event.listens_for(Engine, "before_cursor_execute")
+def antesDeEjecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    contexto.inicioConsulta = time.perf_counter()
+
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def despuesDeEjecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    duracion = time.perf_counter() - contexto.inicioConsulta
+
+    # Las sentencias EXPLAIN de la captura de planes no se vuelven a registrar
+    if umbralLentaMs > 0 and duracion * 1000 >= umbralLentaMs and not sentencia.startswith("EXPLAIN"):
+        registrarLenta(conexion, sentencia, parametros, duracion, executemany)
+
+    contador = contadorActual.get()
+    if contador is not None:
+        contador.registrar(sentencia, duracion)
+
+    if contadoresGlobales:
+        with lockGlobales:
+            for contadorGlobal in contadoresGlobales:
+                contadorGlobal.registrar(sentencia, duracion)
+
+
+
+# Contexto para contar todas las consultas de un bloque, sin importar el hilo o la tarea
+@contextmanager
+def contarConsultas():
+    contador = ContadorConsultas()
+    with lockGlobales:
+        contadoresGlobales.append(contador)
+    try:
+        yield contador
+    finally:
+        with lockGlobales:
+            contadoresGlobales.remove(contador)
+
+
+
+# Contexto que falla si el bloque supera su presupuesto de consultas
+@contextmanager
+def presupuestoConsultas(maximo: int):
+    with contarConsultas() as contador:
+        yield contador
+
+    if contador.consultas > maximo:
+        detalle = "\n".join(f"  {veces}x {forma}" for forma, veces in contador.formas.most_common())
+        raise AssertionError(f"Se ejecutaron {contador.consultas} consultas (presupuesto: {maximo}):\n{detalle}")
+
+
+
+# Funcion para reportar las consultas de una peticion (headers y logs)
+def reportarPeticion(contador: ContadorConsultas, metodo: str, ruta: str, response):
+    response.headers["X-DB-Queries"] = str(contador.consultas)
+    response.headers["Server-Timing"] = f"db;dur={contador.tiempoMs:.1f};desc=\"{contador.consultas} consultas\""
+
+    for forma, veces in contador.repetidas():
+        logging.warning(f"Posible N+1 en \"{metodo} {ruta}\": {veces} ejecuciones de {forma[:200]}")
\ No newline at end of file
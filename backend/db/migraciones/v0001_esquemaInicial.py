@@ -0,0 +1,189 @@
+from sqlalchemy import MetaData, Table, Column, ForeignKey, Integer, String, Boolean, DateTime, Enum, JSON
+
+"""
+    Migración 0001: esquema inicial.
+
+    Crea las tablas del esquema base tal como estaban antes de las migraciones versionadas
+    (equivale al antiguo create_all del arranque). La definición está fija aquí y no sale de
+    los modelos: las columnas, tablas e índices posteriores los agrega cada migración.
+    Crea solo las tablas que aún no existan, por lo que es segura sobre bases de datos ya creadas.
+"""
+
+# Esquema base (no cambiar: los cambios nuevos van en otra migracion)
+metadataInicial = MetaData()
+
+Table(
+    "administrador", metadataInicial,
+    Column("nombre", String, nullable=False),
+    Column("email", String, nullable=False, unique=True),
+    Column("contrasenaHash", String, nullable=False),
+    Column("fechaCreacion", DateTime, nullable=False),
+    Column("id", Integer, primary_key=True)
+)
+
+Table(
+    "clientehistorico", metadataInicial,
+    Column("id", Integer, primary_key=True),
+    Column("nombre", String, nullable=False),
+    Column("email", String, nullable=False),
+    Column("telefono", String),
+    Column("fechaEliminacion", DateTime, nullable=False)
+)
+
+Table(
+    "categoria", metadataInicial,
+    Column("nombre", String, nullable=False),
+    Column("descripcion", String),
+    Column("activo", Boolean, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("administradorID", Integer, ForeignKey("administrador.id"))
+)
+
+Table(
+    "cliente", metadataInicial,
+    Column("nombre", String, nullable=False),
+    Column("email", String, nullable=False, unique=True),
+    Column("contrasenaHash", String, nullable=False),
+    Column("telefono", String),
+    Column("puntos", Integer, nullable=False),
+    Column("activo", Boolean, nullable=False),
+    Column("fechaCreacion", DateTime, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("administradorID", Integer, ForeignKey("administrador.id"))
+)
+
+Table(
+    "direccionenvio", metadataInicial,
+    Column("nombre", String, nullable=False),
+    Column("calle", String, nullable=False),
+    Column("localidad", String, nullable=False),
+    Column("codigoPostal", String, nullable=False),
+    Column("esPredeterminada", Boolean, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE"))
+)
+
+Table(
+    "disenopersonalizado", metadataInicial,
+    Column("imagenURL", String),
+    Column("fecha", DateTime, nullable=False),
+    Column("estado", Enum("ENVIADO", "EN_PRODUCCION", "TERMINADO", name="estadodiseno"), nullable=False),
+    Column("data", JSON),
+    Column("precioEstimado", Integer, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("administradorID", Integer, ForeignKey("administrador.id")),
+    Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE"))
+)
+
+Table(
+    "producto", metadataInicial,
+    Column("nombre", String, nullable=False, index=True),
+    Column("descripcion", String, nullable=False),
+    Column("precio", Integer, nullable=False),
+    Column("stock", Integer, nullable=False),
+    Column("imagenURL", String),
+    Column("sku", String, nullable=False, unique=True),
+    Column("activo", Boolean, nullable=False),
+    Column("esPersonalizado", Boolean, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("administradorID", Integer, ForeignKey("administrador.id")),
+    Column("categoriaID", Integer, ForeignKey("categoria.id"), nullable=False)
+)
+
+Table(
+    "solicitudrecuperacion", metadataInicial,
+    Column("token", String, nullable=False, unique=True, index=True),
+    Column("expiracion", DateTime, nullable=False),
+    Column("usado", Boolean, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE"))
+)
+
+Table(
+    "transaccionpuntos", metadataInicial,
+    Column("tipo", Enum("GANADOS", "REDIMIDOS", name="tipotransaccion"), nullable=False),
+    Column("cantidad", Integer, nullable=False),
+    Column("fecha", DateTime, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE"))
+)
+
+Table(
+    "wishlist", metadataInicial,
+    Column("fechaAgregado", DateTime, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE"))
+)
+
+Table(
+    "carrito", metadataInicial,
+    Column("fecha", DateTime, nullable=False),
+    Column("estado", Enum("ACTIVO", "CONVERTIDO", name="estadocarrito"), nullable=False),
+    Column("total", Integer, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE")),
+    Column("productoID", Integer, ForeignKey("producto.id", ondelete="CASCADE"))
+)
+
+Table(
+    "pedido", metadataInicial,
+    Column("fecha", DateTime, nullable=False),
+    Column("estado", Enum("POR_PAGAR", "PENDIENTE", "PAGADO", "CANCELADO", name="estadopedido"), nullable=False),
+    Column("total", Integer, nullable=False),
+    Column("clienteEliminado", Boolean, nullable=False),
+    Column("pagadoConPuntos", Boolean, nullable=False),
+    Column("puntosUsados", Integer, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("administradorID", Integer, ForeignKey("administrador.id")),
+    Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE")),
+    Column("direccionEnvioID", Integer, ForeignKey("direccionenvio.id"))
+)
+
+Table(
+    "wishlistitem", metadataInicial,
+    Column("fechaAgregado", DateTime, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("wishlistID", Integer, ForeignKey("wishlist.id", ondelete="CASCADE")),
+    Column("productoID", Integer, ForeignKey("producto.id", ondelete="CASCADE"))
+)
+
+Table(
+    "detallecarrito", metadataInicial,
+    Column("cantidad", Integer, nullable=False),
+    Column("fechaAgregado", DateTime, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("carritoID", Integer, ForeignKey("carrito.id", ondelete="CASCADE")),
+    Column("productoID", Integer, ForeignKey("producto.id", ondelete="CASCADE")),
+    Column("disenoID", Integer, ForeignKey("disenopersonalizado.id", ondelete="CASCADE")),
+    Column("precioUnidad", Integer, nullable=False),
+    Column("subtotal", Integer, nullable=False),
+    Column("esPersonalizado", Boolean, nullable=False)
+)
+
+Table(
+    "detallepedido", metadataInicial,
+    Column("cantidad", Integer, nullable=False),
+    Column("precioUnidad", Integer, nullable=False),
+    Column("subtotal", Integer, nullable=False),
+    Column("esPersonalizado", Boolean, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("pedidoID", Integer, ForeignKey("pedido.id"), nullable=False),
+    Column("productoID", Integer, ForeignKey("producto.id")),
+    Column("disenoID", Integer, ForeignKey("disenopersonalizado.id"))
+)
+
+Table(
+    "pago", metadataInicial,
+    Column("metodo", Enum("TRANSFERENCIA", "NEQUI", "DAVIPLATA", "EFECTIVO", "PUNTOS", name="metodopago"), nullable=False),
+    Column("fechaPago", DateTime, nullable=False),
+    Column("confirmado", Boolean, nullable=False),
+    Column("clienteEliminado", Boolean, nullable=False),
+    Column("referencia", String),
+    Column("urlCheckout", String),
+    Column("id", Integer, primary_key=True),
+    Column("administradorID", Integer, ForeignKey("administrador.id")),
+    Column("pedidoID", Integer, ForeignKey("pedido.id"), nullable=False)
+)
+
+def aplicar(conexion):
+    metadataInicial.create_all(conexion)
@@ -0,0 +1,26 @@
+from sqlalchemy import text
+from ..migrar import crearIndice
+
+"""
+    Migración 0002: índices para las rutas de acceso reales.
+
+    Crea los índices de los filtros del dashboard y de pedidos, de las claves foráneas
+    usadas en joins y de las búsquedas por cliente sobre tablas existentes.
+"""
+
+def aplicar(conexion):
+    crearIndice(conexion, "ix_pedido_estado_fecha", "pedido", "estado", "fecha")
+    crearIndice(
+        conexion, "ix_pedido_pagado_fecha", "pedido", "fecha", "pagadoConPuntos",
+        postgresql_where=text("estado = 'PAGADO'"), sqlite_where=text("estado = 'PAGADO'")
+    )
+    crearIndice(conexion, "ix_pedido_clienteID", "pedido", "clienteID")
+    crearIndice(conexion, "ix_detallepedido_pedidoID", "detallepedido", "pedidoID")
+    crearIndice(conexion, "ix_detallepedido_productoID", "detallepedido", "productoID")
+    crearIndice(conexion, "ix_detallecarrito_carrito_producto", "detallecarrito", "carritoID", "productoID")
+    crearIndice(conexion, "ix_producto_categoria_activo", "producto", "categoriaID", "activo")
+    crearIndice(conexion, "ix_producto_activo", "producto", "activo")
+    crearIndice(conexion, "ix_carrito_clienteID", "carrito", "clienteID")
+    crearIndice(conexion, "ix_categoria_nombre", "categoria", "nombre")
+    crearIndice(conexion, "ix_wishlist_clienteID", "wishlist", "clienteID")
+    crearIndice(conexion, "ix_transaccionpuntos_clienteID", "transaccionpuntos", "clienteID")
@@ -0,0 +1,12 @@
+from ..migrar import crearIndice
+
+"""
+    Migración 0003: índices para la paginación del catálogo.
+
+    Crea los índices (activo, precio, id) y (categoriaID, activo, precio, id) que sirven
+    el listado paginado por cursor con orden por precio o por ID.
+"""
+
+def aplicar(conexion):
+    crearIndice(conexion, "ix_producto_activo_precio", "producto", "activo", "precio", "id")
+    crearIndice(conexion, "ix_producto_categoria_activo_precio", "producto", "categoriaID", "activo", "precio", "id")
@@ -0,0 +1,94 @@
+"""
+    Migración 0004: búsqueda de texto completo de productos.
+
+    En PostgreSQL agrega la columna producto.busqueda (tsvector con el nombre, la categoría y
+    la descripción, en ese orden de peso) mantenida por triggers, un índice GIN sobre ella y
+    un índice de trigramas sobre el nombre para tolerar errores de escritura.
+    En SQLite crea la tabla virtual FTS5 producto_fts, también mantenida por triggers.
+"""
+
+# DDL de PostgreSQL
+sentenciasPostgres = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE producto ADD COLUMN IF NOT EXISTS busqueda tsvector",
+    """
+    CREATE OR REPLACE FUNCTION producto_busqueda() RETURNS trigger AS $$
+    BEGIN
+        NEW.busqueda :=
+            setweight(to_tsvector('spanish', coalesce(NEW.nombre, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce((SELECT nombre FROM categoria WHERE id = NEW."categoriaID"), '')), 'B') ||
+            setweight(to_tsvector('spanish', coalesce(NEW.descripcion, '')), 'C');
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS tr_producto_busqueda ON producto",
+    """
+    CREATE TRIGGER tr_producto_busqueda BEFORE INSERT OR UPDATE OF nombre, descripcion, "categoriaID" ON producto
+    FOR EACH ROW EXECUTE FUNCTION producto_busqueda()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION categoria_busqueda() RETURNS trigger AS $$
+    BEGIN
+        UPDATE producto SET nombre = nombre WHERE "categoriaID" = NEW.id;
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS tr_categoria_busqueda ON categoria",
+    """
+    CREATE TRIGGER tr_categoria_busqueda AFTER UPDATE OF nombre ON categoria
+    FOR EACH ROW WHEN (OLD.nombre IS DISTINCT FROM NEW.nombre) EXECUTE FUNCTION categoria_busqueda()
+    """,
+    # Llenar la columna en los productos existentes (dispara el trigger)
+    "UPDATE producto SET nombre = nombre",
+    "CREATE INDEX IF NOT EXISTS ix_producto_busqueda ON producto USING GIN (busqueda)",
+    "CREATE INDEX IF NOT EXISTS ix_producto_nombre_trgm ON producto USING GIN (nombre gin_trgm_ops)"
+]
+
+# Fila de producto_fts para un producto (el nombre de la categoria se copia)
+filaFts = """
+    INSERT INTO producto_fts (rowid, nombre, descripcion, categoria)
+    SELECT p.id, p.nombre, p.descripcion, c.nombre FROM producto p LEFT JOIN categoria c ON c.id = p."categoriaID"
+"""
+
+# DDL de SQLite
+sentenciasSqlite = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS producto_fts
+    USING fts5(nombre, descripcion, categoria, tokenize = 'unicode61 remove_diacritics 2')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_producto_fts_insertar AFTER INSERT ON producto BEGIN
+        {filaFts} WHERE p.id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_producto_fts_actualizar AFTER UPDATE OF nombre, descripcion, "categoriaID" ON producto BEGIN
+        DELETE FROM producto_fts WHERE rowid = OLD.id;
+        {filaFts} WHERE p.id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tr_producto_fts_eliminar AFTER DELETE ON producto BEGIN
+        DELETE FROM producto_fts WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_categoria_fts_actualizar AFTER UPDATE OF nombre ON categoria BEGIN
+        DELETE FROM producto_fts WHERE rowid IN (SELECT id FROM producto WHERE "categoriaID" = NEW.id);
+        {filaFts} WHERE p."categoriaID" = NEW.id;
+    END
+    """,
+    # Llenar la tabla con los productos existentes
+    "DELETE FROM producto_fts",
+    filaFts
+]
+
+
+
+def aplicar(conexion):
+    sentencias = {"postgresql": sentenciasPostgres, "sqlite": sentenciasSqlite}.get(conexion.dialect.name)
+    if sentencias is None:
+        raise RuntimeError(f"La búsqueda de productos no está soportada en {conexion.dialect.name}")
+
+    for sentencia in sentencias:
+        conexion.exec_driver_sql(sentencia)
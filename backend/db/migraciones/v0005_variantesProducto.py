@@ -0,0 +1,24 @@
+from sqlalchemy import MetaData, Table, Column, ForeignKey, Index, UniqueConstraint, Integer, String, Enum
+
+"""
+    Migración 0005: variantes de producto.
+
+    Crea la tabla varianteproducto con las opciones de color y tamaño normalizadas de cada
+    producto y el índice (tipo, valor, productoID) que usan los filtros y las facetas.
+    No hay datos que migrar: las opciones del formulario no se guardaban hasta ahora.
+"""
+
+def aplicar(conexion):
+    # La tabla de productos se lee de la DB para resolver la clave foranea
+    metadata = MetaData()
+    Table("producto", metadata, autoload_with=conexion)
+    Table(
+        "varianteproducto", metadata,
+        Column("tipo", Enum("COLOR", "TAMANO", name="tipovariante"), nullable=False),
+        Column("valor", String, nullable=False),
+        Column("etiqueta", String, nullable=False),
+        Column("id", Integer, primary_key=True),
+        Column("productoID", Integer, ForeignKey("producto.id", ondelete="CASCADE"), nullable=False),
+        UniqueConstraint("productoID", "tipo", "valor", name="uq_varianteproducto_producto_tipo_valor"),
+        Index("ix_varianteproducto_tipo_valor", "tipo", "valor", "productoID")
+    ).create(conexion, checkfirst=True)
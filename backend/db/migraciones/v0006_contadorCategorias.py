@@ -0,0 +1,19 @@
+from sqlalchemy import table, column, select, update, func, true
+from ..migrar import columnaExiste
+
+"""
+    Migración 0006: contador de productos activos por categoría.
+
+    Agrega la columna categoria.productosActivos (mantenida por los eventos de la sesión en
+    utils/contadorCategorias) y la llena con el conteo actual de cada categoría.
+"""
+
+def aplicar(conexion):
+    if not columnaExiste(conexion, "categoria", "productosActivos"):
+        conexion.exec_driver_sql('ALTER TABLE categoria ADD COLUMN "productosActivos" INTEGER NOT NULL DEFAULT 0')
+
+    # Conteo actual de cada categoria (con las columnas de esta version, no las del modelo)
+    categoria = table("categoria", column("id"), column("productosActivos"))
+    producto = table("producto", column("id"), column("categoriaID"), column("activo"))
+    conteo = select(func.count(producto.c.id)).where(producto.c.categoriaID == categoria.c.id, producto.c.activo == true()).scalar_subquery()
+    conexion.execute(update(categoria).values(productosActivos=conteo))
@@ -0,0 +1,28 @@
+from sqlalchemy import MetaData, Table, Column, ForeignKey, Index, UniqueConstraint, Integer, String, Text, DateTime
+
+"""
+    Migración 0007: claves de idempotencia.
+
+    Crea la tabla claveidempotencia con las respuestas guardadas de los pedidos y pagos
+    hechos con Idempotency-Key, su llave única (clienteID, ruta, clave) y el índice por
+    fecha que usa la limpieza de las claves vencidas.
+"""
+
+def aplicar(conexion):
+    # La tabla de clientes se lee de la DB para resolver la clave foranea
+    metadata = MetaData()
+    Table("cliente", metadata, autoload_with=conexion)
+    Table(
+        "claveidempotencia", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("clienteID", Integer, ForeignKey("cliente.id", ondelete="CASCADE"), nullable=False),
+        Column("ruta", String, nullable=False),
+        Column("clave", String(255), nullable=False),
+        Column("huella", String, nullable=False),
+        Column("codigoEstado", Integer),
+        Column("respuesta", Text),
+        Column("tipoContenido", String),
+        Column("fechaCreacion", DateTime, nullable=False),
+        UniqueConstraint("clienteID", "ruta", "clave", name="uq_claveidempotencia_cliente_ruta_clave"),
+        Index("ix_claveidempotencia_fechaCreacion", "fechaCreacion")
+    ).create(conexion, checkfirst=True)
@@ -0,0 +1,13 @@
+from ..migrar import columnaExiste
+
+"""
+    Migración 0008: latido de las claves de idempotencia.
+
+    Agrega la columna claveidempotencia.fechaLatido, que la petición original renueva
+    mientras está en curso. Un duplicado solo da la clave por abandonada cuando el latido
+    deja de llegar, no por la antigüedad de la fila.
+"""
+
+def aplicar(conexion):
+    if not columnaExiste(conexion, "claveidempotencia", "fechaLatido"):
+        conexion.exec_driver_sql('ALTER TABLE claveidempotencia ADD COLUMN "fechaLatido" TIMESTAMP')
@@ -0,0 +1,18 @@
+from datetime import datetime as dt
+from sqlalchemy import text
+from ..migrar import columnaExiste
+
+"""
+    Migración 0009: fecha de la última modificación de productos y categorías.
+
+    Agrega la columna fechaActualizacion (la llenan los modelos al insertar y actualizar) e
+    índices para leer su máximo sin recorrer la tabla. Es el Last-Modified del catálogo: sale
+    de la DB, así que todos los workers envían el mismo.
+"""
+
+def aplicar(conexion):
+    for tabla in ("producto", "categoria"):
+        if not columnaExiste(conexion, tabla, "fechaActualizacion"):
+            conexion.exec_driver_sql(f'ALTER TABLE {tabla} ADD COLUMN "fechaActualizacion" TIMESTAMP')
+        conexion.execute(text(f'UPDATE {tabla} SET "fechaActualizacion" = :ahora WHERE "fechaActualizacion" IS NULL'), {"ahora": dt.now()})
+        conexion.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS "ix_{tabla}_fechaActualizacion" ON {tabla} ("fechaActualizacion")')
@@ -0,0 +1,12 @@
+from ..migrar import columnaExiste
+
+"""
+    Migración 0010: encabezados de las respuestas idempotentes.
+
+    Agrega la columna claveidempotencia.encabezados con los encabezados de la respuesta
+    guardada (Location, Set-Cookie...), para que el reintento los reciba igual que la original.
+"""
+
+def aplicar(conexion):
+    if not columnaExiste(conexion, "claveidempotencia", "encabezados"):
+        conexion.exec_driver_sql('ALTER TABLE claveidempotencia ADD COLUMN "encabezados" TEXT')
@@ -0,0 +1,121 @@
+import re
+import logging
+import pkgutil
+import importlib
+from pathlib import Path
+from datetime import datetime as dt
+from sqlalchemy import MetaData, Table, Column, Index, Integer, String, DateTime, select, func, inspect, exc
+
+"""
+    Módulo de migraciones versionadas del esquema.
+
+    Cada script en db/migraciones se llama vNNNN_descripcion.py y define una funcion
+    aplicar(conexion). Las versiones aplicadas se registran en la tabla versionesquema,
+    de modo que al iniciar la app basta una consulta para saber si el esquema esta al dia
+    y el DDL completo solo corre cuando se pide explicitamente.
+
+    Los scripts no usan los modelos de la app (que siguen cambiando): cada uno declara las
+    tablas, columnas e índices tal como eran en su versión.
+
+    Uso (ver db/comandoMigrar):
+        python -m backend.db.comandoMigrar estado
+        python -m backend.db.comandoMigrar aplicar
+"""
+
+# Carpeta y paquete de los scripts de migracion
+carpetaMigraciones = Path(__file__).parent / "migraciones"
+paqueteMigraciones = __package__ + ".migraciones"
+
+# Patron del nombre de los scripts (v0001_esquemaInicial)
+patronMigracion = re.compile(r"^v(\d{4})_\w+$")
+
+# Tabla de control de versiones (fuera de los modelos de la app)
+metadataVersiones = MetaData()
+versionEsquema = Table(
+    "versionesquema",
+    metadataVersiones,
+    Column("version", Integer, primary_key=True),
+    Column("nombre", String, nullable=False),
+    Column("fechaAplicada", DateTime, nullable=False)
+)
+
+
+
+# Funcion para listar los scripts de migracion ordenados por version
+def migracionesDisponibles() -> list[tuple[int, str]]:
+    migraciones = []
+    for modulo in pkgutil.iter_modules([str(carpetaMigraciones)]):
+        coincidencia = patronMigracion.match(modulo.name)
+        if coincidencia:
+            migraciones.append((int(coincidencia.group(1)), modulo.name))
+    return sorted(migraciones)
+
+
+
+# Funcion para obtener la ultima version disponible
+def ultimaVersion() -> int:
+    migraciones = migracionesDisponibles()
+    return migraciones[-1][0] if migraciones else 0
+
+
+
+# Funcion para obtener la version aplicada en la DB (0 si nunca se migro)
+def versionActual(conexion) -> int:
+    try:
+        return conexion.execute(select(func.max(versionEsquema.c.version))).scalar() or 0
+    except exc.DBAPIError:
+        conexion.rollback()
+        return 0
+
+
+
+# Funcion para aplicar las migraciones pendientes, cada una en su transaccion
+def aplicarMigraciones(engine) -> list[str]:
+    metadataVersiones.create_all(engine)
+
+    with engine.connect() as conexion:
+        actual = versionActual(conexion)
+
+    aplicadas = []
+    for version, nombre in migracionesDisponibles():
+        if version <= actual:
+            continue
+
+        modulo = importlib.import_module(f"{paqueteMigraciones}.{nombre}")
+        with engine.begin() as conexion:
+            modulo.aplicar(conexion)
+            conexion.execute(versionEsquema.insert().values(version=version, nombre=nombre, fechaAplicada=dt.now()))
+
+        logging.info(f"Migración aplicada: {nombre}")
+        aplicadas.append(nombre)
+
+    return aplicadas
+
+
+
+# Funcion para verificar al iniciar que el esquema este al dia (una sola consulta)
+def verificarEsquema(engine):
+    with engine.connect() as conexion:
+        actual = versionActual(conexion)
+
+    ultima = ultimaVersion()
+    if actual < ultima:
+        raise RuntimeError(
+            f"El esquema de la DB está en la versión {actual} y la app requiere la {ultima}. "
+            "Ejecuta 'python -m backend.db.comandoMigrar aplicar' o define DB_MIGRAR_AL_INICIAR=true."
+        )
+
+
+
+# Funciones auxiliares para escribir migraciones idempotentes
+def columnaExiste(conexion, tabla: str, columna: str) -> bool:
+    return any(c["name"] == columna for c in inspect(conexion).get_columns(tabla))
+
+def crearIndices(conexion, *tablas):
+    for tabla in tablas:
+        for indice in tabla.__table__.indexes:
+            indice.create(conexion, checkfirst=True)
+
+def crearIndice(conexion, nombre: str, tabla: str, *columnas: str, **opciones):
+    tablaDB = Table(tabla, MetaData(), autoload_with=conexion)
+    Index(nombre, *(tablaDB.c[columna] for columna in columnas), **opciones).create(conexion, checkfirst=True)
\ No newline at end of file
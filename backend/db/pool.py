@@ -0,0 +1,110 @@
+import os
+import time
+import threading
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+"""
+    Módulo del pool de conexiones.
+
+    Lee la configuración del pool desde las variables de entorno y define pools que
+    miden el tiempo de espera de cada checkout, para poder dimensionar el pool con
+    datos reales desde el panel del administrador.
+"""
+
+# Funcion para leer un booleano del entorno
+def envBool(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ("1", "true", "si", "yes")
+
+
+
+# Configuracion del pool desde el entorno (por defecto los valores de SQLAlchemy)
+def configuracionPool() -> dict:
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", -1)),
+        "pool_pre_ping": envBool("DB_POOL_PRE_PING", False)
+    }
+
+
+
+# Acumulador de metricas de un pool
+class MetricasPool:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.esperaTotal = 0.0
+        self.esperaMaxima = 0.0
+        self.maximoEnUso = 0
+
+    # Registrar un checkout y cuanto tuvo que esperar
+    def registrarCheckout(self, espera: float, enUso: int):
+        with self.lock:
+            self.checkouts += 1
+            self.esperaTotal += espera
+            self.esperaMaxima = max(self.esperaMaxima, espera)
+            self.maximoEnUso = max(self.maximoEnUso, enUso)
+
+    # Registrar un checkout que supero el pool_timeout
+    def registrarTimeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    # Foto de las metricas junto al estado actual del pool
+    def resumen(self, pool) -> dict:
+        with self.lock:
+            promedio = self.esperaTotal / self.checkouts if self.checkouts else 0.0
+            return {
+                "tamano": pool.size(),
+                "enUso": pool.checkedout(),
+                "disponibles": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "overflowMaximo": pool._max_overflow,
+                "maximoEnUso": self.maximoEnUso,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "esperaPromedioMs": round(promedio * 1000, 3),
+                "esperaMaximaMs": round(self.esperaMaxima * 1000, 3)
+            }
+
+
+
+# Mixin que mide la espera de cada checkout del pool
+class MedicionMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasPool()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrarTimeout()
+            raise
+        self.metricas.registrarCheckout(time.perf_counter() - inicio, self.checkedout())
+        return conexion
+
+    # Conservar las metricas cuando SQLAlchemy recrea el pool (dispose)
+    def recreate(self):
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+
+
+# Pool medido para el motor sincrono
+class QueuePoolMedido(MedicionMixin, QueuePool):
+    pass
+
+
+
+# Pool medido para el motor asincrono
+class AsyncQueuePoolMedido(MedicionMixin, AsyncAdaptedQueuePool):
+    pass
\ No newline at end of file
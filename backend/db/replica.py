@@ -0,0 +1,92 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from sqlalchemy import text
+
+"""
+    Módulo de salud de la réplica de lectura.
+
+    Verifica periódicamente que la réplica (DB_REPLICA_URL) responda y que su retraso
+    de replicación esté por debajo del máximo permitido. Mientras no cumpla, las sesiones
+    de solo lectura vuelven a la base de datos principal.
+
+    La verificación corre en un hilo de fondo: las peticiones solo leen el último estado
+    (una réplica caída o lenta nunca las demora). Hasta la primera verificación se usa la principal.
+"""
+
+# Cada cuantos segundos se vuelve a verificar la replica
+intervaloVerificacion = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", 5))
+
+# Retraso maximo (segundos) tolerado antes de volver a la principal
+retrasoMaximo = float(os.getenv("DB_REPLICA_MAX_LAG", 30))
+
+# Consulta de retraso por motor (una DB que no es replica reporta 0)
+consultasRetraso = {
+    "postgresql": text(
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+}
+consultaPorDefecto = text("SELECT 0")
+
+
+
+# Estado de salud de la replica
+class EstadoReplica:
+    def __init__(self, engine, asyncEngine):
+        self.engine = engine
+        self.asyncEngine = asyncEngine
+        self.consulta = consultasRetraso.get(engine.dialect.name, consultaPorDefecto)
+        self.sana = False
+        self.retraso = 0.0
+        self.error = None
+        self.verificada = 0.0
+        self.lock = threading.Lock()
+        self.verificacion: Future | None = None
+        self.ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replica")
+
+    # Saber si toca volver a verificar
+    def vencida(self) -> bool:
+        return time.monotonic() - self.verificada >= intervaloVerificacion
+
+    # Guardar el resultado de una verificacion
+    def registrar(self, retraso: float = None, error: Exception = None):
+        sanaAntes, primera = self.sana, self.verificada == 0.0
+        self.verificada = time.monotonic()
+        self.error = str(error) if error else None
+        self.retraso = float(retraso or 0)
+        self.sana = error is None and self.retraso <= retrasoMaximo
+
+        # Avisar solo cuando cambia el estado (o si la primera verificacion falla)
+        if (sanaAntes or primera) and not self.sana:
+            logging.warning(f"Réplica no disponible (retraso={self.retraso:.1f}s, error={self.error}); usando la principal")
+        elif not sanaAntes and self.sana:
+            logging.info("Réplica disponible")
+
+    # Consultar el retraso de la replica (corre en el hilo de fondo)
+    def verificar(self):
+        try:
+            with self.engine.connect() as conexion:
+                self.registrar(retraso=conexion.execute(self.consulta).scalar())
+        except Exception as e:
+            self.registrar(error=e)
+
+    # Programar una verificacion si toca (una sola a la vez) y devolver el ultimo estado sin esperarla
+    def disponible(self) -> bool:
+        if self.vencida():
+            with self.lock:
+                if self.verificacion is None or self.verificacion.done():
+                    self.verificacion = self.ejecutor.submit(self.verificar)
+        return self.sana
+
+    # Resumen para las metricas
+    def resumen(self) -> dict:
+        return {
+            "sana": self.sana,
+            "retrasoSegundos": round(self.retraso, 3),
+            "retrasoMaximo": retrasoMaximo,
+            "error": self.error
+        }
\ No newline at end of file
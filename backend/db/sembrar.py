@@ -0,0 +1,319 @@
+import io
+import csv
+import math
+import time
+import random
+import argparse
+from datetime import datetime as dt, timedelta
+from itertools import accumulate
+from sqlalchemy import func, select, text, bindparam
+from .db import engine, hashearContrasena
+from ..models import Administrador, Categoria, Producto, Cliente, Wishlist, WishlistItem, Pedido, DetallePedido, Pago, TransaccionPuntos, VarianteProducto
+from ..utils.enums import EstadoPedido, MetodoPago, TipoTransaccion, TipoVariante
+from .facetas import normalizarOpcion
+from ..utils.contadorCategorias import recalcularContadores
+
+"""
+    Generador de datos sintéticos para pruebas de escala.
+
+    Llena la DB (DB_URL) con volúmenes parecidos a producción usando los modelos de la app:
+    clientes, categorías, productos, wishlists, pedidos con sus detalles, pagos y transacciones
+    de puntos. Las fechas siguen una distribución configurable y la popularidad de clientes y
+    productos es desigual (unos pocos concentran la mayoría de los pedidos).
+
+    En PostgreSQL las filas se cargan con COPY; en otros motores con inserciones por lotes.
+    Los IDs se asignan aquí, así que se puede sembrar sobre una DB con datos.
+
+    Uso (desde la raíz del repositorio, con el esquema migrado):
+        python -m backend.db.sembrar --clientes 100000 --productos 5000 --pedidos 1000000
+        python -m backend.db.sembrar --pedidos 50000 --distribucion estacional --desde 2024-01-01
+"""
+
+# Contrasena de todos los clientes sinteticos (permite iniciar sesion como cualquiera)
+contrasenaSintetica = "meraki123"
+
+# Pedidos por lote (cada lote es una transaccion)
+tamanoLote = 20000
+
+# Proporcion de estados de los pedidos
+pesosEstados = {
+    EstadoPedido.PAGADO: 70,
+    EstadoPedido.PENDIENTE: 10,
+    EstadoPedido.POR_PAGAR: 12,
+    EstadoPedido.CANCELADO: 8
+}
+
+# Metodos de pago que usan los clientes (PUNTOS se asigna a los pedidos pagados con puntos)
+metodosPago = [MetodoPago.NEQUI, MetodoPago.DAVIPLATA, MetodoPago.TRANSFERENCIA, MetodoPago.EFECTIVO]
+
+# Vocabulario para nombres y descripciones de productos (joyeria y accesorios)
+tiposProducto = ["Collar", "Pulsera", "Anillo", "Aretes", "Tobillera", "Dije", "Conjunto", "Choker", "Broche", "Cadena"]
+materiales = ["plata", "oro", "acero", "cuarzo", "perlas", "cristal", "madera", "resina", "cobre", "nácar", "ámbar", "jade"]
+estilos = ["minimalista", "bohemio", "vintage", "clásico", "artesanal", "floral", "geométrico", "delicado", "étnico", "moderno"]
+colores = ["dorado", "plateado", "rosa", "azul", "verde", "negro", "blanco", "turquesa", "rojo", "multicolor"]
+tamanos = ["Pequeño", "Mediano", "Grande"]
+nombresCategorias = ["Collares", "Pulseras", "Anillos", "Aretes", "Tobilleras", "Dijes", "Conjuntos", "Accesorios"]
+
+# Peso de cada mes en la distribucion estacional (picos en mayo y diciembre)
+pesosMeses = [0.7, 0.6, 0.8, 0.9, 1.4, 0.9, 0.8, 0.9, 1.0, 1.0, 1.3, 2.2]
+
+
+
+# Funcion para crear el generador de fechas de una distribucion
+def generadorFechas(rng: random.Random, desde: dt, hasta: dt, distribucion: str):
+    rango = (hasta - desde).total_seconds()
+
+    # Uniforme: cualquier momento del rango con la misma probabilidad
+    if distribucion == "uniforme":
+        return lambda: desde + timedelta(seconds=rng.random() * rango)
+
+    # Reciente: crecimiento exponencial, la mitad de los datos en el ultimo quinto del rango
+    if distribucion == "reciente":
+        tasa = math.log(2) / 0.2
+        return lambda: hasta - timedelta(seconds=rango * rng.expovariate(tasa) % rango)
+
+    # Estacional: uniforme dentro del mes, pero con mas peso en los meses de temporada
+    if distribucion == "estacional":
+        dias = [desde + timedelta(days=i) for i in range(max((hasta - desde).days, 1))]
+        pesosDias = list(accumulate(pesosMeses[dia.month - 1] for dia in dias))
+        return lambda: rng.choices(dias, cum_weights=pesosDias)[0] + timedelta(seconds=rng.random() * 86400)
+
+    raise ValueError(f"Distribución desconocida: {distribucion}")
+
+
+
+# Funcion para crear un selector con popularidad desigual (ley de Zipf)
+def selectorPopular(rng: random.Random, valores: list, exponente: float = 1.1):
+    acumulados = list(accumulate(1 / (posicion + 1) ** exponente for posicion in range(len(valores))))
+    return lambda k=1: rng.choices(valores, cum_weights=acumulados, k=k)
+
+
+
+# Funcion para obtener el siguiente ID libre de una tabla
+def siguienteID(conexion, modelo) -> int:
+    return (conexion.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+
+# Funcion para cargar filas en bloque (COPY en PostgreSQL, inserciones por lotes en los demas)
+def cargar(conexion, modelo, columnas: list[str], filas: list[tuple]):
+    if not filas:
+        return
+    tabla = modelo.__table__
+    preparador = conexion.dialect.identifier_preparer
+    driver = conexion.dialect.driver
+
+    if conexion.dialect.name == "postgresql" and driver in ("psycopg", "psycopg2"):
+        sentencia = f"COPY {preparador.format_table(tabla)} ({', '.join(preparador.quote(c) for c in columnas)}) FROM STDIN"
+        cursor = conexion.connection.dbapi_connection.cursor()
+        if driver == "psycopg":
+            with cursor.copy(sentencia) as copia:
+                for fila in filas:
+                    copia.write_row(fila)
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(filas)
+            buffer.seek(0)
+            cursor.copy_expert(f"{sentencia} WITH (FORMAT csv)", buffer)
+        cursor.close()
+    else:
+        conexion.execute(tabla.insert(), [dict(zip(columnas, fila)) for fila in filas])
+
+
+
+# Funcion para sincronizar las secuencias de IDs despues de cargar con IDs explicitos
+def sincronizarSecuencias(conexion, *modelos):
+    if conexion.dialect.name != "postgresql":
+        return
+    for modelo in modelos:
+        tabla = modelo.__table__.name
+        conexion.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{tabla}\"', 'id'), COALESCE((SELECT MAX(id) FROM \"{tabla}\"), 1))"
+        ))
+
+
+
+# Funcion para sembrar el catalogo (categorias y productos)
+def sembrarCatalogo(conexion, rng: random.Random, totalCategorias: int, totalProductos: int) -> list[tuple[int, int]]:
+    # Las categorias pertenecen al administrador (CategoriaRead lo exige)
+    administradorID = conexion.execute(select(func.min(Administrador.id))).scalar()
+    baseCategoria = siguienteID(conexion, Categoria)
+    categorias = list(range(baseCategoria, baseCategoria + totalCategorias))
+    cargar(conexion, Categoria, ["id", "nombre", "descripcion", "activo", "administradorID"], [
+        (categoriaID, f"{nombresCategorias[i % len(nombresCategorias)]} {i // len(nombresCategorias) + 1}", "Categoría sintética", True, administradorID)
+        for i, categoriaID in enumerate(categorias)
+    ])
+
+    baseProducto = siguienteID(conexion, Producto)
+    productos = []
+    for productoID in range(baseProducto, baseProducto + totalProductos):
+        tipo, estilo, material = rng.choice(tiposProducto), rng.choice(estilos), rng.choice(materiales)
+        descripcion = f"{tipo} {estilo} hecho a mano en {material} con detalles de {rng.choice(materiales)}, color {rng.choice(colores)}."
+        productos.append((
+            productoID, f"{tipo} {estilo} de {material} {productoID}", descripcion, rng.randint(5, 250) * 1000, rng.randint(0, 200),
+            f"SEED-{productoID}", rng.random() < 0.95, False, rng.choice(categorias)
+        ))
+    cargar(conexion, Producto, ["id", "nombre", "descripcion", "precio", "stock", "sku", "activo", "esPersonalizado", "categoriaID"], productos)
+
+    # La carga en bloque no pasa por el ORM: contar los productos activos de cada categoria
+    conexion.execute(recalcularContadores(set(categorias)))
+
+    # Variantes: de uno a tres colores por producto y tamanos en la mitad de ellos
+    variantes = []
+    for fila in productos:
+        opciones = [(TipoVariante.COLOR.name, color) for color in rng.sample(colores, rng.randint(1, 3))]
+        if rng.random() < 0.5:
+            opciones += [(TipoVariante.TAMANO.name, tamano) for tamano in rng.sample(tamanos, rng.randint(1, 3))]
+        variantes += [(fila[0], tipo, normalizarOpcion(etiqueta), etiqueta.capitalize()) for tipo, etiqueta in opciones]
+    cargar(conexion, VarianteProducto, ["productoID", "tipo", "valor", "etiqueta"], variantes)
+
+    return [(fila[0], fila[3]) for fila in productos]
+
+
+
+# Funcion para sembrar los clientes con sus wishlists
+def sembrarClientes(conexion, rng: random.Random, fechas, totalClientes: int, productos: list, proporcionWishlist: float) -> list[int]:
+    contrasenaHash = hashearContrasena(contrasenaSintetica)
+    baseCliente = siguienteID(conexion, Cliente)
+    clientes = list(range(baseCliente, baseCliente + totalClientes))
+    cargar(conexion, Cliente, ["id", "nombre", "email", "contrasenaHash", "telefono", "puntos", "activo", "fechaCreacion"], [
+        (clienteID, f"Cliente {clienteID}", f"cliente{clienteID}@seed.meraki.co", contrasenaHash,
+         f"3{rng.randint(100000000, 999999999)}", 0, rng.random() < 0.98, fechas())
+        for clienteID in clientes
+    ])
+
+    baseWishlist = siguienteID(conexion, Wishlist)
+    baseItem = siguienteID(conexion, WishlistItem)
+    wishlists, items = [], []
+    for clienteID in clientes:
+        if rng.random() >= proporcionWishlist:
+            continue
+        wishlistID = baseWishlist + len(wishlists)
+        fecha = fechas()
+        wishlists.append((wishlistID, clienteID, fecha))
+        for productoID, _ in rng.sample(productos, min(rng.randint(1, 6), len(productos))):
+            items.append((baseItem + len(items), wishlistID, productoID, fecha))
+    cargar(conexion, Wishlist, ["id", "clienteID", "fechaAgregado"], wishlists)
+    cargar(conexion, WishlistItem, ["id", "wishlistID", "productoID", "fechaAgregado"], items)
+
+    return clientes
+
+
+
+# Funcion para sembrar un lote de pedidos con sus detalles, pagos y puntos
+def sembrarLotePedidos(conexion, rng: random.Random, fechas, cantidad: int, lineasMaximas: int, elegirCliente, elegirProductos, bases: dict, puntosClientes: dict):
+    estados = list(pesosEstados)
+    pesos = list(pesosEstados.values())
+    pedidos, detalles, pagos, transacciones = [], [], [], []
+
+    for pedidoID in range(bases["pedido"], bases["pedido"] + cantidad):
+        clienteID = elegirCliente()[0]
+        estado = rng.choices(estados, pesos)[0]
+        fecha = fechas()
+
+        # Detalles del pedido (sin repetir producto)
+        total = 0
+        lineas = {productoID: precio for productoID, precio in elegirProductos(rng.randint(1, lineasMaximas))}
+        for productoID, precio in lineas.items():
+            cantidadLinea = rng.choices((1, 2, 3, 4), (70, 20, 7, 3))[0]
+            total += precio * cantidadLinea
+            detalles.append((bases["detalle"] + len(detalles), pedidoID, productoID, cantidadLinea, precio, precio * cantidadLinea, False))
+
+        pagadoConPuntos = estado == EstadoPedido.PAGADO and rng.random() < 0.05
+        pedidos.append((pedidoID, clienteID, fecha, estado.name, total, False, pagadoConPuntos, total if pagadoConPuntos else 0))
+
+        # Pago (los pedidos pendientes de crear el pago no lo tienen)
+        if estado in (EstadoPedido.PAGADO, EstadoPedido.PENDIENTE, EstadoPedido.CANCELADO):
+            metodo = MetodoPago.PUNTOS if pagadoConPuntos else rng.choice(metodosPago)
+            pagos.append((bases["pago"] + len(pagos), pedidoID, metodo.name, fecha + timedelta(minutes=rng.randint(1, 120)),
+                          estado == EstadoPedido.PAGADO, False, f"pago-seed-{pedidoID}"))
+
+        # Puntos ganados (5% del total) o redimidos
+        if estado == EstadoPedido.PAGADO:
+            tipo, puntos = (TipoTransaccion.REDIMIDOS, total) if pagadoConPuntos else (TipoTransaccion.GANADOS, int(total * 0.05))
+            transacciones.append((bases["transaccion"] + len(transacciones), clienteID, tipo.name, puntos, fecha))
+            puntosClientes[clienteID] = puntosClientes.get(clienteID, 0) + (puntos if tipo == TipoTransaccion.GANADOS else 0)
+
+    cargar(conexion, Pedido, ["id", "clienteID", "fecha", "estado", "total", "clienteEliminado", "pagadoConPuntos", "puntosUsados"], pedidos)
+    cargar(conexion, DetallePedido, ["id", "pedidoID", "productoID", "cantidad", "precioUnidad", "subtotal", "esPersonalizado"], detalles)
+    cargar(conexion, Pago, ["id", "pedidoID", "metodo", "fechaPago", "confirmado", "clienteEliminado", "referencia"], pagos)
+    cargar(conexion, TransaccionPuntos, ["id", "clienteID", "tipo", "cantidad", "fecha"], transacciones)
+
+    bases["pedido"] += len(pedidos)
+    bases["detalle"] += len(detalles)
+    bases["pago"] += len(pagos)
+    bases["transaccion"] += len(transacciones)
+
+
+
+# Funcion para sembrar todos los datos sinteticos
+def sembrar(clientes: int = 100000, categorias: int = 20, productos: int = 5000, pedidos: int = 1000000, lineas: int = 4,
+            wishlists: float = 0.3, desde: dt = None, hasta: dt = None, distribucion: str = "reciente", semilla: int = 42) -> dict:
+    rng = random.Random(semilla)
+    hasta = hasta or dt.now()
+    desde = desde or hasta - timedelta(days=730)
+    fechas = generadorFechas(rng, desde, hasta, distribucion)
+    inicio = time.perf_counter()
+
+    with engine.begin() as conexion:
+        catalogo = sembrarCatalogo(conexion, rng, categorias, productos)
+        listaClientes = sembrarClientes(conexion, rng, fechas, clientes, catalogo, wishlists)
+    print(f"  Catálogo y clientes listos ({time.perf_counter() - inicio:.1f}s)")
+
+    # Pocos clientes y productos concentran la mayoria de los pedidos
+    elegirCliente = selectorPopular(rng, rng.sample(listaClientes, len(listaClientes)))
+    elegirProductos = selectorPopular(rng, rng.sample(catalogo, len(catalogo)))
+
+    with engine.connect() as conexion:
+        bases = {
+            "pedido": siguienteID(conexion, Pedido),
+            "detalle": siguienteID(conexion, DetallePedido),
+            "pago": siguienteID(conexion, Pago),
+            "transaccion": siguienteID(conexion, TransaccionPuntos)
+        }
+    primerPedido = bases["pedido"]
+
+    puntosClientes = {}
+    for sembrados in range(0, pedidos, tamanoLote):
+        with engine.begin() as conexion:
+            sembrarLotePedidos(conexion, rng, fechas, min(tamanoLote, pedidos - sembrados), lineas, elegirCliente, elegirProductos, bases, puntosClientes)
+        print(f"  {min(sembrados + tamanoLote, pedidos)}/{pedidos} pedidos ({time.perf_counter() - inicio:.1f}s)", end="\r")
+    print()
+
+    with engine.begin() as conexion:
+        # Saldo de puntos de cada cliente segun sus transacciones
+        if puntosClientes:
+            conexion.execute(
+                Cliente.__table__.update().where(Cliente.__table__.c.id == bindparam("clienteID")).values(puntos=bindparam("saldo")),
+                [{"clienteID": clienteID, "saldo": puntos} for clienteID, puntos in puntosClientes.items()]
+            )
+        sincronizarSecuencias(conexion, Categoria, Producto, Cliente, Wishlist, WishlistItem, Pedido, DetallePedido, Pago, TransaccionPuntos)
+        conexion.execute(text("ANALYZE"))
+
+    return {
+        "categorias": categorias,
+        "productos": productos,
+        "clientes": clientes,
+        "pedidos": bases["pedido"] - primerPedido,
+        "segundos": round(time.perf_counter() - inicio, 1)
+    }
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos a escala de producción")
+    parser.add_argument("--clientes", type=int, default=100000)
+    parser.add_argument("--categorias", type=int, default=20)
+    parser.add_argument("--productos", type=int, default=5000)
+    parser.add_argument("--pedidos", type=int, default=1000000)
+    parser.add_argument("--lineas", type=int, default=4, help="Máximo de productos distintos por pedido")
+    parser.add_argument("--wishlists", type=float, default=0.3, help="Proporción de clientes con wishlist")
+    parser.add_argument("--desde", type=dt.fromisoformat, default=None, help="Fecha inicial (por defecto hace dos años)")
+    parser.add_argument("--hasta", type=dt.fromisoformat, default=None, help="Fecha final (por defecto ahora)")
+    parser.add_argument("--distribucion", choices=("uniforme", "reciente", "estacional"), default="reciente")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Sembrando en {engine.url.render_as_string(hide_password=True)}...")
+    resumen = sembrar(**vars(args))
+    print(f"Listo: {resumen}")
\ No newline at end of file
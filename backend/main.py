@@ -2,10 +2,14 @@ from fastapi import FastAPI, Request, UploadFile, File
 import time
 import logging
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
-from .db.db import createAllTables
+from starlette.middleware.base import BaseHTTPMiddleware
+from .db.db import cicloVida
+from .db.instrumentacion import ContadorConsultas, contadorActual, reportarPeticion
+from .utils.plantillas import templates
+from .utils.calentamiento import estadoCalentamiento
+from .utils.idempotencia import idempotencia
 
 """
     Punto de entrada principal de la aplicación FastAPI.
@@ -16,7 +20,10 @@ from .db.db import createAllTables
 """
 
 # Instancia del objeto FastAPI
-app = FastAPI(title="Meraki", lifespan=createAllTables)
+app = FastAPI(title="Meraki", lifespan=cicloVida)
+
+# Idempotency-Key de pedidos y pagos (se agrega antes que la sesion para quedar dentro de ella y leer el cliente)
+app.add_middleware(BaseHTTPMiddleware, dispatch=idempotencia)
 
 # Colocar duracion de una sesion (1 dia)
 app.add_middleware(SessionMiddleware, secret_key="josue", max_age=60 * 60 * 24)
@@ -24,19 +31,19 @@ app.add_middleware(SessionMiddleware, secret_key="josue", max_age=60 * 60 * 24)
 # Montar los archivos estáticos
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 
-# Indicar dónde están los templates
-templates = Jinja2Templates(directory="frontend/templates")
-
 # Configurar logger básico
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 
-# Middleware de logging sencillo
+# Middleware de logging sencillo (incluye consultas y tiempo en la DB)
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start = time.time()
+    contador = ContadorConsultas(f"{request.method} {request.url.path}")
+    contadorActual.set(contador)
     response = await call_next(request)
     duration = (time.time() - start) * 1000
-    logging.info(f"{request.client.host}:{request.client.port} - \"{request.method} {request.url.path}\" {response.status_code} {duration:.1f}ms")
+    reportarPeticion(contador, request.method, request.url.path, response)
+    logging.info(f"{request.client.host}:{request.client.port} - \"{request.method} {request.url.path}\" {response.status_code} {duration:.1f}ms - {contador.consultas} consultas {contador.tiempoMs:.1f}ms DB")
     return response
 
 # Routers de la app
@@ -51,6 +58,7 @@ from .routers import (
     detallePedido_router,
     direccionEnvio_router,
     disenoPersonalizado_router,
+    inicio_router,
     pago_router,
     pedido_router,
     producto_router,
@@ -71,6 +79,7 @@ routers = [
     detallePedido_router.router,
     direccionEnvio_router.router,
     disenoPersonalizado_router.router,
+    inicio_router.router,
     pago_router.router,
     pedido_router.router,
     producto_router.router,
@@ -85,6 +94,14 @@ for router in routers:
 
 
 
+# Salud - Disponibilidad para el balanceador (503 mientras calienta; degradado atiende igual)
+@app.get("/salud", include_in_schema=False)
+async def salud():
+    codigo = 503 if estadoCalentamiento["estado"] == "calentando" else 200
+    return JSONResponse(estadoCalentamiento, status_code=codigo)
+
+
+
 # RUTAS FRONTEND
 
 # Imagenes
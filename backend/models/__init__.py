@@ -1,23 +1,26 @@
 from ..utils.enums import *
 from .administrador import Administrador, AdministradorUpdate
-from .carrito import Carrito, CarritoCreate, CarritoUpdate, CarritoDelete
+from .carrito import Carrito, CarritoCreate, CarritoUpdate, CarritoDelete, LineaCarrito, CarritoVista, OperacionCarrito
 from .categoria import Categoria, CategoriaCreate, CategoriaUpdate, CategoriaDelete
+from .claveIdempotencia import ClaveIdempotencia
 from .cliente import Cliente, ClienteUpdate, ClienteDelete
 from .detalleCarrito import DetalleCarrito, DetalleCarritoUpdate, DetalleCarritoDelete
 from .detallePedido import DetallePedido, DetallePedidoCreate, DetallePedidoUpdate, DetallePedidoDelete
 from .direccionEnvio import DireccionEnvio, DireccionEnvioCreate, DireccionEnvioUpdate, DireccionEnvioDelete
 from .disenoPersonalizado import DisenoPersonalizado, DisenoPersonalizadoCreate, DisenoPersonalizadoUpdate, DisenoPersonalizadoDelete
 from .pago import Pago, PagoCreate, PagoUpdate
+from .inicio import Inicio
 from .pedido import Pedido, PedidoCreate, PedidoUpdate, PedidoDelete
-from .producto import Producto, ProductoCreate, ProductoUpdate
+from .producto import Producto, ProductoCreate, ProductoUpdate, ProductoPagina, ProductoFacetas, ProductoCambio, ProductoLote
 from .solicitudRecuperacion import SolicitudRecuperacion, SolicitudRecuperacionCreate, SolicitudRecuperacionUpdate
 from .transaccionPuntos import TransaccionPuntos, TransaccionPuntosCreate, TransaccionPuntosUpdate, TransaccionPuntosDelete
+from .varianteProducto import VarianteProducto
 from .wishlist import Wishlist
 from .wishlistItem import WishlistItem, WishlistItemCreate
 
 __all__ = [
     "Administrador", "AdministradorCreate", "AdministradorUpdate",
-    "Carrito", "CarritoCreate", "CarritoUpdate", "CarritoDelete",
+    "Carrito", "CarritoCreate", "CarritoUpdate", "CarritoDelete", "LineaCarrito", "CarritoVista",
     "Categoria", "CategoriaCreate", "CategoriaUpdate", "CategoriaDelete",
     "Cliente", "ClienteUpdate", "ClienteDelete",
     "DetalleCarrito", "DetalleCarritoCreate", "DetalleCarritoUpdate", "DetalleCarritoDelete",
@@ -25,10 +28,12 @@ __all__ = [
     "DireccionEnvio", "DireccionEnvioCreate", "DireccionEnvioUpdate", "DireccionEnvioDelete",
     "DisenoPersonalizado", "DisenoPersonalizadoCreate", "DisenoPersonalizadoUpdate", "DisenoPersonalizadoDelete",
     "Pago", "PagoCreate", "PagoUpdate", "PagoDelete",
+    "Inicio",
     "Pedido", "PedidoCreate", "PedidoUpdate", "PedidoDelete",
-    "Producto", "ProductoCreate", "ProductoUpdate",
+    "Producto", "ProductoCreate", "ProductoUpdate", "ProductoPagina", "ProductoFacetas", "ProductoCambio", "ProductoLote",
     "SolicitudRecuperacion", "SolicitudRecuperacionCreate", "SolicitudRecuperacionUpdate", "SolicitudRecuperacionDelete",
     "TransaccionPuntos", "TransaccionPuntosCreate", "TransaccionPuntosUpdate", "TransaccionPuntosDelete",
+    "VarianteProducto",
     "Wishlist", "WishlistCreate", "WishlistUpdate", "WishlistDelete",
     "WishlistItem", "WishlistItemCreate", "WishlistItemUpdate", "WishlistItemDelete"
 ]
\ No newline at end of file
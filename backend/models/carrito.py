@@ -2,7 +2,7 @@ from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime as dt
 from typing import Optional
 from sqlalchemy import Column, ForeignKey
-from ..utils.enums import EstadoCarrito
+from ..utils.enums import EstadoCarrito, AccionCarrito
 
 """
 Modelo para carrito.
@@ -22,7 +22,7 @@ class CarritoBase(SQLModel):
 # Modelo de carrito
 class Carrito(CarritoBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE")))
+    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE"), index=True))
     cliente: Optional["Cliente"] = Relationship(back_populates="carrito")
     productoID: int = Field(sa_column=Column(ForeignKey("producto.id", ondelete="CASCADE")))
     detalles: list["DetalleCarrito"] = Relationship(back_populates="carrito", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
@@ -54,6 +54,41 @@ class CarritoDelete(CarritoBase):
 
 
 
+# Linea del carrito con los datos del producto o diseño que muestra la vista (los diseños no tienen stock)
+class LineaCarrito(SQLModel):
+    id: int
+    productoID: Optional[int] = None
+    disenoID: Optional[int] = None
+    nombre: str
+    imagenURL: Optional[str] = None
+    cantidad: int
+    precioUnidad: int
+    subtotal: int
+    stock: Optional[int] = None
+    activo: bool
+    esPersonalizado: bool
+
+
+
+# Vista del carrito con sus lineas y totales
+class CarritoVista(SQLModel):
+    id: int
+    lineas: list[LineaCarrito]
+    cantidadProductos: int
+    subtotal: int
+    costoEnvio: int
+    total: int
+
+
+
+# Operacion de una edicion del carrito en lote (la cantidad no aplica al eliminar)
+class OperacionCarrito(SQLModel):
+    accion: AccionCarrito
+    productoID: int
+    cantidad: int = Field(default=1, ge=1)
+
+
+
 # Importaciones diferidas
 from .cliente import Cliente
 from .producto import Producto
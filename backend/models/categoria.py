@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from datetime import datetime as dt
 from typing import Optional
 
 """
@@ -11,7 +12,7 @@ from typing import Optional
 
 # Modelo base para categorías
 class CategoriaBase(SQLModel):
-    nombre: str = Field()
+    nombre: str = Field(index=True)
     descripcion: Optional[str] = Field(default=None)
     activo: bool = Field(default=True)
 
@@ -25,6 +26,10 @@ class CategoriaBase(SQLModel):
 class Categoria(CategoriaBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     administradorID: Optional[int] = Field(default=None, foreign_key="administrador.id")
+    # Productos activos de la categoria (contador desnormalizado, ver utils/contadorCategorias)
+    productosActivos: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Fecha de la ultima modificacion (tambien en los UPDATE directos del contador; da el Last-Modified del catalogo)
+    fechaActualizacion: Optional[dt] = Field(default_factory=dt.now, index=True, sa_column_kwargs={"default": dt.now, "onupdate": dt.now})
     administrador: "Administrador" = Relationship(back_populates="categorias")
     productos: list["Producto"] = Relationship(back_populates="categoria")
 
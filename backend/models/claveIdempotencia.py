@@ -0,0 +1,34 @@
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, Text
+from typing import Optional
+from datetime import datetime as dt
+
+"""
+    Modelo para clave de idempotencia.
+
+    Guarda la respuesta de una petición de pedido o de pago hecha con el encabezado
+    Idempotency-Key, para que los reintentos del cliente con la misma clave reciban esa
+    respuesta (cuerpo y encabezados, estos como una lista JSON de pares) sin repetir el
+    trabajo. Mientras la petición original está en curso la fila no tiene código de estado
+    y su proceso renueva fechaLatido; si deja de hacerlo, la clave se da por abandonada. Las filas vencen tras IDEMPOTENCIA_TTL segundos (un día).
+"""
+
+# Modelo de clave de idempotencia
+class ClaveIdempotencia(SQLModel, table=True):
+    # Una clave por cliente y ruta; el indice por fecha sirve la limpieza de las vencidas
+    __table_args__ = (
+        UniqueConstraint("clienteID", "ruta", "clave", name="uq_claveidempotencia_cliente_ruta_clave"),
+        Index("ix_claveidempotencia_fechaCreacion", "fechaCreacion"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE"), nullable=False))
+    ruta: str = Field()
+    clave: str = Field(max_length=255)
+    huella: str = Field()
+    codigoEstado: Optional[int] = Field(default=None)
+    respuesta: Optional[str] = Field(default=None, sa_column=Column(Text))
+    tipoContenido: Optional[str] = Field(default=None)
+    encabezados: Optional[str] = Field(default=None, sa_column=Column(Text))
+    fechaCreacion: dt = Field(default_factory=dt.now)
+    fechaLatido: Optional[dt] = Field(default_factory=dt.now)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime as dt
 from typing import Optional
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index
 
 """
     Modelo para detalle de carrito.
@@ -20,6 +20,11 @@ class DetalleCarritoBase(SQLModel):
 
 # Modelo de detalle de carrito
 class DetalleCarrito(DetalleCarritoBase, table=True):
+    # Indice para buscar las lineas de un carrito (y un producto dentro de el)
+    __table_args__ = (
+        Index("ix_detallecarrito_carrito_producto", "carritoID", "productoID"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     carritoID: int = Field(sa_column=Column(ForeignKey("carrito.id", ondelete="CASCADE")))
     carrito: "Carrito" = Relationship(back_populates="detalles")
@@ -27,9 +27,9 @@ class DetallePedidoBase(SQLModel):
 # Modelo de detalle de pedido
 class DetallePedido(DetallePedidoBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    pedidoID: int = Field(foreign_key="pedido.id")
+    pedidoID: int = Field(foreign_key="pedido.id", index=True)
     pedido: "Pedido" = Relationship(back_populates="detalles", sa_relationship_kwargs={"cascade": "all, delete"})
-    productoID: Optional[int] = Field(default=None, foreign_key="producto.id")
+    productoID: Optional[int] = Field(default=None, foreign_key="producto.id", index=True)
     producto: "Producto" = Relationship(back_populates="detallesPedido")
     disenoID: Optional[int] = Field(default=None, foreign_key="disenopersonalizado.id")
     disenoPersonalizado: Optional["DisenoPersonalizado"] = Relationship(back_populates="detallesPedido")
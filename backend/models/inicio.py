@@ -0,0 +1,19 @@
+from sqlmodel import SQLModel
+from .categoria import CategoriaRead
+from .producto import Producto
+
+"""
+    Modelo de la página de inicio.
+
+    Agrupa en una sola respuesta lo que la página principal necesita para su primera vista:
+    las categorías activas con su conteo de productos, el catálogo de productos activos (la
+    grilla con sus filtros), los productos destacados, los más recientes y los más vendidos.
+"""
+
+# Contenido de la pagina de inicio
+class Inicio(SQLModel):
+    categorias: list[CategoriaRead]
+    productos: list[Producto]
+    destacados: list[Producto]
+    recientes: list[Producto]
+    masVendidos: list[Producto]
\ No newline at end of file
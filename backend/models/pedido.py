@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship, Column
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, text
 from datetime import datetime as dt
 from typing import Optional
 from ..utils.enums import EstadoPedido
@@ -30,10 +30,20 @@ class PedidoBase(SQLModel):
 
 # Modelo de pedido
 class Pedido(PedidoBase, table=True):
+    # Indices para los filtros del dashboard (estado + rango de fechas)
+    __table_args__ = (
+        Index("ix_pedido_estado_fecha", "estado", "fecha"),
+        Index(
+            "ix_pedido_pagado_fecha", "fecha", "pagadoConPuntos",
+            postgresql_where=text("estado = 'PAGADO'"),
+            sqlite_where=text("estado = 'PAGADO'")
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     administradorID: int | None = Field(default=None, foreign_key="administrador.id")
     administrador: "Administrador" = Relationship(back_populates="pedidos")
-    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE")))
+    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE"), index=True))
     cliente: "Cliente" = Relationship(back_populates="pedidos")
     direccionEnvioID: Optional[int] = Field(default=None, foreign_key="direccionenvio.id")
     direccionEnvio: Optional["DireccionEnvio"] = Relationship(back_populates="pedidos")
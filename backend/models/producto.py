@@ -1,4 +1,6 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
+from datetime import datetime as dt
 from typing import Optional
 
 """
@@ -28,6 +30,14 @@ class ProductoBase(SQLModel):
 
 # Modelo de producto
 class Producto(ProductoBase, table=True):
+    # Indices para el catalogo (activos), los conteos por categoria y la paginacion por precio
+    __table_args__ = (
+        Index("ix_producto_categoria_activo", "categoriaID", "activo"),
+        Index("ix_producto_activo", "activo"),
+        Index("ix_producto_activo_precio", "activo", "precio", "id"),
+        Index("ix_producto_categoria_activo_precio", "categoriaID", "activo", "precio", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     administradorID: Optional[int] = Field(default=None, foreign_key="administrador.id")
     administrador: "Administrador" = Relationship(back_populates="productos")
@@ -36,6 +46,9 @@ class Producto(ProductoBase, table=True):
     detallesCarrito: list["DetalleCarrito"] = Relationship(back_populates="producto", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
     detallesPedido: list["DetallePedido"] = Relationship(back_populates="producto", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
     wishlistItems: list["WishlistItem"] = Relationship(back_populates="producto")
+    variantes: list["VarianteProducto"] = Relationship(back_populates="producto", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
+    # Fecha de la ultima modificacion (tambien en los INSERT/UPDATE directos; da el Last-Modified del catalogo)
+    fechaActualizacion: Optional[dt] = Field(default_factory=dt.now, index=True, sa_column_kwargs={"default": dt.now, "onupdate": dt.now})
 
 
 
@@ -57,6 +70,44 @@ class ProductoUpdate(SQLModel):
 
 
 
+# Cambio de un producto en una actualizacion en lote (identificado por ID o por SKU)
+class ProductoCambio(SQLModel):
+    id: Optional[int] = None
+    sku: Optional[str] = None
+    precio: Optional[int] = Field(default=None, ge=0)
+    stock: Optional[int] = Field(default=None, ge=0)
+    activo: Optional[bool] = None
+
+
+
+# Resultado de una actualizacion en lote
+class ProductoLote(SQLModel):
+    actualizados: list[Producto]
+    noEncontrados: list[int | str] = []
+
+
+
+# Pagina de productos (paginacion por cursor)
+class ProductoPagina(SQLModel):
+    productos: list[Producto]
+    siguienteCursor: Optional[str] = None
+
+
+
+# Conteo de productos de un valor de faceta
+class Faceta(SQLModel):
+    valor: str
+    etiqueta: str
+    cantidad: int
+
+
+
+# Pagina de productos con los conteos de cada faceta (categoria, color, tamano y precio)
+class ProductoFacetas(ProductoPagina):
+    facetas: dict[str, list[Faceta]]
+
+
+
 # Modelo de producto para eliminar
 class ProductoDelete(ProductoBase):
     pass
@@ -67,4 +118,5 @@ class ProductoDelete(ProductoBase):
 from .categoria import Categoria
 from .detalleCarrito import DetalleCarrito
 from .detallePedido import DetallePedido
-from .wishlistItem import WishlistItem
\ No newline at end of file
+from .wishlistItem import WishlistItem
+from .varianteProducto import VarianteProducto
\ No newline at end of file
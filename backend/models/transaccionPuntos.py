@@ -23,7 +23,7 @@ class TransaccionPuntosBase(SQLModel):
 # Modelo de transaccion de puntos
 class TransaccionPuntos(TransaccionPuntosBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE")))
+    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE"), index=True))
     cliente: "Cliente" = Relationship(back_populates="transacciones")
 
 
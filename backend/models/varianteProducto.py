@@ -0,0 +1,37 @@
+from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
+from typing import Optional
+from ..utils.enums import TipoVariante
+
+"""
+    Modelo para variante de producto.
+
+    Representa una opción de color o tamaño disponible para un producto.
+    Guarda el valor normalizado (sin mayúsculas, tildes ni espacios extra) para filtrar
+    y contar por variante desde un índice, y la etiqueta tal como la escribió el administrador.
+"""
+
+# Modelo base de variante de producto
+class VarianteProductoBase(SQLModel):
+    tipo: TipoVariante = Field()
+    valor: str = Field()
+    etiqueta: str = Field()
+
+
+
+# Modelo de variante de producto
+class VarianteProducto(VarianteProductoBase, table=True):
+    # Una variante por producto, tipo y valor; el indice (tipo, valor, productoID) sirve los filtros y las facetas
+    __table_args__ = (
+        UniqueConstraint("productoID", "tipo", "valor", name="uq_varianteproducto_producto_tipo_valor"),
+        Index("ix_varianteproducto_tipo_valor", "tipo", "valor", "productoID"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    productoID: int = Field(sa_column=Column(ForeignKey("producto.id", ondelete="CASCADE"), nullable=False))
+    producto: "Producto" = Relationship(back_populates="variantes")
+
+
+
+# Importaciones diferidas
+from .producto import Producto
\ No newline at end of file
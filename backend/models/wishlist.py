@@ -19,7 +19,7 @@ class WishlistBase(SQLModel):
 # Modelo de wishlist
 class Wishlist(WishlistBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE")))
+    clienteID: int = Field(sa_column=Column(ForeignKey("cliente.id", ondelete="CASCADE"), index=True))
     cliente: "Cliente" = Relationship(back_populates="wishlist")
     items: list["WishlistItem"] = Relationship(back_populates="wishlist", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
 
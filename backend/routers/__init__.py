@@ -14,9 +14,10 @@ from . import detallePedido_router
 from . import pago_router
 from . import disenoPersonalizado_router
 from . import transaccionPuntos_router
+from . import inicio_router
 
 __all__ = [
     "administrador_router", "solicitudRecuperacion_router", "cliente_router", "direccionEnvio_router", "producto_router", "categoria_router",
     "carrito_router", "detalleCarrito_router", "wishlist_router", "pedido_router", "detallePedido_router", "pago_router", "disenoPersonalizado_router",
-    "transaccionPuntos_router", "dashboardAdmin_router"
+    "transaccionPuntos_router", "dashboardAdmin_router", "inicio_router"
 ]
\ No newline at end of file
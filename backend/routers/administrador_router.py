@@ -2,11 +2,10 @@ from fastapi import APIRouter, HTTPException, Form, Depends
 from sqlmodel import select
 from ..models.administrador import Administrador, AdministradorUpdate
 from ..auth.auth import adminActual
-from ..db.db import SessionDep, hashearContrasena
-from fastapi.templating import Jinja2Templates
+from ..db.db import SessionDep, hashearContrasena, metricasPool
+from ..db.instrumentacion import listaConsultasLentas
 
 router = APIRouter(prefix="/admin", tags=["Administrador"])
-templates = Jinja2Templates(directory="frontend/templates/auth")
 
 # UPDATE - Actualizar nombre del administrador
 @router.patch("/", response_model=Administrador)
@@ -59,4 +58,24 @@ def actualizarContrasena(
     session.add(adminDB)
     session.commit()
     session.refresh(adminDB)
-    return {"mensaje": "Contraseña actualizada correctamente"}
\ No newline at end of file
+    return {"mensaje": "Contraseña actualizada correctamente"}
+
+
+
+# READ - Metricas del pool de conexiones
+@router.get("/metricas/pool")
+def metricasPoolConexiones(_=Depends(adminActual)):
+    """
+    Este endpoint devuelve el estado y las metricas de espera de los pools de conexiones.
+    """
+    return metricasPool()
+
+
+
+# READ - Consultas lentas recientes
+@router.get("/metricas/consultas-lentas")
+def consultasLentas(_=Depends(adminActual)):
+    """
+    Este endpoint devuelve las ultimas consultas que superaron el umbral de lentitud, con su plan si se capturo.
+    """
+    return listaConsultasLentas()
\ No newline at end of file
@@ -4,10 +4,10 @@ from sqlmodel import select
 from ..db.db import SessionDep, contrasenaContext
 from ..models.administrador import Administrador
 from ..models.cliente import Cliente
-from fastapi.templating import Jinja2Templates
+from ..auth.auth import iniciarSesionCliente
+from ..utils.plantillas import templates
 
 router = APIRouter(prefix="/auth", tags=["Autenticación"])
-templates = Jinja2Templates(directory="frontend/templates")
 
 # CREATE - Login
 @router.post("/login", response_class=HTMLResponse)
@@ -31,7 +31,7 @@ def login(
     # Intentar como cliente
     clienteDB = session.exec(select(Cliente).where(Cliente.email == email)).first()
     if clienteDB and contrasenaContext.verify(contrasena, clienteDB.contrasenaHash):
-        request.session["clienteID"] = clienteDB.id
+        iniciarSesionCliente(request, clienteDB.id)
         return RedirectResponse(url="/", status_code=303)
     
     # Si no coincide ninguno
@@ -1,24 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends, Form
-from ..auth.auth import clienteActual
-from sqlmodel import select, delete
-from ..models.carrito import Carrito
+from fastapi import APIRouter, HTTPException, Depends, Form, Body
+from datetime import datetime as dt
+from collections import Counter
+from ..auth.auth import clienteActualAsync, principalActual, principalActualAsync
+from sqlmodel import select, delete, func, and_, case, true
+from sqlalchemy import update, insert, values, column, Integer
+from ..models.carrito import Carrito, CarritoVista, LineaCarrito, OperacionCarrito
 from ..models.detalleCarrito import DetalleCarrito, DetalleCarritoCreate
 from ..models.producto import Producto
 from ..models.pedido import Pedido
 from ..models.direccionEnvio import DireccionEnvio
 from ..models.detallePedido import DetallePedido
-from ..utils.enums import EstadoPedido
-from ..db.db import SessionDep
+from ..models.disenoPersonalizado import DisenoPersonalizado
+from ..utils.enums import EstadoPedido, AccionCarrito
+from ..utils.catalogo import invalidarProductos
+from ..db.db import SessionDep, AsyncSessionDep
 
 router = APIRouter(prefix="/carrito", tags=["Carrito"])
 
+# Costo de envio y subtotal desde el que el envio es gratis (COP)
+costoEnvio = 8900
+minimoEnvioGratis = 30000
+
+# Maximo de operaciones por edicion en lote
+maximoOperacionesCarrito = 200
+
+# Nombre de las lineas con diseno personalizado (no tienen producto)
+nombreDiseno = "Diseño personalizado"
+
 # CREATE - Agregar producto al carrito
 @router.post("/agregar-producto", status_code=201, response_model=DetalleCarrito)
 def agregarCarrito(
     productoID: int = Form(...),
     cantidad: int = Form(1),
     session: SessionDep = None, 
-    cliente=Depends(clienteActual)
+    principal=Depends(principalActual)
 ):
     """
     Este endpoint recibe un productoID y una cantidad y agrega el producto al carrito del cliente.
@@ -29,15 +44,14 @@ def agregarCarrito(
     if not productoDB or not productoDB.activo:
         raise HTTPException(404, "Producto no encontrado")
     
-    # Obtener el carrito del cliente
-    carritoDB = session.exec(select(Carrito).where(Carrito.clienteID == cliente.id)).first()
-    if not carritoDB:
+    # El carrito del cliente viene resuelto con la sesion
+    if not principal.carritoID:
         raise HTTPException(404, "No tienes un carrito asignado")
 
     # Buscar si el producto ya está en el carrito
     detalleDB = session.exec(
         select(DetalleCarrito).where(
-            DetalleCarrito.carritoID == carritoDB.id,
+            DetalleCarrito.carritoID == principal.carritoID,
             DetalleCarrito.productoID == productoID
         )
     ).first()
@@ -54,7 +68,7 @@ def agregarCarrito(
     else:
         # Si no existe, crearlo
         nuevoDetalle = DetalleCarrito(
-            carritoID=carritoDB.id,
+            carritoID=principal.carritoID,
             productoID=productoID,
             cantidad=cantidad,
             precioUnidad=productoDB.precio,
@@ -70,23 +84,50 @@ def agregarCarrito(
 
 
 
+# Funcion para descontar el stock de varios productos de forma atomica (devuelve los que no alcanzaron)
+def descontarStock(session, cantidades: dict[int, int]) -> set[int]:
+    ids = sorted(cantidades)
+
+    # Con varios productos se bloquean en orden de ID para que dos pedidos no se esperen en cruz
+    # (SQLite bloquea toda la DB al escribir y no necesita este paso)
+    if len(ids) > 1 and session.get_bind().dialect.name != "sqlite":
+        session.exec(select(Producto.id).where(Producto.id.in_(ids)).order_by(Producto.id).with_for_update())
+
+    # Un solo UPDATE condicional: solo descuenta las filas con stock suficiente
+    lineas = values(column("id", Integer), column("cantidad", Integer), name="lineas").data(
+        [(productoID, cantidades[productoID]) for productoID in ids]
+    ).cte("lineas")
+    sentencia = (
+        update(Producto)
+        .where(Producto.id == lineas.c.id, Producto.stock >= lineas.c.cantidad)
+        .values(stock=Producto.stock - lineas.c.cantidad)
+        .returning(Producto.id)
+        .execution_options(synchronize_session=False)
+    )
+    descontados = set(session.exec(sentencia).scalars())
+    return set(ids) - descontados
+
+
+
 # CREATE - Convertir el carrito en un pedido (SIN PAGO)
 @router.post("/pedir", response_model=Pedido)
 def crearPedidoDesdeCarrito(
     session: SessionDep = None,
     direccion: int = Form(None),
     aplicarEnvio: bool = Form(False),
-    cliente=Depends(clienteActual)
+    principal=Depends(principalActual)
 ):
     """
     Este endpoint convierte el carrito del cliente en un pedido.
     Aplica envío de 8900 si el subtotal es menor a 30000.
     """
     
-    # Obtener el carrito del cliente
-    carritoDB = session.exec(select(Carrito).where(Carrito.clienteID == cliente.id)).first()
-    # Si no tiene uno, mostrar error
-    if not carritoDB or not carritoDB.detalles:
+    cliente = principal.cliente
+
+    # Obtener las lineas del carrito del cliente
+    detalles = session.exec(select(DetalleCarrito).where(DetalleCarrito.carritoID == principal.carritoID)).all() if principal.carritoID else []
+    # Si no tiene lineas, mostrar error
+    if not detalles:
         raise HTTPException(400, "Carrito vacío")
 
     # Verificar que la dirección existe
@@ -96,10 +137,16 @@ def crearPedidoDesdeCarrito(
             raise HTTPException(400, "Dirección no válida")
 
     # Calcular el subtotal
-    subtotal = sum(detalle.subtotal for detalle in carritoDB.detalles)
+    subtotal = sum(detalle.subtotal for detalle in detalles)
+
+    # Unidades por producto (un producto puede estar en varias lineas)
+    cantidades = {}
+    for detalle in detalles:
+        if detalle.productoID:
+            cantidades[detalle.productoID] = cantidades.get(detalle.productoID, 0) + detalle.cantidad
     
     # Calcular el total con envío si aplica
-    costo_envio = 8900 if aplicarEnvio and subtotal < 30000 else 0
+    costo_envio = costoEnvio if aplicarEnvio and subtotal < minimoEnvioGratis else 0
     total = subtotal + costo_envio
 
     # Crear el pedido
@@ -120,7 +167,7 @@ def crearPedidoDesdeCarrito(
     session.flush()
 
     # Crear los detalles del pedido
-    for detalle in carritoDB.detalles:
+    for detalle in detalles:
         detallePedido = DetallePedido(
             pedidoID=pedido.id,
             productoID=detalle.productoID,
@@ -133,21 +180,27 @@ def crearPedidoDesdeCarrito(
         
         # Insertar el detalle del pedido en la DB
         session.add(detallePedido)
-        
-        # Actualizar stock del producto
-        if detalle.productoID and detalle.producto:
-            if detalle.producto.stock < detalle.cantidad:
-                raise HTTPException(400, f"Stock insuficiente para {detalle.producto.nombre}")
-            detalle.producto.stock -= detalle.cantidad
-            session.add(detalle.producto)
 
     # Vaciar carrito
-    for detalle in carritoDB.detalles:
+    for detalle in detalles:
         session.delete(detalle)
+    session.flush()
+
+    # Descontar el stock al final para bloquear las filas de los productos el menor tiempo posible
+    faltantes = descontarStock(session, cantidades) if cantidades else set()
+
+    # Si no alcanzo el stock (por ejemplo otro pedido se llevo las ultimas unidades), no se guarda nada
+    if faltantes:
+        session.rollback()
+        raise HTTPException(400, f"Stock insuficiente para {session.get(Producto, min(faltantes)).nombre}")
 
     # Guardar cambios en la DB
     session.commit()
     session.refresh(pedido)
+
+    # El UPDATE del stock no pasa por el flush de la sesion: avisar a los snapshots de esos productos
+    if cantidades:
+        invalidarProductos(set(cantidades), {"stock"})
     
     return pedido
 
@@ -155,44 +208,191 @@ def crearPedidoDesdeCarrito(
 
 # READ - Obtener el carrito del cliente
 @router.get("/mi-carrito", response_model=list[DetalleCarrito])
-def miCarrito(session: SessionDep, cliente=Depends(clienteActual)):
+async def miCarrito(session: AsyncSessionDep, principal=Depends(principalActualAsync)):
     """
     Este endpoint obtiene el carrito del cliente.
     """
     
-    # Obtener el carrito del cliente
-    carritoDB = session.exec(select(Carrito).where(Carrito.clienteID == cliente.id)).first()
     # Si no tiene carrito, mostrar error
-    if not carritoDB:
+    if not principal.carritoID:
         raise HTTPException(404, "No tienes un carrito asignado")
     
     # Obtener los detalles del carrito
-    detalles = session.exec(select(DetalleCarrito).where(DetalleCarrito.carritoID == carritoDB.id)).all()
+    detalles = (await session.exec(select(DetalleCarrito).where(DetalleCarrito.carritoID == principal.carritoID))).all()
     return detalles
 
 
 
+# Funcion para consultar la vista del carrito de un cliente (una consulta)
+async def consultarVista(session, clienteID: int) -> CarritoVista:
+    # Totales calculados en la DB sobre las lineas del carrito
+    subtotalLinea = DetalleCarrito.precioUnidad * DetalleCarrito.cantidad
+    subtotal = func.coalesce(func.sum(subtotalLinea).over(), 0)
+    envio = case((and_(subtotal > 0, subtotal < minimoEnvioGratis), costoEnvio), else_=0)
+
+    # Carrito, lineas, productos y disenos en una sola consulta (el carrito vacio da una fila sin linea)
+    filas = (await session.exec(
+        select(
+            Carrito.id.label("carritoID"), DetalleCarrito.id, DetalleCarrito.productoID, DetalleCarrito.disenoID,
+            func.coalesce(Producto.nombre, nombreDiseno).label("nombre"),
+            func.coalesce(DisenoPersonalizado.imagenURL, Producto.imagenURL).label("imagenURL"),
+            DetalleCarrito.cantidad, DetalleCarrito.precioUnidad, subtotalLinea.label("subtotal"),
+            # Los disenos no llevan stock y siguen activos mientras esten en el carrito
+            Producto.stock, func.coalesce(Producto.activo, true()).label("activo"), DetalleCarrito.esPersonalizado,
+            func.coalesce(func.sum(DetalleCarrito.cantidad).over(), 0).label("cantidadProductos"),
+            subtotal.label("subtotalCarrito"), envio.label("costoEnvio")
+        )
+        .select_from(Carrito)
+        .outerjoin(DetalleCarrito, DetalleCarrito.carritoID == Carrito.id)
+        .outerjoin(Producto, Producto.id == DetalleCarrito.productoID)
+        .outerjoin(DisenoPersonalizado, DisenoPersonalizado.id == DetalleCarrito.disenoID)
+        .where(Carrito.clienteID == clienteID)
+        .order_by(DetalleCarrito.fechaAgregado, DetalleCarrito.id)
+    )).mappings().all()
+
+    # Si no tiene carrito, mostrar error
+    if not filas:
+        raise HTTPException(404, "No tienes un carrito asignado")
+
+    totales = filas[0]
+    return CarritoVista(
+        id=totales["carritoID"],
+        lineas=[LineaCarrito.model_validate(fila) for fila in filas if fila["id"] is not None],
+        cantidadProductos=totales["cantidadProductos"],
+        subtotal=totales["subtotalCarrito"],
+        costoEnvio=totales["costoEnvio"],
+        total=totales["subtotalCarrito"] + totales["costoEnvio"]
+    )
+
+
+
+# READ - Vista del carrito con sus productos y totales (una consulta)
+@router.get("/vista", response_model=CarritoVista)
+async def vistaCarrito(session: AsyncSessionDep, cliente=Depends(clienteActualAsync)):
+    """
+    Este endpoint obtiene el carrito del cliente con el nombre, la imagen y el stock de cada
+    producto o diseño, el subtotal, la cantidad de productos y el envío estimado.
+    """
+
+    return await consultarVista(session, cliente.id)
+
+
+
+# UPDATE - Editar varias lineas del carrito en una transaccion
+@router.patch("/lote", response_model=CarritoVista)
+async def editarCarritoLote(
+    session: AsyncSessionDep,
+    operaciones: list[OperacionCarrito] = Body(..., min_length=1, max_length=maximoOperacionesCarrito),
+    cliente=Depends(clienteActualAsync)
+):
+    """
+    Este endpoint aplica una lista de operaciones sobre el carrito del cliente, a lo sumo una
+    por producto: AGREGAR suma unidades (crea la línea si no existe), CANTIDAD fija la cantidad
+    de una línea y ELIMINAR la quita. Solo toca las líneas sin diseño personalizado. Todo se
+    guarda en una transacción y devuelve la vista del carrito resultante.
+    """
+
+    ids = {operacion.productoID for operacion in operaciones}
+
+    # Un producto repetido no se fusiona en silencio: se rechaza el lote
+    if len(ids) < len(operaciones):
+        repetidos = sorted(productoID for productoID, veces in Counter(operacion.productoID for operacion in operaciones).items() if veces > 1)
+        raise HTTPException(422, f"Cada producto puede aparecer una sola vez en el lote (repetidos: {', '.join(map(str, repetidos))})")
+
+    # Carrito, productos y sus lineas actuales en una consulta (sin productos encontrados queda una fila del carrito)
+    filas = (await session.exec(
+        select(
+            Carrito.id.label("carritoID"), Producto.id.label("productoID"), Producto.nombre, Producto.precio,
+            Producto.stock, Producto.activo, DetalleCarrito.id.label("detalleID"), DetalleCarrito.cantidad
+        )
+        .select_from(Carrito)
+        .outerjoin(Producto, Producto.id.in_(ids))
+        .outerjoin(DetalleCarrito, and_(
+            DetalleCarrito.carritoID == Carrito.id, DetalleCarrito.productoID == Producto.id, DetalleCarrito.disenoID.is_(None)
+        ))
+        .where(Carrito.clienteID == cliente.id)
+    )).mappings().all()
+
+    # Si no tiene carrito, mostrar error
+    if not filas:
+        raise HTTPException(404, "No tienes un carrito asignado")
+    carritoID = filas[0]["carritoID"]
+    productos = {fila["productoID"]: fila for fila in filas if fila["productoID"] is not None}
+
+    # Aplicar las operaciones en memoria: cantidad final de cada producto (0 = sin linea)
+    cantidades = {productoID: fila["cantidad"] or 0 for productoID, fila in productos.items()}
+    for i, operacion in enumerate(operaciones):
+        producto = productos.get(operacion.productoID)
+        if operacion.accion == AccionCarrito.AGREGAR:
+            if not producto or not producto["activo"]:
+                raise HTTPException(404, f"Producto {operacion.productoID} no encontrado")
+            cantidades[operacion.productoID] += operacion.cantidad
+        elif not cantidades.get(operacion.productoID):
+            raise HTTPException(404, f"El producto {operacion.productoID} no está en tu carrito (operación {i})")
+        elif operacion.accion == AccionCarrito.CANTIDAD:
+            cantidades[operacion.productoID] = operacion.cantidad
+        else:
+            cantidades[operacion.productoID] = 0
+
+    # Las lineas que cambian no pueden pasar del stock
+    cambios = {productoID: cantidad for productoID, cantidad in cantidades.items() if cantidad != (productos[productoID]["cantidad"] or 0)}
+    for productoID, cantidad in cambios.items():
+        if cantidad > productos[productoID]["stock"]:
+            raise HTTPException(400, f"No hay stock suficiente para {productos[productoID]['nombre']}")
+
+    eliminar = [productoID for productoID, cantidad in cambios.items() if cantidad == 0]
+    actualizar = [(productos[productoID]["detalleID"], cantidad) for productoID, cantidad in cambios.items() if cantidad and productos[productoID]["detalleID"]]
+    crear = [productoID for productoID, cantidad in cambios.items() if cantidad and not productos[productoID]["detalleID"]]
+
+    # Una sentencia por tipo de cambio
+    if eliminar:
+        await session.exec(delete(DetalleCarrito).where(
+            DetalleCarrito.carritoID == carritoID, DetalleCarrito.productoID.in_(eliminar), DetalleCarrito.disenoID.is_(None)
+        ))
+    if actualizar:
+        lineas = values(column("id", Integer), column("cantidad", Integer), name="lineas").data(actualizar).cte("lineas")
+        await session.exec(
+            update(DetalleCarrito)
+            .where(DetalleCarrito.id == lineas.c.id)
+            .values(cantidad=lineas.c.cantidad, subtotal=DetalleCarrito.precioUnidad * lineas.c.cantidad)
+            .execution_options(synchronize_session=False)
+        )
+    if crear:
+        ahora = dt.now()
+        await session.exec(insert(DetalleCarrito).values([
+            {
+                "carritoID": carritoID, "productoID": productoID, "cantidad": cambios[productoID], "fechaAgregado": ahora,
+                "precioUnidad": productos[productoID]["precio"], "subtotal": productos[productoID]["precio"] * cambios[productoID],
+                "esPersonalizado": False
+            }
+            for productoID in crear
+        ]))
+    await session.commit()
+
+    return await consultarVista(session, cliente.id)
+
+
+
 # UPDATE - Actualizar la cantidad de un producto
 @router.patch("/actualizar-cantidad/{productoID}", response_model=DetalleCarrito)
 def actualizarCantidad(
     productoID: int, 
     cantidad: int = Form(...),
     session: SessionDep = None, 
-    cliente=Depends(clienteActual)
+    principal=Depends(principalActual)
 ):
     """
     Este endpoint actualiza la cantidad de un producto en el carrito.
     """
     
-    # Obtener el carrito del cliente
-    carritoDB = session.exec(select(Carrito).where(Carrito.clienteID == cliente.id)).first()
-    if not carritoDB:
+    # Si no tiene carrito, mostrar error
+    if not principal.carritoID:
         raise HTTPException(404, "No tienes un carrito asignado")
     
     # Obtener el detalle del producto
     detalle = session.exec(
         select(DetalleCarrito)
-        .where(DetalleCarrito.carritoID == carritoDB.id, DetalleCarrito.productoID == productoID)
+        .where(DetalleCarrito.carritoID == principal.carritoID, DetalleCarrito.productoID == productoID)
     ).first()
 
     # Si el producto no esta en el carrito, mostrar error
@@ -217,23 +417,39 @@ def actualizarCantidad(
 
 
 
-# DELETE - Eliminar un producto del carrito
-@router.delete("/{productoID}", status_code=200)
-def eliminarDeCarrito(productoID: int, session: SessionDep, cliente=Depends(clienteActual)):
+# DELETE - Vaciar todo el carrito
+@router.delete("/vaciar", status_code=200)
+def vaciarCarrito(session: SessionDep, principal=Depends(principalActual)):
+    """
+    Este endpoint vacía todo el carrito del cliente.
+    """
+    
+    # Si no tiene un carrito, mostrar error
+    if not principal.carritoID:
+        raise HTTPException(404, "No tienes un carrito asignado")
+
+    # Vaciar el carrito y guardar cambios en la DB
+    session.exec(delete(DetalleCarrito).where(DetalleCarrito.carritoID == principal.carritoID))
+    session.commit()
+    return {"mensaje": "Carrito vaciado correctamente"}
+
+
+
+# DELETE - Eliminar un producto del carrito (solo IDs numericos: "/vaciar" no debe caer aca aunque cambie el orden)
+@router.delete("/{productoID:int}", status_code=200)
+def eliminarDeCarrito(productoID: int, session: SessionDep, principal=Depends(principalActual)):
     """
     Este endpoint elimina un producto del carrito del cliente.
     """
     
-    # Obtener el carrito del usuario
-    carritoDB = session.exec(select(Carrito).where(Carrito.clienteID == cliente.id)).first()
     # Si no tiene un carrito
-    if not carritoDB:
+    if not principal.carritoID:
         raise HTTPException(404, "No tienes un carrito asignado")
     
     # Obtener los detalles del producto
     detalles = session.exec(
         select(DetalleCarrito)
-        .where(DetalleCarrito.carritoID == carritoDB.id, DetalleCarrito.productoID == productoID)
+        .where(DetalleCarrito.carritoID == principal.carritoID, DetalleCarrito.productoID == productoID)
     ).first()
     # Si el producto no esta en el carrito, mostrar error
     if not detalles:
@@ -243,24 +459,4 @@ def eliminarDeCarrito(productoID: int, session: SessionDep, cliente=Depends(clie
     session.delete(detalles)
     session.commit()
 
-    return {"mensaje": "Producto eliminado del carrito"}
-
-
-
-# DELETE - Vaciar todo el carrito
-@router.delete("/vaciar", status_code=200)
-def vaciarCarrito(session: SessionDep, cliente=Depends(clienteActual)):
-    """
-    Este endpoint vacía todo el carrito del cliente.
-    """
-    
-    # Obtener el carrito del usuario
-    carritoDB = session.exec(select(Carrito).where(Carrito.clienteID == cliente.id)).first()
-    # Si no tiene un carrito, mostrar error
-    if not carritoDB:
-        raise HTTPException(404, "No tienes un carrito asignado")
-
-    # Vaciar el carrito y guardar cambios en la DB
-    session.exec(delete(DetalleCarrito).where(DetalleCarrito.carritoID == carritoDB.id))
-    session.commit()
-    return {"mensaje": "Carrito vaciado correctamente"}
\ No newline at end of file
+    return {"mensaje": "Producto eliminado del carrito"}
\ No newline at end of file
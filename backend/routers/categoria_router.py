@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, Form
-from sqlmodel import select, func
+from fastapi import APIRouter, HTTPException, Depends, Form, Request
+from sqlmodel import select
 from ..models.categoria import Categoria, CategoriaRead
-from ..models.producto import Producto
-from ..auth.auth import adminActual
-from ..db.db import SessionDep
+from ..auth.auth import adminActual, adminActualAsync
+from ..db.db import SessionDep, AsyncReadSessionDep
+from ..services.categorias import consultaCategorias, categoriaLeida, consultarCategorias
+from ..utils.catalogo import snapshotCategorias
+from ..utils.cacheHttp import respuestaCondicional, cacheCategorias
 
 router = APIRouter(prefix="/categorias", tags=["Categorias"])
 
@@ -35,75 +37,50 @@ def crearCategoria(
     session.commit()
     session.refresh(categoria)
     
-    # Agregar conteo de productos
-    cuenta = session.exec(select(func.count(Producto.id)).where(Producto.categoriaID == categoria.id, Producto.activo == True)).first()
-    
-    # Convertir a diccionario y agregar conteo
-    return CategoriaRead(**categoria.model_dump(), contarProductos=cuenta or 0)
+    # Una categoria nueva no tiene productos
+    return categoriaLeida(categoria, 0)
 
 
 
 # READ - Obtener la lista de categorias
 @router.get("/", response_model=list[CategoriaRead])
-def listaCategorias(session: SessionDep):
+async def listaCategorias(request: Request):
     """
     Este endpoint lista todas las categorías activas en el dashboard administrativo.
     """
     
-    # Obtener lista de categorias
-    categorias = session.exec(select(Categoria).where(Categoria.activo==True)).all()
+    # Entregar el snapshot de las categorias (304 si no cambio)
+    return respuestaCondicional(request, await snapshotCategorias.obtener(), cacheCategorias)
 
-    # Obtener la lista de categorías con conteo
-    resultado = []
-    for categoria in categorias:
-        cuenta = session.exec(
-            select(func.count(Producto.id)).where(Producto.categoriaID == categoria.id, Producto.activo == True)).first()
-        
-        # Ingresar el objeto como diccionario con el conteo de productos incluido
-        resultado.append(CategoriaRead(**categoria.model_dump(), contarProductos=cuenta or 0))
-    
-    return resultado
 
 
 # READ - Todas las categorias incluyendo las inactivas
 @router.get("/todas", response_model=list[CategoriaRead])
-def todasCategorias(session: SessionDep, _=Depends(adminActual)):
+async def todasCategorias(session: AsyncReadSessionDep, _=Depends(adminActualAsync)):
     """
     Este endpoint lista todas las categorías, incluyendo las inactivas, en el dashboard administrativo.
     """
     
-    # Obtener todas las categorias en la DB
-    categorias = session.exec(select(Categoria)).all()
-    
-    resultado = []
-    for categoria in categorias:
-        cuenta = session.exec(
-            select(func.count(Producto.id)).where(Producto.categoriaID == categoria.id, Producto.activo == True)).first()
-        
-        resultado.append(CategoriaRead(**categoria.model_dump(), contarProductos=cuenta or 0))
-    
-    return resultado
+    # Obtener todas las categorias en la DB con su conteo
+    return await consultarCategorias(session, soloActivas=False)
 
 
 
 # READ - Obtener una categoria por ID
 @router.get("/{categoriaID}", response_model=CategoriaRead)
-def categoriaPorID(categoriaID: int, session: SessionDep):
+async def categoriaPorID(categoriaID: int, session: AsyncReadSessionDep):
     """
     Este endpoint lista una categoría por su ID en el dashboard administrativo.
     """
     
-    # Verificar si la categoria existe y está activa
-    categoriaDB = session.exec(select(Categoria).where(Categoria.id == categoriaID, Categoria.activo == True)).first()
+    # Verificar si la categoria existe y está activa (con su conteo en la misma consulta)
+    fila = (await session.exec(consultaCategorias().where(Categoria.id == categoriaID, Categoria.activo == True))).first()
     
     # Si no existe la categoria
-    if not categoriaDB:
+    if not fila:
         raise HTTPException(404, "Categoría no encontrada")
-    
-    # Conteo de productos asociados
-    cuenta = session.exec(select(func.count(Producto.id)).where(Producto.categoriaID == categoriaDB.id, Producto.activo == True)).first()
 
-    return CategoriaRead(**categoriaDB.model_dump(), contarProductos=cuenta or 0)
+    return categoriaLeida(*fila)
 
 
 
@@ -142,12 +119,9 @@ def actualizarCategoria(
     
     session.add(categoriaDB)
     session.commit()
-    session.refresh(categoriaDB)
-    
-    # Conteo de productos asociados
-    cuenta = session.exec(select(func.count(Producto.id)).where(Producto.categoriaID == categoriaDB.id, Producto.activo == True)).first()
     
-    return CategoriaRead(**categoriaDB.model_dump(),contarProductos=cuenta or 0)
+    # Recargar la categoria con su conteo de productos
+    return categoriaLeida(*session.exec(consultaCategorias().where(Categoria.id == categoriaID)).one())
 
 
 
@@ -167,12 +141,9 @@ def habilitarCategoria(categoriaID: int, session: SessionDep, _=Depends(adminAct
     categoriaDB.activo = True
     session.add(categoriaDB)
     session.commit()
-    session.refresh(categoriaDB)
     
-    # Conteo de productos asociados
-    cuenta = session.exec(select(func.count(Producto.id)).where(Producto.categoriaID == categoriaDB.id,Producto.activo == True)).first()
-    
-    return CategoriaRead(**categoriaDB.model_dump(), contarProductos=cuenta or 0)
+    # Recargar la categoria con su conteo de productos
+    return categoriaLeida(*session.exec(consultaCategorias().where(Categoria.id == categoriaID)).one())
 
 
 
@@ -183,15 +154,13 @@ def eliminarCategoria(categoriaID: int, session: SessionDep, _=Depends(adminActu
     Este endpoint deshabilita una categoría por su ID en el dashboard administrativo.
     """
     
-    # Verificar si la categoria ya existe
-    categoriaDB = session.exec(select(Categoria).where(Categoria.id == categoriaID, Categoria.activo == True)).first()
+    # Verificar si la categoria ya existe (con su conteo de productos en la misma consulta)
+    fila = session.exec(consultaCategorias().where(Categoria.id == categoriaID, Categoria.activo == True)).first()
     
     # Si no existe la categoria
-    if not categoriaDB:
+    if not fila:
         raise HTTPException(404, "Categoría no encontrada")
-    
-    # Conteo de productos asociados
-    cuenta = session.exec(select(func.count(Producto.id)).where(Producto.categoriaID == categoriaDB.id, Producto.activo == True)).first()
+    categoriaDB, cuenta = fila
 
     # Si tiene uno o más productos asociados no permite eliminar la categoria
     if cuenta and cuenta > 0:
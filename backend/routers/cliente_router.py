@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Form, Request, Depends
 from sqlmodel import select
-from ..auth.auth import clienteActual, adminActual
+from ..auth.auth import clienteActual, adminActual, iniciarSesionCliente
 from ..models.cliente import Cliente, ClienteUpdate, ClienteHistorico
 from ..models.carrito import Carrito
 from ..models.pedido import Pedido, EstadoPedido
@@ -66,7 +66,7 @@ def registrarClienteForm(
     session.commit()
 
     # Guardar el ID del cliente en la sesion
-    request.session["clienteID"] = nuevoCliente.id
+    iniciarSesionCliente(request, nuevoCliente.id)
     return RedirectResponse(url="/", status_code=303)
 
 
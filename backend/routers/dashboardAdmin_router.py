@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlmodel import select, func, join
 from datetime import datetime, timedelta
 from ..auth.auth import adminActual
@@ -9,16 +8,14 @@ from ..models.pago import Pago, MetodoPago
 from ..models.detallePedido import DetallePedido
 from ..models.producto import Producto
 from ..models.cliente import Cliente
-from ..db.db import SessionDep
+from ..db.db import ReadSessionDep
+from ..utils.plantillas import templates
 
 router = APIRouter(tags=["Dashboard"])
 
-# Configurar templates
-templates = Jinja2Templates(directory="frontend/templates")
-
 # READ - Panel dashboard de administrador
 @router.get("/dashboard")
-def paginaDashboard(request: Request, session: SessionDep):
+def paginaDashboard(request: Request, session: ReadSessionDep):
     """
     Endpoint principal del dashboard que renderiza la página completa
     """
@@ -166,7 +163,7 @@ def paginaDashboard(request: Request, session: SessionDep):
 
 
 # Función para obtener las ventas mensuales
-def obtenerDatosVentasMensuales(session: SessionDep):
+def obtenerDatosVentasMensuales(session: ReadSessionDep):
     """
     Función auxiliar para obtener datos de ventas mensuales para la gráfica
     """
@@ -202,7 +199,7 @@ def obtenerDatosVentasMensuales(session: SessionDep):
 
 # READ - Obtener resumen de ventas mensuales
 @router.get("/api/dashboard/resumen")
-def obtenerResumenDashboard(session: SessionDep, _=Depends(adminActual)):
+def obtenerResumenDashboard(session: ReadSessionDep, _=Depends(adminActual)):
     """
     Endpoint de obtención de resumen de ventas mensuales
     """
@@ -299,7 +296,7 @@ def obtenerResumenDashboard(session: SessionDep, _=Depends(adminActual)):
 
 # READ - Obtener las ventas mensuales
 @router.get("/api/dashboard/ventas-mensuales")
-def obtenerVentasMensuales(session: SessionDep, _=Depends(adminActual)):
+def obtenerVentasMensuales(session: ReadSessionDep, _=Depends(adminActual)):
     """
     Endpoint optimizado para ventas mensuales
     """
@@ -309,7 +306,7 @@ def obtenerVentasMensuales(session: SessionDep, _=Depends(adminActual)):
 
 # READ - Obtener los pedidos recientes
 @router.get("/api/dashboard/pedidos-recientes")
-def obtenerPedidosRecientes(session: SessionDep, _=Depends(adminActual)):
+def obtenerPedidosRecientes(session: ReadSessionDep, _=Depends(adminActual)):
     """
     Endpoint de obtención de la lista de pedidos recientes
     """
@@ -350,7 +347,7 @@ def obtenerPedidosRecientes(session: SessionDep, _=Depends(adminActual)):
 
 # READ - Obtener la lista de productos más vendidos
 @router.get("/api/dashboard/productos-mas-vendidos")
-def obtenerProductosMasVendidos(session: SessionDep, _=Depends(adminActual)):
+def obtenerProductosMasVendidos(session: ReadSessionDep, _=Depends(adminActual)):
     """
     Endpoint de obtención de la lista de productos más vendidos
     """
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Form
 from typing import Optional
 from sqlmodel import select
-from ..auth.auth import clienteActual
+from ..auth.auth import clienteActual, principalActual
 from ..models.disenoPersonalizado import DisenoPersonalizado, DisenoPersonalizadoCreate, DisenoPersonalizadoUpdate
 from ..models.carrito import Carrito, DetalleCarrito
 from ..db.db import SessionDep
@@ -41,7 +41,7 @@ def agregarAlCarrito(
     disenoPersonalizadoID: Optional[int] = Form(None),
     cantidad: int = Form(1, ge=1),
     session: SessionDep = None,
-    cliente=Depends(clienteActual)
+    principal=Depends(principalActual)
 ):
     """
     Endpoint para agregar un diseño personalizado al carrito
@@ -54,26 +54,22 @@ def agregarAlCarrito(
         
         # Verificar que el diseño pertenezca al cliente
         diseno = session.get(DisenoPersonalizado, disenoPersonalizadoID)
-        if not diseno or diseno.clienteID != cliente.id:
+        if not diseno or diseno.clienteID != principal.cliente.id:
             raise HTTPException(404, "Diseño no encontrado o no autorizado")
         
-        carrito = Carrito()
-        
-        # Si el modelo Carrito tiene clienteID, asignarlo
-        try:
-            carrito.clienteID = cliente.id
-        except AttributeError:
-            pass  # En caso de que el modelo no tenga clienteID
-        
-        session.add(carrito)
-        session.commit()
-        session.refresh(carrito)
+        # Usar el carrito del cliente (resuelto con la sesion) y crearlo solo si no tiene
+        if not principal.carritoID:
+            carrito = Carrito(clienteID=principal.cliente.id)
+            session.add(carrito)
+            session.commit()
+            session.refresh(carrito)
+            principal.carritoID = carrito.id
         
         # Crear detalle del carrito
         nuevoDetalle = DetalleCarrito(
-            carritoID=carrito.id,
+            carritoID=principal.carritoID,
             cantidad=cantidad,
-            disenoPersonalizadoID=disenoPersonalizadoID
+            disenoID=disenoPersonalizadoID
         )
         
         # Si el modelo DetalleCarrito tiene productoID, asignarlo como None
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Request
+from ..models.inicio import Inicio
+from ..utils.catalogo import snapshotInicio
+from ..utils.cacheHttp import respuestaCondicional, cacheInicio
+
+router = APIRouter(prefix="/api", tags=["Inicio"])
+
+# READ - Contenido de la pagina de inicio en una sola respuesta
+@router.get("/inicio", response_model=Inicio)
+async def contenidoInicio(request: Request):
+    """
+    Este endpoint entrega en una sola respuesta las categorías activas con su conteo y los
+    productos destacados, recientes y más vendidos de la página principal.
+    """
+
+    # Entregar el snapshot de la pagina de inicio (304 si no cambio)
+    return respuestaCondicional(request, await snapshotInicio.obtener(), cacheInicio)
\ No newline at end of file
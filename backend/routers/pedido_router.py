@@ -1,13 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Form
 from sqlmodel import select, join
-from ..auth.auth import clienteActual, adminActual
+from sqlalchemy.orm import contains_eager
+from ..auth.auth import clienteActual, clienteActualAsync, adminActual
 from ..utils.enums import MetodoPago, EstadoPedido, TipoTransaccion
 from ..models.pedido import Pedido, PedidoCreate, PedidoUpdate
 from ..models.cliente import Cliente
 from ..models.pago import Pago
 from ..models.producto import Producto
 from ..models.transaccionPuntos import TransaccionPuntos
-from ..db.db import SessionDep
+from ..db.db import SessionDep, AsyncSessionDep
 from ..models.detallePedido import DetallePedido
 from ..models.disenoPersonalizado import DisenoPersonalizado
 
@@ -15,27 +16,27 @@ router = APIRouter(prefix="/pedidos", tags=["Pedidos"])
 
 # READ - Obtener la lista de pedidos del cliente
 @router.get("/mis-pedidos", response_model=list[Pedido])
-def misPedidos(session: SessionDep, cliente=Depends(clienteActual)):
+async def misPedidos(session: AsyncSessionDep, cliente=Depends(clienteActualAsync)):
     """
     Endpoint para que clientes vean sus pedidos.
     Carga toda la información necesaria en una sola consulta.
     """
     
     # Obtener pedidos con información de cliente y pago en una sola query
-    query = select(Pedido, Cliente, Pago).join(Cliente, Pedido.clienteID == Cliente.id).outerjoin(Pago, Pedido.id == Pago.pedidoID).where(Pedido.clienteID == cliente.id)
-    
-    resultados = session.exec(query).all()
-    
-    if not resultados:
+    # (contains_eager llena las relaciones sin cargas perezosas, que no existen en async)
+    query = (
+        select(Pedido)
+        .join(Cliente, Pedido.clienteID == Cliente.id)
+        .outerjoin(Pago, Pedido.id == Pago.pedidoID)
+        .where(Pedido.clienteID == cliente.id)
+        .options(contains_eager(Pedido.cliente), contains_eager(Pedido.pago))
+    )
+    
+    pedidosConInfo = (await session.exec(query)).unique().all()
+    
+    if not pedidosConInfo:
         raise HTTPException(404, "No tienes pedidos registrados")
     
-    # Construir respuesta optimizada
-    pedidosConInfo = []
-    for pedido, objetoCliente, pago in resultados:
-        pedido.cliente = objetoCliente
-        pedido.pago = pago
-        pedidosConInfo.append(pedido)
-    
     return pedidosConInfo
 
 
@@ -1,14 +1,36 @@
 # routers/producto.py
-from fastapi import APIRouter, HTTPException, Depends, Form, UploadFile, File
-from ..auth.auth import adminActual
+from fastapi import APIRouter, HTTPException, Depends, Form, UploadFile, File, Query, Request, Body, Response
+from ..auth.auth import adminActual, adminActualAsync
 from sqlmodel import select
-from ..models.producto import Producto
-from ..db.db import SessionDep
+from sqlalchemy import update, values, column, cast, func, Integer, Boolean
+from typing import Literal
+from ..models.producto import Producto, ProductoPagina, ProductoFacetas, ProductoCambio, ProductoLote
+from ..db.db import SessionDep, AsyncSessionDep, AsyncReadSessionDep
 from ..utils.bucket import cargarArchivo
+from ..utils.paginacion import paginarConsulta, codificarCursor
+from ..db.busqueda import consultaBusqueda, terminosBusqueda
+from ..db.facetas import asignarVariantes, condicionesFacetas, consultaPaginaFacetas, agruparFacetas, filtros
+from ..utils.enums import TipoVariante
+from ..services.importacionProductos import importarProductos
+from ..utils.catalogo import snapshotCatalogo, invalidarProductos
+from ..utils.cacheHttp import respuestaCondicional, cacheCatalogo, cacheProducto, cacheRelacionados
+from ..utils.relacionados import indiceRelacionados
+from ..utils.contadorCategorias import recalcularContadores
 import os
 
 router = APIRouter(prefix="/productos", tags=["Productos"])
 
+# Ordenes estables de la paginacion: (columna, descendente); el ID desempata
+ordenesProducto = {
+    "id": (None, False),
+    "precio": (Producto.precio, False),
+    "precio_desc": (Producto.precio, True),
+    "recientes": (None, True)
+}
+
+# Cambios maximos por actualizacion en lote
+maximoCambiosLote = 5000
+
 # CREATE - Crear producto con imagen
 @router.post("/crear", response_model=Producto, status_code=201)
 async def crearProducto(
@@ -56,11 +78,13 @@ async def crearProducto(
         stock=stock,
         imagenURL=imagenURL,
         esPersonalizado=esPersonalizado,
-        opcionesColor=opcionesColor,
-        opcionesTamano=opcionesTamano,
         categoriaID=categoriaID,
         administradorID=admin.id
     )
+
+    # Guardar las opciones de color y tamano como variantes normalizadas
+    asignarVariantes(producto, TipoVariante.COLOR, opcionesColor)
+    asignarVariantes(producto, TipoVariante.TAMANO, opcionesTamano)
     
     # Insertar en la DB y guardar los cambios
     session.add(producto)
@@ -71,43 +95,236 @@ async def crearProducto(
 
 
 
+# Tipos de contenido aceptados por la importacion masiva
+formatosImportacion = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl"
+}
+
+# CREATE - Importacion masiva de productos (CSV o JSONL)
+@router.post("/importar")
+async def importarProductosMasivo(request: Request, formato: Literal["csv", "jsonl"] = None, admin=Depends(adminActualAsync)):
+    """
+    Endpoint para importar productos en bloque.
+    El archivo se envía como cuerpo de la petición (text/csv o application/x-ndjson) y se procesa
+    por partes. Columnas: nombre, sku, precio, categoriaID y opcionalmente descripcion, stock,
+    imagenURL, activo, esPersonalizado, opcionesColor y opcionesTamano.
+    Responde con los productos insertados y los errores de cada fila rechazada.
+    """
+
+    # Formato indicado o deducido del tipo de contenido
+    formato = formato or formatosImportacion.get(request.headers.get("content-type", "").split(";")[0].strip().lower())
+    if not formato:
+        raise HTTPException(415, "Envía el archivo como text/csv o application/x-ndjson, o indica el formato")
+
+    return await importarProductos(request.stream(), formato, admin.id)
+
+
+
 # READ - Lista de productos
 @router.get("/", response_model=list[Producto])
-def listaProductos(session: SessionDep):
+async def listaProductos(request: Request):
     """
     Endpoint para obtener la lista de todos los productos
     """
     
-    # Obtener la lista de todos los productos de la DB que estén activos
-    productos = session.exec(select(Producto).where(Producto.activo == True)).all()
-
-    return productos
+    # Entregar el snapshot del catalogo (JSON ya serializado de los productos activos, 304 si no cambio)
+    return respuestaCondicional(request, await snapshotCatalogo.obtener(), cacheCatalogo)
 
 
 
 # READ - Lista de todos los productos (incluyendo inactivos) - solo admin
 @router.get("/todas", response_model=list[Producto])
-def listaTodosProductos(session: SessionDep, _=Depends(adminActual)):
+async def listaTodosProductos(session: AsyncReadSessionDep, _=Depends(adminActualAsync)):
     """
     Endpoint para obtener la lista de todos los productos (incluyendo inactivos) - solo admin
     """
     
     # Obtener la lista de todos los productos de la DB
-    productos = session.exec(select(Producto)).all()
+    productos = (await session.exec(select(Producto))).all()
 
     return productos
 
 
 
+# Funcion para leer una pagina de una consulta de productos con orden estable y cursor
+async def paginarProductos(session, consulta, orden: str, cursor: str | None, limite: int) -> ProductoPagina:
+    columna, descendente = ordenesProducto[orden]
+    productos = (await session.exec(paginarConsulta(consulta, Producto.id, columna, descendente, cursor, limite))).all()
+    return armarPagina(productos, columna, limite)
+
+
+
+# Funcion para armar la pagina con las filas leidas (si llego la fila extra hay otra pagina)
+def armarPagina(productos: list[Producto], columna, limite: int) -> ProductoPagina:
+    siguienteCursor = None
+    if len(productos) > limite:
+        productos = productos[:limite]
+        ultimo = productos[-1]
+        siguienteCursor = codificarCursor(None if columna is None else getattr(ultimo, columna.key), ultimo.id)
+
+    return ProductoPagina(productos=productos, siguienteCursor=siguienteCursor)
+
+
+
+# Funcion para obtener una pagina de productos con filtros
+async def paginaProductos(session, soloActivos: bool, orden: str, cursor: str | None, limite: int,
+                          categoriaID: int | None, precioMin: int | None, precioMax: int | None, disponible: bool | None) -> ProductoPagina:
+    consulta = select(Producto)
+
+    # Filtros
+    if soloActivos:
+        consulta = consulta.where(Producto.activo == True)
+    if categoriaID is not None:
+        consulta = consulta.where(Producto.categoriaID == categoriaID)
+    if precioMin is not None:
+        consulta = consulta.where(Producto.precio >= precioMin)
+    if precioMax is not None:
+        consulta = consulta.where(Producto.precio <= precioMax)
+    if disponible is not None:
+        consulta = consulta.where(Producto.stock > 0 if disponible else Producto.stock <= 0)
+
+    return await paginarProductos(session, consulta, orden, cursor, limite)
+
+
+
+# READ - Pagina de productos activos (paginacion por cursor)
+@router.get("/pagina", response_model=ProductoPagina)
+async def listaProductosPaginada(
+    session: AsyncReadSessionDep,
+    orden: Literal["id", "precio", "precio_desc", "recientes"] = "id",
+    cursor: str = None,
+    limite: int = Query(24, ge=1, le=100),
+    categoriaID: int = None,
+    precioMin: int = Query(None, ge=0),
+    precioMax: int = Query(None, ge=0),
+    disponible: bool = None
+):
+    """
+    Endpoint para obtener una página de productos activos con filtros.
+    Para la siguiente página se envía el siguienteCursor de la respuesta anterior.
+    """
+
+    return await paginaProductos(session, True, orden, cursor, limite, categoriaID, precioMin, precioMax, disponible)
+
+
+
+# READ - Pagina de todos los productos (incluyendo inactivos) - solo admin
+@router.get("/todas/pagina", response_model=ProductoPagina)
+async def listaTodosProductosPaginada(
+    session: AsyncReadSessionDep,
+    orden: Literal["id", "precio", "precio_desc", "recientes"] = "id",
+    cursor: str = None,
+    limite: int = Query(24, ge=1, le=100),
+    categoriaID: int = None,
+    precioMin: int = Query(None, ge=0),
+    precioMax: int = Query(None, ge=0),
+    disponible: bool = None,
+    _=Depends(adminActualAsync)
+):
+    """
+    Endpoint para obtener una página de todos los productos (incluyendo inactivos) - solo admin
+    """
+
+    return await paginaProductos(session, False, orden, cursor, limite, categoriaID, precioMin, precioMax, disponible)
+
+
+
+# READ - Productos filtrados con los conteos de cada faceta (barra de filtros del catalogo)
+@router.get("/facetas", response_model=ProductoFacetas)
+async def productosConFacetas(
+    session: AsyncReadSessionDep,
+    categoriaID: list[int] = Query(None),
+    color: list[str] = Query(None),
+    tamano: list[str] = Query(None),
+    precioMin: int = Query(None, ge=0),
+    precioMax: int = Query(None, ge=0),
+    disponible: bool = None,
+    orden: Literal["id", "precio", "precio_desc", "recientes"] = "id",
+    cursor: str = None,
+    limite: int = Query(24, ge=1, le=100)
+):
+    """
+    Endpoint para obtener una página de productos activos filtrados por categoría, color,
+    tamaño, precio y disponibilidad, junto con los conteos de cada valor de las facetas.
+    Los parámetros de lista se repiten para marcar varios valores (?color=dorado&color=plateado).
+    """
+
+    condiciones = condicionesFacetas(categoriaID, color, tamano, precioMin, precioMax, disponible)
+
+    # Pagina de productos con todos los filtros y conteos de todas las facetas en una sola sentencia
+    columna, descendente = ordenesProducto[orden]
+    consulta = paginarConsulta(select(Producto).where(*filtros(condiciones)), Producto.id, columna, descendente, cursor, limite)
+    filas = (await session.exec(consultaPaginaFacetas(condiciones, consulta))).all()
+    facetas = agruparFacetas(filas)
+
+    # La union no conserva el orden de la pagina: se vuelve a ordenar aqui
+    productos = sorted(
+        (fila[-1] for fila in filas if fila[-1] is not None),
+        key=lambda producto: (producto.id,) if columna is None else (getattr(producto, columna.key), producto.id),
+        reverse=descendente
+    )
+    pagina = armarPagina(productos, columna, limite)
+
+    return ProductoFacetas(productos=pagina.productos, siguienteCursor=pagina.siguienteCursor, facetas=facetas)
+
+
+
+# READ - Busqueda de productos por texto (ordenada por relevancia)
+@router.get("/buscar", response_model=ProductoPagina)
+async def buscarProductos(
+    session: AsyncReadSessionDep,
+    q: str = Query(..., min_length=2, max_length=100),
+    cursor: str = None,
+    limite: int = Query(24, ge=1, le=100),
+    categoriaID: int = None
+):
+    """
+    Endpoint para buscar productos activos por nombre, descripción y categoría.
+    Los resultados llegan del más al menos relevante, paginados por cursor.
+    """
+
+    # Sin terminos validos no hay nada que buscar
+    if not terminosBusqueda(q):
+        return ProductoPagina(productos=[])
+
+    # Consulta de texto completo del motor en uso
+    consulta, rango, descendente = consultaBusqueda(session.bind.dialect.name, q)
+    consulta = consulta.where(Producto.activo == True)
+    if categoriaID is not None:
+        consulta = consulta.where(Producto.categoriaID == categoriaID)
+
+    filas = (await session.exec(paginarConsulta(consulta, Producto.id, rango, descendente, cursor, limite))).all()
+
+    # Si llego la fila extra hay otra pagina
+    siguienteCursor = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultimo, rangoUltimo = filas[-1]
+        siguienteCursor = codificarCursor(rangoUltimo, ultimo.id)
+
+    return ProductoPagina(productos=[producto for producto, _ in filas], siguienteCursor=siguienteCursor)
+
+
+
 # READ - Producto por ID
 @router.get("/{productoID}", response_model=Producto)
-def productoPorID(productoID: int, session: SessionDep):
+async def productoPorID(productoID: int, request: Request, session: AsyncReadSessionDep):
     """
     Endpoint para obtener el producto por ID
     """
     
+    # Entregar el producto desde el snapshot del catalogo (304 si no cambio)
+    recurso = await snapshotCatalogo.obtenerItem(productoID)
+    if recurso:
+        return respuestaCondicional(request, recurso, cacheProducto)
+
+    # Si no esta en el snapshot (creado en otro proceso o inexistente), consultar la DB
     # Verificar que el producto exista en la DB
-    productoDB = session.exec(select(Producto).where(Producto.id == productoID, Producto.activo == True)).first()
+    productoDB = (await session.exec(select(Producto).where(Producto.id == productoID, Producto.activo == True))).first()
     
     # Si no existe el producto, mostrar error
     if not productoDB:
@@ -117,6 +334,108 @@ def productoPorID(productoID: int, session: SessionDep):
 
 
 
+# READ - Productos comprados frecuentemente junto con un producto
+@router.get("/{productoID}/relacionados", response_model=list[Producto])
+async def productosRelacionados(productoID: int, limite: int = Query(8, ge=1, le=20)):
+    """
+    Endpoint para obtener los productos que más se compran en los mismos pedidos que el producto
+    (venta cruzada). Se sirve desde memoria: el índice de co-compras y el snapshot del catálogo.
+    """
+
+    # Vecinos del indice que siguen activos en el catalogo, ya serializados
+    indice = await indiceRelacionados.obtener()
+    relacionados = []
+    for vecinoID in indice.vecinosDe(productoID) if indice else []:
+        recurso = await snapshotCatalogo.obtenerItem(vecinoID)
+        if recurso:
+            relacionados.append(recurso.contenido)
+        if len(relacionados) == limite:
+            break
+
+    return Response(content=b"[" + b",".join(relacionados) + b"]", media_type="application/json", headers={"Cache-Control": cacheRelacionados})
+
+
+
+# UPDATE - Actualizar precio, stock y estado de varios productos en una sola sentencia
+@router.patch("/lote", response_model=ProductoLote)
+async def actualizarProductosLote(
+    session: AsyncSessionDep,
+    cambios: list[ProductoCambio] = Body(..., min_length=1, max_length=maximoCambiosLote),
+    _=Depends(adminActualAsync)
+):
+    """
+    Endpoint para actualizar el precio, el stock o el estado de muchos productos a la vez
+    (por ejemplo un reabastecimiento). Cada cambio identifica el producto por id o por sku;
+    los campos que no se envían se conservan. Todo se aplica en una transacción.
+    """
+
+    # Validar que cada cambio tenga una sola clave y algo que cambiar
+    ids, skus = set(), set()
+    for i, cambio in enumerate(cambios):
+        if (cambio.id is None) == (cambio.sku is None):
+            raise HTTPException(400, f"El cambio {i} debe indicar id o sku (solo uno)")
+        if cambio.precio is None and cambio.stock is None and cambio.activo is None:
+            raise HTTPException(400, f"El cambio {i} no tiene precio, stock ni activo")
+        claves = ids if cambio.id is not None else skus
+        clave = cambio.id if cambio.id is not None else cambio.sku
+        if clave in claves:
+            raise HTTPException(400, f"El producto {clave} aparece más de una vez")
+        claves.add(clave)
+
+    # Resolver los skus a IDs (una consulta) para unir solo por la llave primaria
+    idsPorSku = {}
+    if skus:
+        idsPorSku = dict((await session.exec(select(Producto.sku, Producto.id).where(Producto.sku.in_(skus)))).all())
+
+        # Un sku que apunta a un producto que tambien llego por id lo cambiaria dos veces
+        for sku, productoID in idsPorSku.items():
+            if productoID in ids:
+                raise HTTPException(400, f"El producto {productoID} aparece más de una vez (por id y por sku {sku})")
+
+    # Cambios con su ID (los skus sin producto quedan como no encontrados)
+    filas = [
+        (cambio.id if cambio.id is not None else idsPorSku[cambio.sku], cambio.precio, cambio.stock, cambio.activo)
+        for cambio in cambios if cambio.id is not None or cambio.sku in idsPorSku
+    ]
+    actualizados = []
+    if filas:
+        # Tabla de cambios (VALUES) unida con producto en un solo UPDATE
+        tabla = values(
+            column("id", Integer), column("precio", Integer), column("stock", Integer), column("activo", Boolean),
+            name="cambios"
+        ).data(filas).cte("cambios")
+
+        # Los CAST fijan el tipo de las columnas que llegan solo con NULL
+        sentencia = (
+            update(Producto)
+            .where(Producto.id == cast(tabla.c.id, Integer))
+            .values(
+                precio=func.coalesce(cast(tabla.c.precio, Integer), Producto.precio),
+                stock=func.coalesce(cast(tabla.c.stock, Integer), Producto.stock),
+                activo=func.coalesce(cast(tabla.c.activo, Boolean), Producto.activo)
+            )
+            .returning(Producto)
+            .execution_options(synchronize_session=False)
+        )
+        actualizados = (await session.exec(sentencia)).scalars().all()
+
+    # Si cambio el estado de algun producto, recontar los activos de sus categorias
+    if actualizados and any(cambio.activo is not None for cambio in cambios):
+        await session.exec(recalcularContadores({producto.categoriaID for producto in actualizados}))
+    await session.commit()
+
+    # El UPDATE no pasa por el flush de la sesion: avisar a los snapshots afectados por los campos enviados
+    if actualizados:
+        campos = {campo for cambio in cambios for campo in ("precio", "stock", "activo") if getattr(cambio, campo) is not None}
+        invalidarProductos({producto.id for producto in actualizados}, campos)
+
+    # Claves que no coincidieron con ningun producto
+    noEncontrados = sorted(ids - {p.id for p in actualizados}) + sorted(skus - {p.sku for p in actualizados})
+
+    return ProductoLote(actualizados=sorted(actualizados, key=lambda p: p.id), noEncontrados=noEncontrados)
+
+
+
 # UPDATE - Actualizar producto con imagen
 @router.patch("/{productoID}", response_model=Producto)
 async def actualizarProducto(
@@ -177,9 +496,9 @@ async def actualizarProducto(
     if esPersonalizado is not None:
         productoDB.esPersonalizado = esPersonalizado
     if opcionesColor is not None:
-        productoDB.opcionesColor = opcionesColor
+        asignarVariantes(productoDB, TipoVariante.COLOR, opcionesColor)
     if opcionesTamano is not None:
-        productoDB.opcionesTamano = opcionesTamano
+        asignarVariantes(productoDB, TipoVariante.TAMANO, opcionesTamano)
     if categoriaID:
         productoDB.categoriaID = categoriaID
     if activo is not None:
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, Form
-from ..auth.auth import clienteActual
+from ..auth.auth import principalActual
 from sqlmodel import select
 from ..models.wishlist import Wishlist
 from ..models.wishlistItem import WishlistItem, WishlistItemCreate
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/wishlist", tags=["Wishlist"])
 def agregarProductoAWishlist(
     productoID: int = Form(...),
     session: SessionDep = None, 
-    cliente=Depends(clienteActual)
+    principal=Depends(principalActual)
 ):
     """
     Endpoint para agregar un producto a la wishlist
@@ -28,20 +28,18 @@ def agregarProductoAWishlist(
     if not productoDB or not productoDB.activo:
         raise HTTPException(404, "Producto no encontrado")
     
-    # Validar la wishlist
-    wishlistDB = session.exec(select(Wishlist).where(Wishlist.clienteID == cliente.id)).first()
-    
     # Si no existe la wishlist, crearla
-    if not wishlistDB:
-        wishlistDB = Wishlist(clienteID=cliente.id)
+    if not principal.wishlistID:
+        wishlistDB = Wishlist(clienteID=principal.cliente.id)
         session.add(wishlistDB)
         session.commit()
         session.refresh(wishlistDB)
+        principal.wishlistID = wishlistDB.id
 
     # Validar si el producto ya está en la wishlist
     productoWishlist = session.exec(
         select(WishlistItem)
-        .where(WishlistItem.wishlistID == wishlistDB.id, WishlistItem.productoID == productoID)
+        .where(WishlistItem.wishlistID == principal.wishlistID, WishlistItem.productoID == productoID)
     ).first()
 
     # Si el producto ya está en la wishlist, mostrar error
@@ -50,7 +48,7 @@ def agregarProductoAWishlist(
     
     # Agregar el producto a la wishlist
     wishlistItem = WishlistItem(
-        wishlistID=wishlistDB.id,
+        wishlistID=principal.wishlistID,
         productoID=productoID
     )
 
@@ -64,22 +62,19 @@ def agregarProductoAWishlist(
 
 # POST - Mover producto al carrito
 @router.post("/mover-al-carrito/{productoID}")
-def moverWishlistAlCarrito(productoID: int, session: SessionDep, cliente=Depends(clienteActual)):
+def moverWishlistAlCarrito(productoID: int, session: SessionDep, principal=Depends(principalActual)):
     """
     Endpoint para mover un producto de la wishlist al carrito
     """
     
-    # Validar la wishlist
-    wishlistDB = session.exec(select(Wishlist).where(Wishlist.clienteID == cliente.id)).first()
-    
     # Si no existe la wishlist, mostrar error
-    if not wishlistDB:
+    if not principal.wishlistID:
         raise HTTPException(404, "No tienes una wishlist")
 
     # Validar el producto
     itemDB = session.exec(
         select(WishlistItem).where(
-            WishlistItem.wishlistID == wishlistDB.id, WishlistItem.productoID == productoID
+            WishlistItem.wishlistID == principal.wishlistID, WishlistItem.productoID == productoID
         )
     ).first()
     
@@ -94,22 +89,18 @@ def moverWishlistAlCarrito(productoID: int, session: SessionDep, cliente=Depends
     if not productoDB:
         raise HTTPException(404, "Producto no encontrado")
 
-    # Obtener el carrito
-    carritoDB = session.exec(select(Carrito).where(Carrito.clienteID == cliente.id)).first()
-    
     # Si no existe el carrito, crearlo
-    if not carritoDB:
-        carrito = Carrito(clienteID=cliente.id)
+    if not principal.carritoID:
+        carrito = Carrito(clienteID=principal.cliente.id)
         session.add(carrito)
         session.commit()
         session.refresh(carrito)
-    else:
-        carrito = carritoDB
+        principal.carritoID = carrito.id
 
     # Validar si el producto ya está en el carrito
     productoEnCarrito = session.exec(
         select(DetalleCarrito)
-        .where(DetalleCarrito.carritoID == carrito.id, DetalleCarrito.productoID == productoID)
+        .where(DetalleCarrito.carritoID == principal.carritoID, DetalleCarrito.productoID == productoID)
     ).first()
     
     # Si el producto ya está en el carrito, incrementar la cantidad
@@ -120,7 +111,7 @@ def moverWishlistAlCarrito(productoID: int, session: SessionDep, cliente=Depends
     else:
         # Si el producto no está en el carrito, agregarlo
         nuevoDetalle = DetalleCarrito(
-            carritoID=carrito.id,
+            carritoID=principal.carritoID,
             productoID=productoID,
             cantidad=1,
             precioUnidad=productoDB.precio,
@@ -138,42 +129,36 @@ def moverWishlistAlCarrito(productoID: int, session: SessionDep, cliente=Depends
 
 # READ - Obtener el wishlist del cliente
 @router.get("/mi-wishlist", response_model=list[WishlistItem])
-def miWishlist(session: SessionDep, cliente=Depends(clienteActual)):
+def miWishlist(session: SessionDep, principal=Depends(principalActual)):
     """
     Endpoint para obtener el wishlist del cliente
     """
     
-    # Validar la wishlist
-    wishlistDB = session.exec(select(Wishlist).where(Wishlist.clienteID == cliente.id)).first()
-    
     # Si no existe la wishlist, mostrar error
-    if not wishlistDB:
+    if not principal.wishlistID:
         raise HTTPException(404, "No tienes una wishlist")
     
     # Obtener los items de la wishlist
-    items = session.exec(select(WishlistItem).where(WishlistItem.wishlistID == wishlistDB.id)).all()
+    items = session.exec(select(WishlistItem).where(WishlistItem.wishlistID == principal.wishlistID)).all()
     return items
 
 
 
 # DELETE - Eliminar un producto de la wishlist
 @router.delete("/{productoID}", status_code=204)
-def eliminarProductoDeWishlist(productoID: int, session: SessionDep, cliente=Depends(clienteActual)):
+def eliminarProductoDeWishlist(productoID: int, session: SessionDep, principal=Depends(principalActual)):
     """
     Endpoint para eliminar un producto de la wishlist
     """
     
-    # Validar la wishlist
-    wishlistDB = session.exec(select(Wishlist).where(Wishlist.clienteID == cliente.id)).first()
-    
     # Si no existe la wishlist, mostrar error
-    if not wishlistDB:
+    if not principal.wishlistID:
         raise HTTPException(404, "No tienes una wishlist")
 
     # Validar si el producto está en la wishlist
     productoWishlist = session.exec(
         select(WishlistItem)
-        .where(WishlistItem.wishlistID == wishlistDB.id, WishlistItem.productoID == productoID)
+        .where(WishlistItem.wishlistID == principal.wishlistID, WishlistItem.productoID == productoID)
     ).first()
 
     # Si el producto no está en la wishlist, mostrar error
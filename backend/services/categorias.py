@@ -0,0 +1,44 @@
+import os
+from sqlmodel import select, func, and_
+from ..models.categoria import Categoria, CategoriaRead
+from ..models.producto import Producto
+
+"""
+    Consultas de categorías con su conteo de productos activos.
+
+    Las usan el router de categorías, el snapshot de categorías y la página de inicio.
+    El conteo sale del contador desnormalizado Categoria.productosActivos; con
+    CATEGORIAS_CONTADOR=false se cuenta con un LEFT JOIN sobre producto.
+"""
+
+# Leer el conteo de productos del contador de la categoria (CATEGORIAS_CONTADOR=false lo cuenta con LEFT JOIN)
+usarContador = os.getenv("CATEGORIAS_CONTADOR", "true").lower() != "false"
+
+
+
+# Funcion para armar la consulta de categorias con su conteo de productos activos (una fila por categoria)
+def consultaCategorias():
+    if usarContador:
+        return select(Categoria, Categoria.productosActivos)
+    return (
+        select(Categoria, func.count(Producto.id))
+        .outerjoin(Producto, and_(Producto.categoriaID == Categoria.id, Producto.activo == True))
+        .group_by(Categoria.id)
+    )
+
+
+
+# Funcion para convertir una fila (categoria, conteo) en la respuesta
+def categoriaLeida(categoria: Categoria, cuenta: int | None) -> CategoriaRead:
+    return CategoriaRead(**categoria.model_dump(exclude={"productosActivos"}), contarProductos=cuenta or 0)
+
+
+
+# Funcion para consultar las categorias con su conteo de productos activos
+async def consultarCategorias(session, soloActivas: bool) -> list[CategoriaRead]:
+    consulta = consultaCategorias().order_by(Categoria.id)
+    if soloActivas:
+        consulta = consulta.where(Categoria.activo == True)
+
+    # Una sola consulta para todas las categorias con su conteo
+    return [categoriaLeida(categoria, cuenta) for categoria, cuenta in (await session.exec(consulta)).all()]
\ No newline at end of file
@@ -0,0 +1,223 @@
+import csv
+import json
+import codecs
+from typing import AsyncIterator, Optional
+from collections import Counter
+from pydantic import ValidationError
+from sqlmodel import SQLModel, Field, select
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from ..db.db import asyncEngine
+from ..db.facetas import separarOpciones
+from ..models.producto import Producto
+from ..models.categoria import Categoria
+from ..models.varianteProducto import VarianteProducto
+from ..utils.enums import TipoVariante
+from ..utils.catalogo import snapshots
+from ..utils.contadorCategorias import sumarContadores, filasContadores
+
+"""
+    Importación masiva de productos desde CSV o JSONL.
+
+    Lee el cuerpo de la petición por partes y procesa las filas en lotes: valida cada fila,
+    descarta los SKU repetidos con una sola consulta por lote (contra la tabla y contra el
+    mismo lote) e inserta el lote con un INSERT de varias filas, cada lote en su transacción.
+    La memoria depende del tamaño del lote y no del archivo; de los errores por fila solo se
+    conservan los primeros maximoErrores (el total siempre se cuenta).
+"""
+
+# Filas por lote (una consulta de SKU y un INSERT por lote)
+tamanoLoteImportacion = 500
+
+# Errores por fila que se devuelven en el reporte
+maximoErrores = 1000
+
+
+
+# Fila de producto a importar
+class ProductoImportar(SQLModel):
+    nombre: str = Field(min_length=1)
+    sku: str = Field(min_length=1)
+    descripcion: str = ""
+    precio: int = Field(ge=0)
+    stock: int = Field(default=0, ge=0)
+    categoriaID: int
+    imagenURL: Optional[str] = None
+    activo: bool = True
+    esPersonalizado: bool = False
+    opcionesColor: Optional[str] = None
+    opcionesTamano: Optional[str] = None
+
+
+
+# Reporte de la importacion
+class ReporteImportacion:
+    def __init__(self):
+        self.filas = 0
+        self.insertados = 0
+        self.totalErrores = 0
+        self.errores: list[dict] = []
+
+    # Registrar el error de una fila
+    def error(self, fila: int, sku: str | None, mensaje: str):
+        self.totalErrores += 1
+        if len(self.errores) < maximoErrores:
+            self.errores.append({"fila": fila, "sku": sku, "error": mensaje})
+
+    def resumen(self) -> dict:
+        return {"filas": self.filas, "insertados": self.insertados, "totalErrores": self.totalErrores, "errores": self.errores}
+
+
+
+# Funcion para partir un flujo de bytes en lineas de texto (sin cargarlo completo)
+async def lineasDe(flujo: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    async for parte in flujo:
+        pendiente += decodificador.decode(parte)
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            yield linea.removesuffix("\r")
+    pendiente += decodificador.decode(b"", final=True)
+    if pendiente:
+        yield pendiente.removesuffix("\r")
+
+
+
+# Funcion para leer los registros de un CSV con encabezado (un campo entre comillas puede ocupar varias lineas)
+async def registrosCsv(lineas: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | str]]:
+    encabezado, registro, numero = None, None, 0
+    async for linea in lineas:
+        numero += 1
+        registro = linea if registro is None else f"{registro}\n{linea}"
+        # Con comillas sin cerrar el registro sigue en la siguiente linea
+        if registro.count('"') % 2:
+            continue
+
+        valores, registro = next(csv.reader([registro]), []), None
+        if encabezado is None:
+            encabezado = [columna.strip() for columna in valores]
+        elif any(valor.strip() for valor in valores):
+            if len(valores) != len(encabezado):
+                yield numero, f"Se esperaban {len(encabezado)} columnas y llegaron {len(valores)}"
+            else:
+                # Las celdas vacias toman el valor por defecto
+                yield numero, {columna: valor for columna, valor in zip(encabezado, valores) if valor.strip() != ""}
+
+    if registro is not None:
+        yield numero, "Comillas sin cerrar al final del archivo"
+
+
+
+# Funcion para leer los registros de un JSONL (un objeto por linea)
+async def registrosJsonl(lineas: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | str]]:
+    numero = 0
+    async for linea in lineas:
+        numero += 1
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except json.JSONDecodeError as e:
+            yield numero, f"JSON inválido: {e.msg}"
+            continue
+        yield numero, registro if isinstance(registro, dict) else "Cada línea debe ser un objeto JSON"
+
+
+
+# Funcion para armar un INSERT que ignora los SKU que ya existan (carreras con otras importaciones)
+def insertarProductos(dialecto: str):
+    modulos = {"postgresql": postgresql, "sqlite": sqlite}
+    if dialecto in modulos:
+        return modulos[dialecto].insert(Producto).on_conflict_do_nothing(index_elements=["sku"])
+    return insert(Producto)
+
+
+
+# Funcion para validar e insertar un lote de filas
+async def importarLote(lote: list[tuple[int, dict]], categorias: set[int], administradorID: int, reporte: ReporteImportacion):
+    validos = {}
+    for numero, registro in lote:
+        try:
+            producto = ProductoImportar.model_validate(registro)
+        except ValidationError as e:
+            error = e.errors()[0]
+            reporte.error(numero, registro.get("sku"), f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+            continue
+
+        if producto.categoriaID not in categorias:
+            reporte.error(numero, producto.sku, f"La categoría {producto.categoriaID} no existe")
+        elif producto.sku in validos:
+            reporte.error(numero, producto.sku, f"SKU repetido en el archivo (fila {validos[producto.sku][0]})")
+        else:
+            validos[producto.sku] = (numero, producto)
+
+    if not validos:
+        return
+
+    async with asyncEngine.begin() as conexion:
+        # SKU que ya estan en la tabla (una consulta para todo el lote)
+        existentes = set((await conexion.execute(select(Producto.sku).where(Producto.sku.in_(list(validos))))).scalars())
+        for sku in existentes:
+            reporte.error(validos.pop(sku)[0], sku, "El SKU ya existe")
+        if not validos:
+            return
+
+        # INSERT de varias filas con los IDs generados
+        columnas = ProductoImportar.model_fields.keys() - {"opcionesColor", "opcionesTamano"}
+        filas = [{**producto.model_dump(include=columnas), "administradorID": administradorID} for _, producto in validos.values()]
+        insertados = (await conexion.execute(insertarProductos(conexion.dialect.name).returning(Producto.id, Producto.sku), filas)).all()
+
+        # Los que no entraron los inserto otra peticion al mismo tiempo
+        for sku in validos.keys() - {sku for _, sku in insertados}:
+            reporte.error(validos[sku][0], sku, "El SKU ya existe")
+
+        # Variantes de color y tamano
+        variantes = [
+            {"productoID": productoID, "tipo": tipo, "valor": valor, "etiqueta": etiqueta}
+            for productoID, sku in insertados
+            for tipo, texto in ((TipoVariante.COLOR, validos[sku][1].opcionesColor), (TipoVariante.TAMANO, validos[sku][1].opcionesTamano))
+            for valor, etiqueta in separarOpciones(texto).items()
+        ]
+        if variantes:
+            await conexion.execute(insert(VarianteProducto), variantes)
+
+        # Productos activos nuevos por categoria (el INSERT no pasa por los eventos del ORM)
+        activos = Counter(validos[sku][1].categoriaID for _, sku in insertados if validos[sku][1].activo)
+        if activos:
+            await conexion.execute(sumarContadores, filasContadores(activos))
+
+    reporte.insertados += len(insertados)
+
+
+
+# Funcion para importar los productos de un flujo CSV o JSONL
+async def importarProductos(flujo: AsyncIterator[bytes], formato: str, administradorID: int) -> dict:
+    reporte = ReporteImportacion()
+    leerRegistros = registrosCsv if formato == "csv" else registrosJsonl
+
+    # Las categorias son pocas: se validan contra un conjunto en memoria
+    async with asyncEngine.connect() as conexion:
+        categorias = set((await conexion.execute(select(Categoria.id))).scalars())
+
+    lote = []
+    async for numero, registro in leerRegistros(lineasDe(flujo)):
+        reporte.filas += 1
+        if isinstance(registro, str):
+            reporte.error(numero, None, registro)
+            continue
+
+        lote.append((numero, registro))
+        if len(lote) >= tamanoLoteImportacion:
+            await importarLote(lote, categorias, administradorID, reporte)
+            lote = []
+
+    if lote:
+        await importarLote(lote, categorias, administradorID, reporte)
+
+    # Las inserciones no pasan por la sesion del ORM: avisar a los snapshots del catalogo
+    if reporte.insertados:
+        for snapshot in snapshots:
+            snapshot.invalidar()
+
+    return reporte.resumen()
\ No newline at end of file
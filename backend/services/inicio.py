@@ -0,0 +1,81 @@
+import os
+from datetime import datetime as dt, timedelta
+from sqlmodel import select, func
+from sqlalchemy import literal_column, union_all
+from ..models.producto import Producto
+from ..models.pedido import Pedido
+from ..models.detallePedido import DetallePedido
+from ..models.inicio import Inicio
+from .categorias import consultarCategorias
+from ..utils.enums import EstadoPedido
+
+"""
+    Contenido de la página de inicio.
+
+    Se arma con tres consultas: las categorías activas con su conteo, una consulta UNION ALL
+    con los IDs ordenados de cada sección y los productos activos (la grilla de la página, de
+    la que también salen los de cada sección). Las ventas se cuentan sobre los pedidos pagados
+    de los últimos INICIO_DIAS_VENTAS días.
+
+        - destacados: el producto más vendido de cada categoría, de más a menos ventas
+        - recientes: los últimos productos agregados al catálogo
+        - masVendidos: los productos con más unidades vendidas
+
+    El resultado se guarda como snapshot (utils/catalogo), así que estas consultas solo corren
+    cuando cambia el catálogo o vence el snapshot, no por cada visita.
+"""
+
+# Productos por seccion
+productosPorSeccion = int(os.getenv("INICIO_PRODUCTOS", 8))
+
+# Dias de pedidos pagados que cuentan para las ventas
+diasVentas = int(os.getenv("INICIO_DIAS_VENTAS", 30))
+
+
+
+# Funcion para armar una seccion: (seccion, productoID, posicion) de los primeros productos de la consulta
+def seccion(nombre: str, consulta, orden: tuple):
+    ordenados = consulta.add_columns(func.row_number().over(order_by=orden).label("posicion")).order_by(*orden).limit(productosPorSeccion).subquery()
+    return select(literal_column(f"'{nombre}'").label("seccion"), ordenados.c.id, ordenados.c.posicion)
+
+
+
+# Funcion para armar la consulta con los IDs de todas las secciones
+def consultaSecciones():
+    # Unidades vendidas por producto en el periodo
+    ventas = (
+        select(DetallePedido.productoID, func.sum(DetallePedido.cantidad).label("unidades"))
+        .join(Pedido, Pedido.id == DetallePedido.pedidoID)
+        .where(Pedido.estado == EstadoPedido.PAGADO, Pedido.fecha >= dt.now() - timedelta(days=diasVentas), DetallePedido.productoID.is_not(None))
+        .group_by(DetallePedido.productoID)
+        .cte("ventas")
+    )
+    vendidos = select(Producto.id).join(ventas, ventas.c.productoID == Producto.id).where(Producto.activo == True)
+
+    # El mas vendido de cada categoria
+    rangos = vendidos.add_columns(
+        ventas.c.unidades,
+        func.row_number().over(partition_by=Producto.categoriaID, order_by=(ventas.c.unidades.desc(), Producto.id)).label("rango")
+    ).subquery()
+    primeros = select(rangos.c.id).where(rangos.c.rango == 1)
+
+    return union_all(
+        seccion("destacados", primeros, (rangos.c.unidades.desc(), rangos.c.id)),
+        seccion("recientes", select(Producto.id).where(Producto.activo == True), (Producto.id.desc(),)),
+        seccion("masVendidos", vendidos, (ventas.c.unidades.desc(), Producto.id))
+    )
+
+
+
+# Funcion para consultar el contenido de la pagina de inicio
+async def consultarInicio(session) -> Inicio:
+    categorias = await consultarCategorias(session, soloActivas=True)
+    secciones = {"destacados": [], "recientes": [], "masVendidos": []}
+    for nombre, productoID, _ in sorted((await session.exec(consultaSecciones())).all(), key=lambda fila: fila[2]):
+        secciones[nombre].append(productoID)
+
+    # Los productos activos en una lectura (las secciones solo tienen productos activos)
+    productos = (await session.exec(select(Producto).where(Producto.activo == True).order_by(Producto.id))).all()
+    porID = {producto.id: producto for producto in productos}
+
+    return Inicio(categorias=categorias, productos=productos, **{nombre: [porID[i] for i in lista] for nombre, lista in secciones.items()})
\ No newline at end of file
@@ -1,9 +1,11 @@
-import requests
 import os
 
 TOKEN_WOMPI = os.getenv("WOMPI_PRIVATE_KEY")
 
 def crearTransaccionWompi(pedido, cliente, metodo):
+    # Importar el cliente HTTP solo cuando se crea una transaccion
+    import requests
+
     headers={"Authorization": f"Bearer {TOKEN_WOMPI}"}
 
     # Mapear el método a Wompi
@@ -0,0 +1,1094 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import base64
+import tempfile
+from types import SimpleNamespace
+from datetime import datetime as dt, timezone
+from email.utils import format_datetime
+from collections import deque
+from pathlib import Path
+import pytest
+
+"""
+    Pruebas de la API.
+
+    Usan una DB SQLite temporal con el esquema migrado y un catálogo mínimo.
+    Se ejecutan desde la raíz del repositorio con: python -m pytest backend/tests/test.py
+"""
+
+# Configurar una DB temporal antes de importar la app
+os.environ["DB_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'meraki_test.db'}"
+os.environ.setdefault("NOMBRE", "Admin")
+os.environ.setdefault("EMAIL", "admin@meraki.co")
+os.environ.setdefault("CONTRASENA", "admin")
+os.environ["DB_MIGRAR_AL_INICIAR"] = "true"
+
+# Las rutas de static y templates son relativas a la raiz del repositorio
+os.chdir(Path(__file__).resolve().parents[2])
+
+from fastapi import Response
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select, func, create_engine
+from sqlalchemy import text, update, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from backend.main import app
+from backend.db.db import engine, asyncEngine
+from backend.db import db, instrumentacion, replica
+from backend.db.instrumentacion import presupuestoConsultas
+from backend.models import Categoria, Producto, Cliente, Pedido, DetallePedido, ClaveIdempotencia
+from backend.db.facetas import asignarVariantes
+from backend.utils.paginacion import codificarCursor
+from backend.utils.catalogo import snapshotCatalogo, snapshotCategorias, snapshotInicio
+from backend.utils.enums import TipoVariante, EstadoPedido
+from backend.utils.coCompras import contarPares, vecinosFrecuentes, sumarPares
+from backend.services import importacionProductos
+from backend.auth import auth
+from backend.utils import idempotencia, calentamiento, relacionados
+from backend.benchmarks.arranqueEnFrio import medirImportacion
+
+# Paquetes pesados que solo se cargan en su primer uso
+modulosDiferidos = ("supabase", "requests")
+
+# Presupuesto de importacion de la app (ms), ajustable segun la maquina
+presupuestoImportacionMs = float(os.getenv("IMPORT_BUDGET_MS", 3000))
+
+
+
+# Cliente de pruebas con un catalogo minimo
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as cliente:
+        # El calentamiento corre en segundo plano: esperar a que termine
+        while cliente.get("/salud").status_code == 503:
+            time.sleep(0.05)
+
+        with Session(engine) as session:
+            for i in range(3):
+                categoria = Categoria(nombre=f"Categoria {i}", administradorID=1)
+                session.add(categoria)
+                session.flush()
+                for j in range(4):
+                    session.add(Producto(nombre=f"Producto {i}-{j}", descripcion="", precio=1000 * (j + 1), stock=5, sku=f"SKU-{i}-{j}", categoriaID=categoria.id))
+            session.commit()
+        yield cliente
+
+
+
+# Presupuesto de consultas: falla la prueba si el bloque ejecuta mas consultas de las permitidas
+@pytest.fixture
+def presupuesto(cliente):
+    # Esperar las reconstrucciones pendientes de los snapshots para no contarlas en la prueba
+    cliente.get("/productos/")
+    cliente.get("/categorias/")
+    cliente.get("/api/inicio")
+    return presupuestoConsultas
+
+
+
+# Pruebas de presupuesto de consultas
+def test_listaProductos_sin_consultas(cliente, presupuesto):
+    with presupuesto(0):
+        respuesta = cliente.get("/productos/")
+    assert respuesta.status_code == 200
+    assert len(respuesta.json()) == 12
+
+
+def test_productoPorID_sin_consultas(cliente, presupuesto):
+    with presupuesto(0):
+        respuesta = cliente.get("/productos/1")
+    assert respuesta.status_code == 200
+    assert respuesta.json()["nombre"] == "Producto 0-0"
+
+
+def test_categoriaPorID_una_consulta(cliente, presupuesto):
+    with presupuesto(1):
+        respuesta = cliente.get("/categorias/1")
+    assert respuesta.json()["contarProductos"] == 4
+
+
+def test_presupuesto_excedido_falla(cliente, presupuesto):
+    with pytest.raises(AssertionError, match="presupuesto: 0"):
+        with presupuesto(0):
+            cliente.get("/categorias/1")
+
+
+def test_headers_de_consultas(cliente):
+    respuesta = cliente.get("/categorias/1")
+    assert respuesta.headers["X-DB-Queries"] == "1"
+    assert respuesta.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_sentencia_fallida_no_deja_inicio_pendiente(cliente):
+    with engine.connect() as conexion:
+        for _ in range(3):
+            with pytest.raises(exc.OperationalError):
+                conexion.exec_driver_sql("SELECT * FROM tablaInexistente")
+
+        # La conexion no acumula inicios y la siguiente sentencia se mide normal
+        with instrumentacion.contarConsultas() as contador:
+            conexion.exec_driver_sql("SELECT 1")
+        assert "inicioConsulta" not in conexion.info
+        assert contador.consultas == 1 and 0 <= contador.tiempoMs < 1000
+
+
+def test_consultas_lentas_con_plan(clienteAdmin, monkeypatch):
+    # Con un umbral minimo toda consulta es lenta (buffer propio para no depender de otras pruebas)
+    monkeypatch.setattr(instrumentacion, "umbralLentaMs", 0.000001)
+    monkeypatch.setattr(instrumentacion, "explicarLentas", True)
+    monkeypatch.setattr(instrumentacion, "consultasLentas", deque(maxlen=instrumentacion.tamanoBufferLentas))
+    clienteAdmin.get("/categorias/1")
+    monkeypatch.setattr(instrumentacion, "umbralLentaMs", 0)
+
+    # Esperar a que el hilo de fondo termine de capturar los planes
+    instrumentacion.ejecutorPlanes.submit(lambda: None).result()
+    lentas = instrumentacion.listaConsultasLentas()
+    registro = next(r for r in lentas if r["sentencia"].startswith("SELECT") and "categoria" in r["sentencia"])
+    assert registro["endpoint"] and registro["duracionMs"] >= 0
+    assert "SEARCH" in registro["plan"] or "SCAN" in registro["plan"]
+    assert all(not r["sentencia"].startswith("EXPLAIN") for r in lentas)
+
+    # El administrador ve el mismo buffer, las mas recientes primero
+    assert clienteAdmin.get("/admin/metricas/consultas-lentas").json() == instrumentacion.listaConsultasLentas()
+
+
+
+# Pruebas del snapshot del catalogo
+def test_snapshot_se_reconstruye_tras_commit(cliente):
+    with Session(engine) as session:
+        producto = session.get(Producto, 2)
+        producto.stock = 0
+        session.commit()
+
+    productos = {p["id"]: p for p in cliente.get("/productos/").json()}
+    assert productos[2]["stock"] == 0
+
+    with Session(engine) as session:
+        producto = session.get(Producto, 2)
+        producto.stock = 5
+        session.commit()
+
+
+def test_stock_reconstruye_solo_el_producto(cliente, clienteComprador, presupuesto):
+    vaciarCarrito(clienteComprador)
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 10, "cantidad": 1})
+    versionCategorias, construido = snapshotCategorias.version, snapshotCatalogo.construido
+    assert clienteComprador.post("/carrito/pedir").status_code == 200
+    try:
+        # El pedido solo cambia el stock: las categorias no se tocan y el catalogo relee ese producto
+        productos = {p["id"]: p for p in cliente.get("/productos/").json()}
+        assert productos[10]["stock"] == 4 and len(productos) == 12
+        assert cliente.get("/productos/10").json()["stock"] == 4
+        assert snapshotCategorias.version == versionCategorias
+        assert snapshotCatalogo.construido == construido
+    finally:
+        with Session(engine) as session:
+            session.get(Producto, 10).stock = 5
+            session.commit()
+
+
+
+# Pruebas de GET condicional
+@pytest.mark.parametrize("ruta", ["/productos/", "/productos/1", "/categorias/"])
+def test_get_condicional_responde_304(cliente, presupuesto, ruta):
+    respuesta = cliente.get(ruta)
+    assert respuesta.status_code == 200
+    assert respuesta.headers["Cache-Control"].startswith("public")
+
+    with presupuesto(0):
+        porEtag = cliente.get(ruta, headers={"If-None-Match": respuesta.headers["ETag"]})
+    assert porEtag.status_code == 304
+    assert porEtag.content == b""
+    assert porEtag.headers["ETag"] == respuesta.headers["ETag"]
+    assert cliente.get(ruta, headers={"If-None-Match": '"otro"'}).status_code == 200
+
+    # Last-Modified se envia cuando la ultima modificacion en la DB tiene al menos un segundo
+    if "Last-Modified" not in respuesta.headers:
+        time.sleep(1)
+        respuesta = cliente.get(ruta)
+    with presupuesto(0):
+        porFecha = cliente.get(ruta, headers={"If-Modified-Since": respuesta.headers["Last-Modified"]})
+    assert porFecha.status_code == 304
+    assert cliente.get(ruta, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+
+    # If-None-Match manda sobre If-Modified-Since
+    ambos = {"If-None-Match": '"otro"', "If-Modified-Since": respuesta.headers["Last-Modified"]}
+    assert cliente.get(ruta, headers=ambos).status_code == 200
+
+
+def test_last_modified_sale_de_la_db(cliente):
+    # Cambio con fecha vieja: el Last-Modified es la fecha de la DB, no la de la reconstruccion
+    fecha = dt(2020, 1, 2, 3, 4, 5)
+    with Session(engine) as session:
+        producto = session.get(Producto, 3)
+        producto.precio += 1
+        session.commit()
+        session.exec(update(Producto).where(Producto.id == 3).values(fechaActualizacion=fecha))
+        session.commit()
+    snapshotCatalogo.invalidar({3})
+    try:
+        item = cliente.get("/productos/3")
+        assert item.headers["Last-Modified"] == format_datetime(fecha.astimezone(timezone.utc), usegmt=True)
+        assert cliente.get("/productos/3", headers={"If-Modified-Since": item.headers["Last-Modified"]}).status_code == 304
+        assert "Last-Modified" not in cliente.get("/api/inicio").headers
+    finally:
+        with Session(engine) as session:
+            session.get(Producto, 3).precio -= 1
+            session.commit()
+
+
+def test_etag_cambia_con_el_contenido(cliente):
+    etagAntes = cliente.get("/productos/3").headers["ETag"]
+    with Session(engine) as session:
+        producto = session.get(Producto, 3)
+        producto.precio += 1
+        session.commit()
+        try:
+            respuesta = cliente.get("/productos/3", headers={"If-None-Match": etagAntes})
+            assert respuesta.status_code == 200
+            assert respuesta.headers["ETag"] != etagAntes
+        finally:
+            producto.precio -= 1
+            session.commit()
+
+
+
+# Pruebas de paginacion por cursor
+@pytest.mark.parametrize("orden", ["id", "precio", "precio_desc", "recientes"])
+def test_paginacion_recorre_todo_sin_repetir(cliente, presupuesto, orden):
+    vistos, cursor = [], None
+    while True:
+        with presupuesto(1):
+            respuesta = cliente.get("/productos/pagina", params={"orden": orden, "limite": 5, **({"cursor": cursor} if cursor else {})})
+        pagina = respuesta.json()
+        vistos += pagina["productos"]
+        cursor = pagina["siguienteCursor"]
+        if not cursor:
+            break
+
+    ids = [producto["id"] for producto in vistos]
+    assert len(ids) == len(set(ids)) == 12
+    clave = (lambda p: p["id"]) if orden in ("id", "recientes") else (lambda p: (p["precio"], p["id"]))
+    assert vistos == sorted(vistos, key=clave, reverse=orden in ("precio_desc", "recientes"))
+
+
+def test_paginacion_filtros(cliente):
+    respuesta = cliente.get("/productos/pagina", params={"categoriaID": 2, "precioMin": 2000, "precioMax": 3000, "disponible": True})
+    assert sorted(p["precio"] for p in respuesta.json()["productos"]) == [2000, 3000]
+    assert cliente.get("/productos/pagina", params={"disponible": False}).json()["productos"] == []
+    assert cliente.get("/productos/pagina", params={"limite": 101}).status_code == 422
+    assert cliente.get("/productos/pagina", params={"cursor": "xyz"}).status_code == 400
+
+    # Cursores con el valor o el ID de otro tipo que la columna de orden
+    assert cliente.get("/productos/pagina", params={"orden": "precio", "cursor": codificarCursor(1000, "3")}).status_code == 400
+    assert cliente.get("/productos/buscar", params={"q": "producto", "cursor": codificarCursor("1.5", 3)}).status_code == 400
+
+
+@pytest.mark.parametrize("orden,valor", [("precio", "1000"), ("precio", {"a": 1}), ("precio", True), ("id", 5), ("precio", None)])
+def test_paginacion_cursor_alterado(cliente, orden, valor):
+    cursor = codificarCursor(valor, 3)
+    assert cliente.get("/productos/pagina", params={"orden": orden, "cursor": cursor}).status_code == 400
+
+
+
+# Pruebas de busqueda de texto completo
+def test_busqueda_por_nombre_y_categoria(cliente):
+    respuesta = cliente.get("/productos/buscar", params={"q": "producto 1-2"})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["productos"][0]["nombre"] == "Producto 1-2"
+
+    # Prefijos sobre el nombre de la categoria, filtrados por categoria
+    nombres = [p["nombre"] for p in cliente.get("/productos/buscar", params={"q": "categ", "categoriaID": 3}).json()["productos"]]
+    assert sorted(nombres) == [f"Producto 2-{j}" for j in range(4)]
+
+
+def test_busqueda_paginada_y_actualizada(cliente):
+    vistos, cursor = [], None
+    while True:
+        pagina = cliente.get("/productos/buscar", params={"q": "producto", "limite": 5, **({"cursor": cursor} if cursor else {})}).json()
+        vistos += [p["id"] for p in pagina["productos"]]
+        cursor = pagina["siguienteCursor"]
+        if not cursor:
+            break
+    assert len(vistos) == len(set(vistos)) == 12
+
+    # Los triggers mantienen el indice al cambiar el producto
+    with Session(engine) as session:
+        producto = session.get(Producto, 1)
+        nombreAnterior, producto.nombre = producto.nombre, "Anillo esmeralda"
+        session.commit()
+        try:
+            assert [p["id"] for p in cliente.get("/productos/buscar", params={"q": "esmeralda"}).json()["productos"]] == [1]
+        finally:
+            producto.nombre = nombreAnterior
+            session.commit()
+
+
+
+# Pruebas de facetas
+def test_variantes_normalizadas(cliente):
+    with Session(engine) as session:
+        producto = session.get(Producto, 5)
+        asignarVariantes(producto, TipoVariante.COLOR, "Dorado, plateado ,DORADO, Rosé")
+        session.commit()
+        assert sorted((v.valor, v.etiqueta) for v in producto.variantes) == [("dorado", "Dorado"), ("plateado", "plateado"), ("rose", "Rosé")]
+
+        # Reemplazar conserva las filas que siguen y no toca los otros tipos
+        asignarVariantes(producto, TipoVariante.TAMANO, "Grande")
+        asignarVariantes(producto, TipoVariante.COLOR, "Plateado")
+        session.commit()
+        assert sorted((v.tipo.name, v.valor, v.etiqueta) for v in producto.variantes) == [("COLOR", "plateado", "Plateado"), ("TAMANO", "grande", "Grande")]
+
+        asignarVariantes(producto, TipoVariante.COLOR, None)
+        asignarVariantes(producto, TipoVariante.TAMANO, "")
+        session.commit()
+        assert producto.variantes == []
+
+
+def test_facetas_en_un_viaje(cliente, presupuesto):
+    with Session(engine) as session:
+        for productoID, colores, tamanos in [(1, "Dorado, Plateado", "Grande"), (2, "Dorado", None), (6, "Plateado", "Pequeño")]:
+            producto = session.get(Producto, productoID)
+            asignarVariantes(producto, TipoVariante.COLOR, colores)
+            asignarVariantes(producto, TipoVariante.TAMANO, tamanos)
+        session.commit()
+
+    try:
+        with presupuesto(1):
+            respuesta = cliente.get("/productos/facetas", params={"color": ["dorado"]})
+        pagina = respuesta.json()
+        assert [p["id"] for p in pagina["productos"]] == [1, 2]
+        conteos = {faceta: {v["valor"]: v["cantidad"] for v in valores} for faceta, valores in pagina["facetas"].items()}
+
+        # La faceta filtrada se cuenta sin su propio filtro; las demas con el
+        assert conteos["color"] == {"dorado": 2, "plateado": 2}
+        assert conteos["categoria"] == {"1": 2}
+        assert conteos["tamano"] == {"grande": 1}
+        assert conteos["precio"]["0-20000"] == 2 and sum(conteos["precio"].values()) == 2
+
+        # Filtros combinados: color y categoria
+        pagina = cliente.get("/productos/facetas", params={"color": ["Plateado"], "categoriaID": [2]}).json()
+        assert [p["id"] for p in pagina["productos"]] == [6]
+        assert {v["valor"]: v["cantidad"] for v in pagina["facetas"]["categoria"]} == {"1": 1, "2": 1}
+        assert cliente.get("/productos/facetas").json()["facetas"]["categoria"][0]["cantidad"] == 4
+
+        # Paginas con orden por precio descendente (la union no conserva el orden de la pagina)
+        pagina = cliente.get("/productos/facetas", params={"orden": "precio_desc", "limite": 3}).json()
+        siguiente = cliente.get("/productos/facetas", params={"orden": "precio_desc", "limite": 3, "cursor": pagina["siguienteCursor"]}).json()
+        precios = [p["precio"] for p in pagina["productos"] + siguiente["productos"]]
+        assert len(precios) == 6 and precios == sorted(precios, reverse=True)
+    finally:
+        with Session(engine) as session:
+            for productoID in (1, 2, 6):
+                producto = session.get(Producto, productoID)
+                producto.variantes = []
+            session.commit()
+
+
+
+# Pruebas de importacion masiva
+@pytest.fixture
+def clienteAdmin(cliente):
+    admin = TestClient(app)
+    admin.post("/auth/login", data={"email": os.environ["EMAIL"], "contrasena": os.environ["CONTRASENA"]}, follow_redirects=False)
+    return admin
+
+
+def test_importar_csv_reporta_errores_por_fila(clienteAdmin, monkeypatch):
+    monkeypatch.setattr(importacionProductos, "tamanoLoteImportacion", 2)
+    archivo = (
+        "nombre,sku,precio,stock,categoriaID,descripcion,opcionesColor\r\n"
+        "Collar luna,IMP-1,45000,3,1,\"Hecho a mano,\nen piña y plata\",\"Dorado, Plateado\"\r\n"
+        "Anillo sol,IMP-2,caro,1,1,,\r\n"
+        "Pulsera,SKU-0-0,1000,1,1,,\r\n"
+        "Aretes,IMP-3,2000,,2,,\r\n"
+        "Aretes bis,IMP-3,2000,,2,,\r\n"
+        "Dije,IMP-4,2000,1,99,,\r\n"
+        "\r\n"
+        "Cadena,IMP-5,3000\r\n"
+    ).encode()
+
+    # El cuerpo llega por partes pequenas (corta lineas y caracteres multibyte)
+    partes = (archivo[i:i + 7] for i in range(0, len(archivo), 7))
+    respuesta = clienteAdmin.post("/productos/importar", content=partes, headers={"Content-Type": "text/csv"})
+    assert respuesta.status_code == 200
+    reporte = respuesta.json()
+    assert reporte["filas"] == 7 and reporte["insertados"] == 2 and reporte["totalErrores"] == 5
+    assert sorted((error["fila"], error["sku"]) for error in reporte["errores"]) == [
+        (4, "IMP-2"), (5, "SKU-0-0"), (7, "IMP-3"), (8, "IMP-4"), (10, None)
+    ]
+
+    with Session(engine) as session:
+        producto = session.exec(select(Producto).where(Producto.sku == "IMP-1")).one()
+        assert producto.descripcion == "Hecho a mano,\nen piña y plata"
+        assert sorted(v.valor for v in producto.variantes) == ["dorado", "plateado"]
+        assert session.exec(select(Producto).where(Producto.sku == "IMP-3")).one().stock == 0
+
+    # Los snapshots del catalogo se enteran de las inserciones
+    assert "IMP-1" in {p["sku"] for p in clienteAdmin.get("/productos/").json()}
+
+
+def test_importar_jsonl(clienteAdmin):
+    archivo = '{"nombre": "Broche", "sku": "IMP-J1", "precio": 5000, "categoriaID": 3, "opcionesTamano": "Grande"}\n[1]\n{"sku": "IMP-J2"\n'
+    reporte = clienteAdmin.post("/productos/importar", params={"formato": "jsonl"}, content=archivo).json()
+    assert reporte["insertados"] == 1
+    assert [error["fila"] for error in reporte["errores"]] == [2, 3]
+
+    assert clienteAdmin.post("/productos/importar", content="a,b").status_code == 415
+    assert TestClient(app).post("/productos/importar", params={"formato": "csv"}, content="a,b").status_code == 401
+
+
+
+# Pruebas de actualizacion en lote
+def test_actualizar_lote_en_una_sentencia(clienteAdmin):
+    cambios = [{"id": 7, "stock": 40}, {"sku": "SKU-2-3", "precio": 9900, "activo": False}, {"id": 9999, "stock": 1}, {"sku": "NO-EXISTE", "precio": 1}]
+    respuesta = clienteAdmin.patch("/productos/lote", json=cambios)
+    assert respuesta.status_code == 200
+
+    # Administrador, skus a IDs, UPDATE y recuento de las categorias con productos desactivados
+    # (la reconstruccion del snapshot corre aparte y no cuenta en la peticion)
+    assert respuesta.headers["X-DB-Queries"] == "4"
+    resultado = respuesta.json()
+    assert [(p["id"], p["precio"], p["stock"], p["activo"]) for p in resultado["actualizados"]] == [(7, 3000, 40, True), (12, 9900, 5, False)]
+    assert resultado["noEncontrados"] == [9999, "NO-EXISTE"]
+
+    try:
+        # Los snapshots del catalogo reflejan el cambio
+        productos = {p["id"]: p for p in clienteAdmin.get("/productos/").json()}
+        assert productos[7]["stock"] == 40 and 12 not in productos
+    finally:
+        clienteAdmin.patch("/productos/lote", json=[{"id": 7, "stock": 5}, {"id": 12, "precio": 4000, "activo": True}])
+
+    # Cambios invalidos
+    assert clienteAdmin.patch("/productos/lote", json=[{"id": 1, "sku": "SKU-0-0", "stock": 1}]).status_code == 400
+    assert clienteAdmin.patch("/productos/lote", json=[{"id": 1}]).status_code == 400
+    assert clienteAdmin.patch("/productos/lote", json=[{"id": 1, "stock": 1}, {"id": 1, "stock": 2}]).status_code == 400
+    assert clienteAdmin.patch("/productos/lote", json=[{"id": 1, "stock": 1}, {"sku": "SKU-0-0", "stock": 2}]).status_code == 400
+    assert clienteAdmin.patch("/productos/lote", json=[{"id": 1, "stock": -1}]).status_code == 422
+    assert clienteAdmin.patch("/productos/lote", json=[]).status_code == 422
+
+
+
+# Pruebas del contador de productos por categoria
+def contadoresCorrectos() -> bool:
+    with Session(engine) as session:
+        for categoria in session.exec(select(Categoria)).all():
+            activos = session.exec(select(Producto).where(Producto.categoriaID == categoria.id, Producto.activo == True)).all()
+            if categoria.productosActivos != len(activos):
+                return False
+    return True
+
+
+def test_contador_de_categorias_sigue_los_cambios(clienteAdmin):
+    assert contadoresCorrectos()
+    with Session(engine) as session:
+        producto = Producto(nombre="Temporal", descripcion="", precio=1000, stock=1, sku="TMP-CONTADOR", categoriaID=1)
+        session.add(producto)
+        session.commit()
+        assert contadoresCorrectos()
+
+        # Mover de categoria, desactivar y eliminar
+        producto.categoriaID = 2
+        session.commit()
+        assert contadoresCorrectos()
+        producto.activo = False
+        session.commit()
+        assert contadoresCorrectos()
+        session.delete(producto)
+        session.commit()
+        assert contadoresCorrectos()
+
+    # Escrituras fuera del ORM: actualizacion en lote
+    clienteAdmin.patch("/productos/lote", json=[{"id": 5, "activo": False}])
+    assert contadoresCorrectos()
+    clienteAdmin.patch("/productos/lote", json=[{"id": 5, "activo": True}])
+
+    # Todas las categorias con su conteo en una consulta (mas la del administrador)
+    respuesta = clienteAdmin.get("/categorias/todas")
+    assert respuesta.headers["X-DB-Queries"] == "2"
+    with Session(engine) as session:
+        esperados = {c.id: sum(p.activo for p in c.productos) for c in session.exec(select(Categoria)).all()}
+    assert {c["id"]: c["contarProductos"] for c in respuesta.json()} == esperados
+
+
+
+# Pruebas de productos comprados juntos
+def test_coCompras_vectorizado_igual_a_conteo_directo():
+    import random
+    import numpy as np
+    from collections import Counter
+
+    rng = random.Random(3)
+    lineas = [(pedido, rng.randint(1, 30)) for pedido in range(1, 400) for _ in range(rng.randint(1, 6))]
+    pedidos, productos = np.array(lineas).T
+
+    # Conteo directo: pares distintos de productos distintos por pedido
+    esperado = Counter()
+    for pedido in set(pedidos.tolist()):
+        distintos = {producto for p, producto in lineas if p == pedido}
+        esperado.update((a, b) for a in distintos for b in distintos if a != b)
+
+    claves, conteos = contarPares(pedidos, productos, maximoLineas=50)
+    assert {(int(c >> 32), int(c & 0xFFFFFFFF)): int(n) for c, n in zip(claves, conteos)} == esperado
+
+    # Sumar dos mitades da lo mismo que contar todo junto
+    mitad = pedidos < 200
+    suma = sumarPares(*contarPares(pedidos[mitad], productos[mitad], 50), *contarPares(pedidos[~mitad], productos[~mitad], 50))
+    assert np.array_equal(suma[0], claves) and np.array_equal(suma[1], conteos)
+
+    # Vecinos: los K mas frecuentes, desempatados por ID
+    ids, vecinos, frecuencias = vecinosFrecuentes(claves, conteos, 5)
+    for fila, producto in enumerate(ids.tolist()):
+        ordenados = sorted(((-n, b) for (a, b), n in esperado.items() if a == producto))[:5]
+        assert vecinos[fila][:len(ordenados)].tolist() == [b for _, b in ordenados]
+        assert frecuencias[fila][:len(ordenados)].tolist() == [-n for n, _ in ordenados]
+
+
+def test_relacionados_se_actualizan_al_pagar(cliente, presupuesto):
+    with Session(engine) as session:
+        comprador = Cliente(nombre="Comprador", email="comprador@meraki.co", contrasenaHash="x")
+        session.add(comprador)
+        session.flush()
+
+        # Pedidos pagados: 1 va con 2 dos veces y con 3 una vez; el pendiente no cuenta
+        for productos, estado in [((1, 2), EstadoPedido.PAGADO), ((1, 2, 3), EstadoPedido.PAGADO), ((1, 4), EstadoPedido.PENDIENTE)]:
+            session.add(Pedido(clienteID=comprador.id, estado=estado, detalles=[DetallePedido(productoID=p, cantidad=1) for p in productos]))
+        session.commit()
+
+        # La primera lectura espera que se sumen los pedidos; las siguientes salen de memoria
+        # (los pedidos tambien invalidan la pagina de inicio: se espera su reconstruccion)
+        assert [p["id"] for p in cliente.get("/productos/1/relacionados").json()] == [2, 3]
+        cliente.get("/api/inicio")
+        with presupuesto(0):
+            respuesta = cliente.get("/productos/1/relacionados")
+        assert [p["id"] for p in respuesta.json()] == [2, 3]
+        assert respuesta.headers["Cache-Control"].startswith("public")
+
+        # El pedido pendiente pasa a PAGADO: sus lineas se suman al indice tras el commit
+        pendiente = session.exec(select(Pedido).where(Pedido.estado == EstadoPedido.PENDIENTE)).one()
+        pendiente.estado = EstadoPedido.PAGADO
+        session.commit()
+        assert [p["id"] for p in cliente.get("/productos/4/relacionados").json()] == [1]
+        assert [p["id"] for p in cliente.get("/productos/1/relacionados", params={"limite": 2}).json()] == [2, 3]
+        assert cliente.get("/productos/99/relacionados").json() == []
+
+
+def test_relacionados_tras_un_fallo(cliente, monkeypatch):
+    indice = relacionados.indiceRelacionados
+    construir, llamadas = relacionados.Indice.construir, []
+
+    def fallar(*args):
+        llamadas.append(args)
+        raise RuntimeError("DB caida")
+
+    # Un fallo al sumar pedidos deja el indice vencido para la siguiente reconstruccion
+    monkeypatch.setattr(relacionados.Indice, "agregar", fallar)
+    cliente.get("/productos/1/relacionados")
+    indice.agregarPedidos({10**6})
+    assert cliente.get("/productos/1/relacionados").status_code == 200
+    assert indice.vencido() and indice.enEspera() and not indice.pendientes
+
+    # Sin indice las peticiones no esperan la reconstruccion ni la reintentan mientras dura la pausa
+    monkeypatch.setattr(relacionados.Indice, "construir", classmethod(lambda cls: fallar()))
+    monkeypatch.setattr(indice, "indice", None)
+    llamadas.clear()
+    for _ in range(3):
+        assert cliente.get("/productos/1/relacionados").json() == []
+    assert llamadas == []
+
+    # Pasada la pausa se reconstruye en segundo plano
+    monkeypatch.setattr(relacionados.Indice, "construir", construir)
+    monkeypatch.setattr(indice, "fallo", None)
+    cliente.get("/productos/1/relacionados")
+    while indice.indice is None:
+        time.sleep(0.01)
+    assert not indice.vencido()
+    assert [p["id"] for p in cliente.get("/productos/1/relacionados").json()][:2] == [2, 3]
+
+
+
+# Pruebas de la pagina de inicio
+def test_inicio_en_una_peticion(cliente, presupuesto):
+    # Ventas propias de la prueba: muchas unidades de 5 y de 9 para que encabecen el ranking
+    with Session(engine) as session:
+        comprador = Cliente(nombre="Inicio", email="inicio@meraki.co", contrasenaHash="x")
+        session.add(comprador)
+        session.flush()
+        pedidos = [
+            Pedido(clienteID=comprador.id, estado=EstadoPedido.PAGADO, detalles=[DetallePedido(productoID=5, cantidad=100), DetallePedido(productoID=9, cantidad=50)]),
+            Pedido(clienteID=comprador.id, estado=EstadoPedido.PAGADO, detalles=[DetallePedido(productoID=6, cantidad=80)])
+        ]
+        session.add_all(pedidos)
+        session.commit()
+        compradorID, pedidoIDs = comprador.id, [pedido.id for pedido in pedidos]
+
+    try:
+        cliente.get("/api/inicio")
+        with presupuesto(0):
+            respuesta = cliente.get("/api/inicio")
+        inicio = respuesta.json()
+        assert [c["id"] for c in inicio["categorias"]] == [c["id"] for c in cliente.get("/categorias/").json()]
+        assert [p["id"] for p in inicio["masVendidos"]][:3] == [5, 6, 9]
+        assert [p["id"] for p in inicio["destacados"]][:2] == [5, 9]
+        with Session(engine) as session:
+            ultimo = session.exec(select(func.max(Producto.id)).where(Producto.activo == True)).one()
+        assert inicio["recientes"][0]["id"] == ultimo
+
+        # La grilla sale de la misma respuesta, con el stock al dia
+        assert inicio["productos"] == cliente.get("/productos/").json()
+        with Session(engine) as session:
+            session.get(Producto, 7).stock -= 1
+            session.commit()
+        assert next(p for p in cliente.get("/api/inicio").json()["productos"] if p["id"] == 7)["stock"] == 4
+        with Session(engine) as session:
+            session.get(Producto, 7).stock += 1
+            session.commit()
+        respuesta = cliente.get("/api/inicio")
+
+        # GET condicional y reconstruccion al cambiar el catalogo
+        assert cliente.get("/api/inicio", headers={"If-None-Match": respuesta.headers["ETag"]}).status_code == 304
+        with Session(engine) as session:
+            session.get(Producto, 5).activo = False
+            session.commit()
+        inicio = cliente.get("/api/inicio").json()
+        assert [p["id"] for p in inicio["masVendidos"]][:2] == [6, 9]
+        assert [p["id"] for p in inicio["destacados"]][:1] == [6]
+
+        # Un pedido que no esta pagado no toca la pagina de inicio; al pagarse, si
+        version = snapshotInicio.version
+        with Session(engine) as session:
+            pedido = Pedido(clienteID=compradorID, estado=EstadoPedido.PENDIENTE, detalles=[DetallePedido(productoID=10, cantidad=500)])
+            session.add(pedido)
+            session.commit()
+            assert snapshotInicio.version == version
+            pedido.estado = EstadoPedido.PAGADO
+            session.commit()
+            pedidoIDs.append(pedido.id)
+        assert snapshotInicio.version == version + 1
+        assert cliente.get("/api/inicio").json()["masVendidos"][0]["id"] == 10
+    finally:
+        with Session(engine) as session:
+            session.get(Producto, 5).activo = True
+            for pedidoID in pedidoIDs:
+                session.delete(session.get(Pedido, pedidoID))
+            session.commit()
+
+
+
+# Pruebas del carrito
+def sesionCliente(nombre: str) -> TestClient:
+    comprador = TestClient(app)
+    datos = {"nombre": nombre, "email": f"{nombre.lower()}@meraki.co", "contrasena": f"{nombre.lower()}123", "telefono": "3001234567"}
+    if comprador.post("/clientes/registrar", data=datos, follow_redirects=False).status_code != 303:
+        comprador.post("/auth/login", data={"email": datos["email"], "contrasena": datos["contrasena"]}, follow_redirects=False)
+    return comprador
+
+
+@pytest.fixture
+def clienteComprador(cliente):
+    return sesionCliente("Carla")
+
+
+
+def vaciarCarrito(comprador: TestClient):
+    assert comprador.delete("/carrito/vaciar").status_code == 200
+
+
+def test_vaciar_carrito(clienteComprador):
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 1, "cantidad": 2})
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 6, "cantidad": 1})
+
+    # Eliminar un producto sigue funcionando y "/vaciar" no se toma como un ID
+    assert clienteComprador.delete("/carrito/6").status_code == 200
+    respuesta = clienteComprador.delete("/carrito/vaciar")
+    assert respuesta.status_code == 200
+    assert respuesta.json() == {"mensaje": "Carrito vaciado correctamente"}
+    assert clienteComprador.get("/carrito/vista").json()["lineas"] == []
+    assert clienteComprador.delete("/carrito/otra").status_code == 404
+
+
+def test_vista_carrito_en_una_consulta(clienteComprador, presupuesto):
+    vacio = clienteComprador.get("/carrito/vista").json()
+    assert vacio["lineas"] == [] and vacio["subtotal"] == 0 and vacio["costoEnvio"] == 0
+
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 1, "cantidad": 2})
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 6, "cantidad": 1})
+    try:
+        # Cliente de la sesion y la vista completa
+        with presupuesto(2):
+            respuesta = clienteComprador.get("/carrito/vista")
+        assert respuesta.headers["X-DB-Queries"] == "2"
+        vista = respuesta.json()
+        assert [(l["productoID"], l["nombre"], l["cantidad"], l["subtotal"], l["stock"]) for l in vista["lineas"]] == [
+            (1, "Producto 0-0", 2, 2000, 5), (6, "Producto 1-1", 1, 2000, 5)
+        ]
+        assert (vista["cantidadProductos"], vista["subtotal"], vista["costoEnvio"], vista["total"]) == (3, 4000, 8900, 12900)
+
+        # Sobre el minimo el envio es gratis
+        clienteComprador.patch("/carrito/actualizar-cantidad/6", data={"cantidad": 5})
+        clienteComprador.post("/carrito/agregar-producto", data={"productoID": 4, "cantidad": 5})
+        vista = clienteComprador.get("/carrito/vista").json()
+        assert (vista["subtotal"], vista["costoEnvio"], vista["total"]) == (32000, 0, 32000)
+    finally:
+        vaciarCarrito(clienteComprador)
+
+    assert TestClient(app).get("/carrito/vista").status_code == 401
+
+
+def test_vista_carrito_con_diseno(clienteComprador):
+    diseno = clienteComprador.post("/disenos/crear", data={"imagenURL": "https://meraki.co/diseno.png", "precioEstimado": 50000}).json()
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 1, "cantidad": 1})
+    clienteComprador.post("/disenos/agregar", data={"disenoPersonalizadoID": diseno["id"]})
+    try:
+        # La linea del diseno no tiene producto: nombre por defecto, sin stock y activa
+        respuesta = clienteComprador.get("/carrito/vista")
+        assert respuesta.status_code == 200
+        lineas = respuesta.json()["lineas"]
+        assert [(l["productoID"], l["disenoID"], l["nombre"], l["stock"], l["activo"]) for l in lineas] == [
+            (1, None, "Producto 0-0", 5, True), (None, diseno["id"], "Diseño personalizado", None, True)
+        ]
+        assert lineas[1]["imagenURL"] == "https://meraki.co/diseno.png"
+
+        # La edicion en lote devuelve la misma vista
+        assert clienteComprador.patch("/carrito/lote", json=[{"accion": "CANTIDAD", "productoID": 1, "cantidad": 2}]).status_code == 200
+    finally:
+        assert clienteComprador.delete("/carrito/vaciar").status_code == 200
+
+
+def test_editar_carrito_en_lote(clienteComprador, presupuesto):
+    vaciarCarrito(clienteComprador)
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 1, "cantidad": 1})
+    operaciones = [
+        {"accion": "AGREGAR", "productoID": 2, "cantidad": 3},
+        {"accion": "CANTIDAD", "productoID": 1, "cantidad": 3}
+    ]
+    try:
+        # Cliente, lectura, UPDATE, INSERT y la vista final
+        with presupuesto(5):
+            respuesta = clienteComprador.patch("/carrito/lote", json=operaciones)
+        assert respuesta.status_code == 200 and respuesta.headers["X-DB-Queries"] == "5"
+        vista = respuesta.json()
+        assert [(l["productoID"], l["cantidad"], l["subtotal"]) for l in vista["lineas"]] == [(1, 3, 3000), (2, 3, 6000)]
+        assert (vista["cantidadProductos"], vista["total"]) == (6, 9000 + 8900)
+
+        # Un error no aplica ninguna operacion
+        respuesta = clienteComprador.patch("/carrito/lote", json=[{"accion": "ELIMINAR", "productoID": 1}, {"accion": "CANTIDAD", "productoID": 4, "cantidad": 1}])
+        assert respuesta.status_code == 404
+        assert clienteComprador.patch("/carrito/lote", json=[{"accion": "CANTIDAD", "productoID": 2, "cantidad": 6}]).status_code == 400
+        assert clienteComprador.patch("/carrito/lote", json=[{"accion": "AGREGAR", "productoID": 9999}]).status_code == 404
+        assert len(clienteComprador.get("/carrito/vista").json()["lineas"]) == 2
+
+        # Un producto repetido rechaza el lote completo
+        respuesta = clienteComprador.patch("/carrito/lote", json=[{"accion": "AGREGAR", "productoID": 2}, {"accion": "ELIMINAR", "productoID": 2}])
+        assert respuesta.status_code == 422 and "2" in respuesta.json()["detail"]
+        assert [(l["productoID"], l["cantidad"]) for l in clienteComprador.get("/carrito/vista").json()["lineas"]] == [(1, 3), (2, 3)]
+
+        assert clienteComprador.patch("/carrito/lote", json=[]).status_code == 422
+        assert clienteComprador.patch("/carrito/lote", json=[{"accion": "VACIAR", "productoID": 1}]).status_code == 422
+        assert clienteComprador.patch("/carrito/lote", json=[{"accion": "AGREGAR", "productoID": 1, "cantidad": 0}]).status_code == 422
+    finally:
+        vaciarCarrito(clienteComprador)
+    assert clienteComprador.get("/carrito/vista").json()["lineas"] == []
+
+
+def test_principal_resuelve_carrito_y_wishlist(clienteComprador, presupuesto, monkeypatch):
+    clienteComprador.post("/wishlist/agregar-producto", data={"productoID": 2})
+    try:
+        # Cliente con su wishlist en una consulta y los items en otra
+        with presupuesto(2):
+            respuesta = clienteComprador.get("/wishlist/mi-wishlist")
+        assert respuesta.headers["X-DB-Queries"] == "2" and [i["productoID"] for i in respuesta.json()] == [2]
+
+        # Mover al carrito usa los IDs ya resueltos
+        assert clienteComprador.post("/wishlist/mover-al-carrito/2").status_code == 200
+        assert [l["productoID"] for l in clienteComprador.get("/carrito/vista").json()["lineas"]] == [2]
+        assert clienteComprador.delete("/carrito/vaciar").status_code == 200
+        assert clienteComprador.get("/carrito/vista").json()["lineas"] == []
+
+        # Con SESION_IDS los IDs viajan en la cookie firmada
+        monkeypatch.setattr(auth, "idsEnSesion", True)
+        clienteComprador.get("/carrito/mi-carrito")
+        datos = json.loads(base64.b64decode(clienteComprador.cookies["session"].split(".")[0]))
+        assert datos["carritoID"] and datos["wishlistID"]
+        assert clienteComprador.get("/wishlist/mi-wishlist").json() == []
+    finally:
+        vaciarCarrito(clienteComprador)
+    assert TestClient(app).get("/wishlist/mi-wishlist").status_code == 401
+
+
+def test_ids_de_sesion_no_pasan_a_otro_cliente(monkeypatch):
+    monkeypatch.setattr(auth, "idsEnSesion", True)
+    sesionCliente("Beto")
+    navegador = sesionCliente("Ana")
+    navegador.post("/carrito/agregar-producto", data={"productoID": 3, "cantidad": 1})
+    try:
+        assert [d["productoID"] for d in navegador.get("/carrito/mi-carrito").json()] == [3]
+
+        # Beto inicia sesion en el mismo navegador: no ve ni pide con el carrito de Ana
+        navegador.post("/auth/login", data={"email": "beto@meraki.co", "contrasena": "beto123"}, follow_redirects=False)
+        assert navegador.get("/carrito/mi-carrito").json() == []
+        assert navegador.post("/carrito/pedir").status_code == 400
+
+        # IDs guardados por otro cliente en la sesion: se ignoran
+        peticion = SimpleNamespace(session={"clienteID": 2, "idsClienteID": 1, "carritoID": 1, "wishlistID": 1})
+        assert auth.idsDeSesion(peticion) == (2, None)
+    finally:
+        vaciarCarrito(sesionCliente("Ana"))
+
+
+def test_pedido_no_vende_mas_que_el_stock(clienteComprador):
+    rival = sesionCliente("Beto")
+    with Session(engine) as session:
+        session.get(Producto, 11).stock = 1
+        session.commit()
+
+    # Los dos tienen en el carrito la ultima unidad (mas otro producto)
+    for comprador in (clienteComprador, rival):
+        comprador.post("/carrito/agregar-producto", data={"productoID": 11, "cantidad": 1})
+        comprador.post("/carrito/agregar-producto", data={"productoID": 9, "cantidad": 1})
+    try:
+        assert clienteComprador.post("/carrito/pedir").status_code == 200
+        respuesta = rival.post("/carrito/pedir")
+        assert respuesta.status_code == 400 and respuesta.json()["detail"] == "Stock insuficiente para Producto 2-2"
+
+        # El pedido rechazado no descuenta nada ni vacia el carrito
+        with Session(engine) as session:
+            assert (session.get(Producto, 11).stock, session.get(Producto, 9).stock) == (0, 4)
+        assert len(rival.get("/carrito/vista").json()["lineas"]) == 2
+        assert {p["id"]: p["stock"] for p in clienteComprador.get("/productos/").json()}[11] == 0
+    finally:
+        vaciarCarrito(rival)
+        with Session(engine) as session:
+            session.get(Producto, 11).stock = 5
+            session.get(Producto, 9).stock = 5
+            session.commit()
+
+
+
+# Pruebas de arranque en frio
+def test_importacion_sin_clientes_pesados():
+    total, modulos = medirImportacion()
+    assert [modulo for modulo in modulosDiferidos if modulo in modulos] == []
+    assert total <= presupuestoImportacionMs, f"Importar backend.main tomó {total:.0f} ms (presupuesto: {presupuestoImportacionMs:.0f} ms)"
+
+
+# Pruebas de migraciones
+def test_esquema_migrado_igual_a_los_modelos(cliente):
+    from sqlmodel import SQLModel
+    from sqlalchemy import inspect
+    inspector = inspect(engine)
+    for tabla in SQLModel.metadata.sorted_tables:
+        assert {c["name"] for c in inspector.get_columns(tabla.name)} == {c.name for c in tabla.columns}, tabla.name
+        indices = {i["name"] for i in inspector.get_indexes(tabla.name)}
+        assert {i.name for i in tabla.indexes} <= indices, tabla.name
+
+
+
+# Pruebas de calentamiento
+def test_salud_listo_tras_calentamiento(cliente):
+    respuesta = cliente.get("/salud")
+    assert respuesta.status_code == 200
+    assert respuesta.json()["estado"] == "listo" and respuesta.json()["listo"] is True
+    assert respuesta.json()["errores"] == []
+    assert engine.pool.checkedin() >= 1
+
+
+def test_salud_mientras_calienta_y_degradada(cliente, monkeypatch):
+    # Mientras calienta no recibe trafico del balanceador
+    monkeypatch.setitem(calentamiento.estadoCalentamiento, "estado", "calentando")
+    assert cliente.get("/salud").status_code == 503
+
+    # Un paso fallido deja la app degradada: atiende, pero no queda lista
+    async def fallar():
+        raise RuntimeError("sin plantillas")
+
+    monkeypatch.setattr(calentamiento, "compilarPlantillas", fallar)
+    try:
+        asyncio.run(calentamiento.calentar())
+        respuesta = cliente.get("/salud")
+        assert respuesta.status_code == 200
+        assert (respuesta.json()["estado"], respuesta.json()["listo"]) == ("degradado", False)
+        assert respuesta.json()["errores"] == ["plantillas: sin plantillas"]
+    finally:
+        monkeypatch.undo()
+        asyncio.run(calentamiento.calentar())
+    assert cliente.get("/salud").json()["estado"] == "listo"
+
+
+
+# Pruebas de la replica de lectura
+def motorDeLectura():
+    sesiones = db.getReadSession()
+    motor = next(sesiones).bind
+    sesiones.close()
+    return motor
+
+
+def test_replica_caida_usa_la_principal(cliente, monkeypatch):
+    caida = replica.EstadoReplica(create_engine("sqlite:////sin/directorio/replica.db"), None)
+    monkeypatch.setattr(db, "replica", caida)
+
+    # Hasta la primera verificacion se lee de la principal, y despues tambien porque no responde
+    assert motorDeLectura() is engine
+    caida.verificacion.result()
+    assert not caida.sana and caida.error
+    assert motorDeLectura() is engine
+    assert cliente.get("/categorias/1").status_code == 200
+
+
+def test_replica_atrasada_usa_la_principal(cliente, monkeypatch):
+    local = replica.EstadoReplica(create_engine(os.environ["DB_URL"]), create_async_engine(db.urlAsincrona(os.environ["DB_URL"])))
+    monkeypatch.setattr(db, "replica", local)
+    try:
+        # Con mas retraso que el maximo se lee de la principal
+        monkeypatch.setattr(local, "consulta", text(f"SELECT {replica.retrasoMaximo + 1}"))
+        local.disponible()
+        local.verificacion.result()
+        assert not local.sana and local.retraso > replica.retrasoMaximo
+        assert motorDeLectura() is engine
+
+        # Al ponerse al dia (en la siguiente verificacion) vuelve a la replica
+        monkeypatch.setattr(local, "consulta", text("SELECT 0"))
+        local.verificada = 0.0
+        local.disponible()
+        local.verificacion.result()
+        assert local.sana and motorDeLectura() is local.engine
+        assert cliente.get("/categorias/1").status_code == 200
+    finally:
+        local.engine.dispose()
+        asyncio.run(local.asyncEngine.dispose())
+
+
+def test_verificacion_de_replica_fuera_de_la_peticion(monkeypatch):
+    lenta = replica.EstadoReplica(engine, asyncEngine)
+    liberar = threading.Event()
+    monkeypatch.setattr(lenta, "verificar", lambda: liberar.wait(5) and lenta.registrar(retraso=0))
+
+    # Una verificacion lenta no demora a quien pide la sesion, ni se lanza dos veces
+    inicio = time.perf_counter()
+    assert lenta.disponible() is False
+    verificacion = lenta.verificacion
+    assert lenta.disponible() is False and lenta.verificacion is verificacion
+    assert time.perf_counter() - inicio < 0.5
+
+    liberar.set()
+    verificacion.result()
+    assert lenta.disponible() is True
+
+
+
+# Pruebas de Idempotency-Key
+def test_pedido_y_pago_idempotentes(clienteComprador):
+    vaciarCarrito(clienteComprador)
+    clienteComprador.post("/carrito/agregar-producto", data={"productoID": 5, "cantidad": 1})
+    with Session(engine) as session:
+        pedidosAntes = session.exec(select(func.count(Pedido.id))).one()
+
+    # El reintento recibe la misma respuesta sin crear otro pedido
+    primera = clienteComprador.post("/carrito/pedir", data={"aplicarEnvio": "true"}, headers={"Idempotency-Key": "pedido-1"})
+    repetida = clienteComprador.post("/carrito/pedir", data={"aplicarEnvio": "true"}, headers={"Idempotency-Key": "pedido-1"})
+    assert primera.status_code == repetida.status_code == 200
+    assert repetida.json() == primera.json() and repetida.headers["Idempotent-Replayed"] == "true"
+    with Session(engine) as session:
+        assert session.exec(select(func.count(Pedido.id))).one() == pedidosAntes + 1
+        assert session.get(Producto, 5).stock == 4
+
+    # Misma clave con otro cuerpo; sin clave se ejecuta normal (carrito ya vacio)
+    assert clienteComprador.post("/carrito/pedir", data={"aplicarEnvio": "false"}, headers={"Idempotency-Key": "pedido-1"}).status_code == 422
+    assert clienteComprador.post("/carrito/pedir").status_code == 400
+
+    # El pago repetido devuelve el mismo pago en vez de "ya tiene un pago"
+    datosPago = {"pedidoID": primera.json()["id"], "metodo": "TRANSFERENCIA"}
+    pago = clienteComprador.post("/pagos/crear", data=datosPago, headers={"Idempotency-Key": "pago-1"})
+    pagoRepetido = clienteComprador.post("/pagos/crear", data=datosPago, headers={"Idempotency-Key": "pago-1"})
+    assert pago.status_code == pagoRepetido.status_code == 201 and pagoRepetido.json()["id"] == pago.json()["id"]
+    assert clienteComprador.post("/pagos/crear", data=datosPago, headers={"Idempotency-Key": "pago-2"}).status_code == 400
+
+    with Session(engine) as session:
+        session.get(Producto, 5).stock = 5
+        session.commit()
+
+
+def test_idempotencia_repite_los_encabezados(clienteComprador, monkeypatch):
+    # Ruta de prueba con un Location y dos Set-Cookie
+    @app.post("/pruebas/idempotente", status_code=201)
+    def crearRecurso(response: Response):
+        response.headers["Location"] = "/pruebas/recurso/7"
+        response.set_cookie("primera", "1")
+        response.set_cookie("segunda", "2")
+        return {"id": 7}
+
+    monkeypatch.setattr(idempotencia, "rutasIdempotentes", idempotencia.rutasIdempotentes | {("POST", "/pruebas/idempotente")})
+    try:
+        primera = clienteComprador.post("/pruebas/idempotente", headers={"Idempotency-Key": "encabezados-1"})
+        repetida = clienteComprador.post("/pruebas/idempotente", headers={"Idempotency-Key": "encabezados-1"})
+    finally:
+        app.router.routes.pop()
+
+    # Los Set-Cookie repetidos no se pierden, ni en la original ni en el reintento
+    for respuesta in (primera, repetida):
+        assert respuesta.status_code == 201 and respuesta.json() == {"id": 7}
+        assert respuesta.headers["location"] == "/pruebas/recurso/7"
+        assert len([c for c in respuesta.headers.get_list("set-cookie") if c.startswith(("primera=", "segunda="))]) == 2
+    assert repetida.headers["Idempotent-Replayed"] == "true" and repetida.headers["content-type"] == "application/json"
+
+
+def test_duplicado_espera_a_la_peticion_en_curso(clienteComprador, monkeypatch):
+    with Session(engine) as session:
+        clienteID = session.exec(select(Cliente.id).where(Cliente.email == "carla@meraki.co")).one()
+        enCurso = ClaveIdempotencia(clienteID=clienteID, ruta="/carrito/pedir", clave="en-curso", huella=idempotencia.hashlib.sha256(b"").hexdigest())
+        session.add(enCurso)
+        session.commit()
+        session.refresh(enCurso)
+
+    # Sigue en curso mas alla de la espera
+    monkeypatch.setattr(idempotencia, "esperaIdempotencia", 0.2)
+    assert clienteComprador.post("/carrito/pedir", headers={"Idempotency-Key": "en-curso"}).status_code == 409
+
+    # Termina mientras el duplicado espera: recibe su respuesta
+    def terminar():
+        with Session(engine) as session:
+            fila = session.get(ClaveIdempotencia, enCurso.id)
+            fila.codigoEstado, fila.respuesta, fila.tipoContenido = 200, '{"id": 99}', "application/json"
+            session.commit()
+
+    monkeypatch.setattr(idempotencia, "esperaIdempotencia", 5)
+    threading.Timer(0.3, terminar).start()
+    respuesta = clienteComprador.post("/carrito/pedir", headers={"Idempotency-Key": "en-curso"})
+    assert respuesta.status_code == 200 and respuesta.json() == {"id": 99}
+
+
+def test_clave_abandonada_solo_sin_latido(clienteComprador, monkeypatch):
+    vaciarCarrito(clienteComprador)
+    monkeypatch.setattr(idempotencia, "esperaIdempotencia", 0.2)
+    with Session(engine) as session:
+        clienteID = session.exec(select(Cliente.id).where(Cliente.email == "carla@meraki.co")).one()
+        antigua = idempotencia.dt.now() - idempotencia.timedelta(hours=1)
+        huella = idempotencia.hashlib.sha256(b"").hexdigest()
+
+        # Original lenta pero viva (creada hace una hora, con latido reciente) y otra sin latido
+        session.add(ClaveIdempotencia(clienteID=clienteID, ruta="/carrito/pedir", clave="lenta", huella=huella, fechaCreacion=antigua))
+        session.add(ClaveIdempotencia(clienteID=clienteID, ruta="/carrito/pedir", clave="muerta", huella=huella, fechaCreacion=antigua, fechaLatido=antigua))
+        session.commit()
+
+    # La lenta no se ejecuta dos veces; la muerta se reclama y corre el endpoint (carrito vacio)
+    assert clienteComprador.post("/carrito/pedir", headers={"Idempotency-Key": "lenta"}).status_code == 409
+    assert clienteComprador.post("/carrito/pedir", headers={"Idempotency-Key": "muerta"}).status_code == 400
+
+
+def test_reclamar_clave_no_reintenta_otros_errores(clienteComprador, monkeypatch):
+    monkeypatch.setattr(idempotencia, "esperaIdempotencia", 0.3)
+    with Session(engine) as session:
+        clienteID = session.exec(select(Cliente.id).where(Cliente.email == "carla@meraki.co")).one()
+
+    # El INSERT falla sin chocar con otra clave (huella nula): cliente inexistente da 404 de inmediato
+    with pytest.raises(LookupError):
+        asyncio.run(idempotencia.reclamarClave(999999, "/carrito/pedir", "huerfana", None))
+
+    # Con el cliente existente se respeta el limite de espera en vez de girar sin pausa
+    inicio = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(idempotencia.reclamarClave(clienteID, "/carrito/pedir", "invalida", None))
+    assert 0.3 <= time.monotonic() - inicio < 2
\ No newline at end of file
@@ -1,5 +1,4 @@
 from fastapi import UploadFile
-from ..supabase.supabase import uploadarchivoBucket
 
 """
     Utilidad para la gestión de archivos en la nube.
@@ -7,10 +6,14 @@ from ..supabase.supabase import uploadarchivoBucket
     Actúa como una capa de abstracción sobre el cliente de Supabase para facilitar
     la carga de imágenes y otros archivos desde los controladores de la aplicación,
     simplificando la interfaz de subida.
+    El cliente de Supabase se importa en la primera subida para no cargarlo al iniciar la app.
 """
 
 # Funcion para cargar archivos al bucket de Supabase
 async def cargarArchivo(archivo: UploadFile):
+    # Importar el cliente solo cuando se necesita (es costoso de cargar)
+    from ..supabase.supabase import uploadarchivoBucket
+
     # Subir a Supabase y retornar la URL pública
     url = await uploadarchivoBucket(archivo)
     return url
\ No newline at end of file
@@ -0,0 +1,71 @@
+from datetime import datetime as dt, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+"""
+    Utilidades de caché HTTP (GET condicional).
+
+    Responden 304 cuando el cliente ya tiene la versión actual de un recurso, comparando
+    If-None-Match con el ETag o, si no llega, If-Modified-Since con Last-Modified, y
+    agregan los encabezados ETag, Last-Modified y Cache-Control a cada respuesta.
+
+    Last-Modified sale de la fecha de modificación en la DB (la misma en todos los workers).
+    Como tiene resolución de segundos, solo se envía cuando esa fecha tiene al menos un segundo:
+    así un cambio posterior siempre cae en un segundo más nuevo y no se confunde con la copia del cliente.
+"""
+
+# Politicas de Cache-Control de los endpoints del catalogo
+cacheCatalogo = "public, max-age=60, stale-while-revalidate=300"
+cacheProducto = "public, no-cache"
+cacheCategorias = "public, max-age=300, stale-while-revalidate=3600"
+cacheRelacionados = "public, max-age=300"
+cacheInicio = "public, max-age=60, stale-while-revalidate=300"
+
+
+
+# Funcion para obtener la fecha de modificacion del recurso en UTC, si ya puede enviarse
+def fechaModificacion(recurso) -> dt | None:
+    if recurso.modificado is None:
+        return None
+
+    # Las fechas de la DB se guardan en hora local sin zona
+    modificado = recurso.modificado.astimezone(timezone.utc)
+    if dt.now(timezone.utc) - modificado < timedelta(seconds=1):
+        return None
+    return modificado.replace(microsecond=0)
+
+
+
+# Funcion para saber si la copia del cliente sigue vigente
+def copiaVigente(request: Request, recurso) -> bool:
+    etags = request.headers.get("if-none-match")
+    if etags is not None:
+        candidatos = [etag.strip().removeprefix("W/") for etag in etags.split(",")]
+        return "*" in candidatos or recurso.etag in candidatos
+
+    fecha = request.headers.get("if-modified-since")
+    modificado = fechaModificacion(recurso)
+    if fecha is not None and modificado is not None:
+        try:
+            return modificado <= parsedate_to_datetime(fecha)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+
+# Funcion para responder un recurso serializado (304 si el cliente ya lo tiene)
+def respuestaCondicional(request: Request, recurso, cacheControl: str) -> Response:
+    encabezados = {
+        "ETag": recurso.etag,
+        "Cache-Control": cacheControl
+    }
+    modificado = fechaModificacion(recurso)
+    if modificado:
+        encabezados["Last-Modified"] = format_datetime(modificado, usegmt=True)
+
+    if copiaVigente(request, recurso):
+        return Response(status_code=304, headers=encabezados)
+
+    return Response(content=recurso.contenido, media_type="application/json", headers=encabezados)
\ No newline at end of file
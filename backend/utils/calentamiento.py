@@ -0,0 +1,108 @@
+import time
+import asyncio
+import logging
+from contextlib import ExitStack, AsyncExitStack
+from ..db.db import engine, asyncEngine, replica, poolConfig
+
+"""
+    Calentamiento de la aplicación al iniciar.
+
+    Corre en segundo plano apenas arranca la app: abre las conexiones del pool (principal y
+    réplica), compila las plantillas más visitadas, construye los snapshots del catálogo, de
+    las categorías y de la página de inicio y el índice de productos comprados juntos.
+    El endpoint de salud responde 503 mientras calienta; al terminar queda "listo", o
+    "degradado" si algún paso falló (la app atiende igual y esos datos se construyen en su
+    primer uso).
+"""
+
+# Plantillas que se compilan al iniciar
+plantillasPrincipales = ("principal.html", "producto/detalleProducto.html", "admin/dashboardAdmin.html")
+
+# Estado del calentamiento (consultado por el endpoint de salud): calentando, listo o degradado
+estadoCalentamiento = {
+    "estado": "calentando",
+    "listo": False,
+    "duracionMs": None,
+    "pasos": {},
+    "errores": []
+}
+
+
+
+# Funcion para abrir a la vez las conexiones de un motor sincrono
+def abrirConexiones(motor, cantidad: int):
+    with ExitStack() as pila:
+        for _ in range(cantidad):
+            pila.enter_context(motor.connect())
+
+
+
+# Funcion para abrir a la vez las conexiones de un motor asincrono
+async def abrirConexionesAsync(motor, cantidad: int):
+    async with AsyncExitStack() as pila:
+        await asyncio.gather(*(pila.enter_async_context(motor.connect()) for _ in range(cantidad)))
+
+
+
+# Funcion para abrir las conexiones configuradas del pool en todos los motores
+async def abrirPools():
+    motores = [(engine, asyncEngine)]
+    if replica:
+        motores.append((replica.engine, replica.asyncEngine))
+
+    # Las conexiones sincronas se abren en un hilo para no bloquear las peticiones en curso
+    for motor, motorAsync in motores:
+        await asyncio.to_thread(abrirConexiones, motor, poolConfig["pool_size"])
+        await abrirConexionesAsync(motorAsync, poolConfig["pool_size"])
+
+
+
+# Funcion para compilar las plantillas principales (quedan en la cache de Jinja2)
+async def compilarPlantillas():
+    from .plantillas import templates
+    for plantilla in plantillasPrincipales:
+        templates.env.get_template(plantilla)
+
+
+
+# Funcion para construir los snapshots del catalogo, de las categorias y de la pagina de inicio
+async def consultarCatalogo():
+    from .catalogo import snapshots
+    for snapshot in snapshots:
+        await snapshot.obtener()
+
+
+
+# Funcion para construir el indice de productos comprados juntos
+async def construirRelacionados():
+    from .relacionados import indiceRelacionados
+    if await indiceRelacionados.obtener(esperarConstruccion=True) is None:
+        raise RuntimeError("no se pudo construir el índice")
+
+
+
+# Funcion para calentar la app (un paso fallido se registra y deja la app degradada, no la detiene)
+async def calentar():
+    inicio = time.perf_counter()
+    estadoCalentamiento.update(estado="calentando", listo=False, duracionMs=None, pasos={}, errores=[])
+    pasos = {
+        "conexiones": abrirPools,
+        "plantillas": compilarPlantillas,
+        "catalogo": consultarCatalogo,
+        "relacionados": construirRelacionados
+    }
+
+    for nombre, paso in pasos.items():
+        inicioPaso = time.perf_counter()
+        try:
+            await paso()
+        except Exception as e:
+            logging.warning(f"Calentamiento: falló el paso '{nombre}': {e}")
+            estadoCalentamiento["errores"].append(f"{nombre}: {e}")
+        estadoCalentamiento["pasos"][nombre] = round((time.perf_counter() - inicioPaso) * 1000, 1)
+
+    # Solo queda lista si todos los pasos terminaron bien
+    listo = not estadoCalentamiento["errores"]
+    estadoCalentamiento["duracionMs"] = round((time.perf_counter() - inicio) * 1000, 1)
+    estadoCalentamiento.update(estado="listo" if listo else "degradado", listo=listo)
+    logging.info(f"Calentamiento terminado en {estadoCalentamiento['duracionMs']}ms {estadoCalentamiento['pasos']}")
\ No newline at end of file
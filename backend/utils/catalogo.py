@@ -0,0 +1,298 @@
+import os
+import time
+import asyncio
+import contextvars
+import hashlib
+import logging
+import threading
+from datetime import datetime as dt
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect, func
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..db.db import asyncEngine
+from ..models.producto import Producto
+from ..models.categoria import Categoria, CategoriaRead
+from ..models.inicio import Inicio
+from ..models.pedido import Pedido
+from .enums import EstadoPedido
+from ..services.categorias import consultarCategorias
+
+"""
+    Snapshots del catálogo público.
+
+    Guardan los bytes JSON ya serializados de las respuestas más leídas (la lista de productos
+    activos, cada producto, la lista de categorías y la página de inicio), junto con su ETag (hash del
+    contenido) y, para el catálogo, la fecha de su última modificación en la DB. Los endpoints los
+    entregan sin consultar la DB ni validar modelos, y responden 304 si el cliente ya tiene esa versión.
+
+    Cualquier commit que cree, modifique o elimine instancias de los modelos de un snapshot
+    (desde el CRUD del administrador o el stock que descuenta un pedido) sube su versión y
+    programa la reconstrucción en el event loop, fuera de las peticiones. Cada snapshot indica
+    qué cambios de cada modelo le afectan, y el de productos solo vuelve a leer los productos
+    cambiados: el resto de la lista se vuelve a serializar desde memoria sin consultar la DB.
+    La página de inicio solo se reconstruye por los pedidos que pasan a PAGADO o dejan de
+    estarlo; el resto de los pedidos no mueve sus ventas.
+
+    Cada proceso tiene sus snapshots; los cambios hechos por otros workers se recogen
+    cuando el snapshot supera CATALOGO_TTL segundos (se entrega el anterior mientras tanto).
+    El ETag depende solo del contenido y la fecha sale de las columnas fechaActualizacion (no del
+    momento de la reconstrucción), así que todos los workers envían los mismos validadores. La página
+    de inicio no tiene fecha: sus ventas cuentan una ventana de días que avanza sin cambios en la DB.
+"""
+
+# Segundos que un snapshot se sirve sin revisar cambios de otros procesos
+ttlCatalogo = float(os.getenv("CATALOGO_TTL", 30))
+
+
+
+# Contenido serializado de una respuesta con su ETag y su fecha de modificacion (None si no tiene)
+class Recurso:
+    def __init__(self, contenido: bytes, modificado: dt | None = None):
+        self.contenido = contenido
+        self.etag = f'"{hashlib.blake2b(contenido, digest_size=16).hexdigest()}"'
+        self.modificado = modificado
+
+
+
+# Snapshot en memoria de una respuesta del catalogo
+class Snapshot:
+    # modelos: {modelo: filtro(objeto, campos) o None si le afecta cualquier cambio}
+    # consultarItems: con porID, consulta solo las filas cambiadas del primer modelo para no reconstruir todo
+    # consultarModificado: fecha de la ultima modificacion del contenido en la DB (Last-Modified)
+    def __init__(self, nombre: str, modelos: dict, consultar, adaptador: TypeAdapter, porID: bool = False, consultarItems=None, consultarModificado=None):
+        self.nombre = nombre
+        self.modelos = modelos
+        self.consultar = consultar
+        self.adaptador = adaptador
+        self.porID = porID
+        self.consultarItems = consultarItems
+        self.consultarModificado = consultarModificado
+        self.modeloItems = next(iter(modelos))
+        self.lock = threading.Lock()
+        self.version = 0
+        self.recurso: Recurso | None = None
+        self.items: dict[int, Recurso] = {}
+        self.filas: dict[int, object] = {}
+        self.completa = True
+        self.pendientes: set[int] = set()
+        self.versionContenido = -1
+        self.construido = 0.0
+        self.tarea: asyncio.Task | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+    # Saber si un cambio de un modelo afecta al snapshot (campos=None: fila creada o eliminada)
+    def afectado(self, modelo, objeto, campos: set[str] | None) -> bool:
+        if modelo not in self.modelos:
+            return False
+        filtro = self.modelos[modelo]
+        return filtro is None or filtro(objeto, campos)
+
+    # Marcar el snapshot como modificado, solo en las filas indicadas o completo (seguro desde cualquier hilo)
+    def invalidar(self, ids: set[int] | None = None):
+        with self.lock:
+            self.version += 1
+            if ids is None or not self.consultarItems:
+                self.completa = True
+            else:
+                self.pendientes |= ids
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.programar)
+
+    # Programar una reconstruccion (una sola a la vez, en un contexto vacio para no contar sus consultas en la peticion)
+    def programar(self) -> asyncio.Task:
+        if self.tarea is None or self.tarea.done() or self.tarea.get_loop() is not asyncio.get_running_loop():
+            self.tarea = asyncio.get_running_loop().create_task(self.reconstruir(), context=contextvars.Context())
+        return self.tarea
+
+    # Consultar la DB principal y serializar la respuesta (completa, o solo las filas pendientes)
+    async def reconstruir(self):
+        while self.versionContenido != self.version or self.vencido():
+            with self.lock:
+                version = self.version
+                completa = self.completa or self.recurso is None or self.vencido()
+                ids = set(self.pendientes)
+
+            inicio = time.perf_counter()
+            try:
+                async with AsyncSession(asyncEngine, expire_on_commit=False) as session:
+                    # La fecha se lee antes que las filas: nunca queda adelantada respecto del contenido
+                    modificado = await self.consultarModificado(session) if self.consultarModificado else None
+                    filas = await (self.consultar(session) if completa else self.consultarItems(session, ids))
+            except BaseException:
+                # Si falla, la siguiente reconstruccion es completa
+                with self.lock:
+                    self.completa = True
+                raise
+
+            if not self.porID:
+                self.recurso = Recurso(self.adaptador.dump_json(filas), modificado)
+            else:
+                # Reemplazar las filas cambiadas (las que ya no llegan salieron del snapshot)
+                if completa:
+                    ids, self.filas = set(self.filas), {}
+                cambiadas = {fila.id: fila for fila in filas}
+                for itemID in ids | set(cambiadas):
+                    if itemID in cambiadas:
+                        self.filas[itemID] = cambiadas[itemID]
+                        self.items[itemID] = Recurso(cambiadas[itemID].__pydantic_serializer__.to_json(cambiadas[itemID]), cambiadas[itemID].fechaActualizacion)
+                    else:
+                        self.items.pop(itemID, None)
+                        self.filas.pop(itemID, None)
+                self.recurso = Recurso(self.adaptador.dump_json([self.filas[i] for i in sorted(self.filas)]), modificado)
+
+            # Los cambios pendientes se descartan solo si no llegaron otros mientras tanto (si la tarea
+            # se abandona a medias, por ejemplo al cerrarse su event loop, la siguiente los vuelve a leer)
+            with self.lock:
+                if self.version == version:
+                    self.completa, self.pendientes = False, set()
+
+            self.versionContenido = version
+            if completa:
+                self.construido = time.monotonic()
+            logging.info(f"Snapshot {self.nombre} v{version}: {len(filas) if isinstance(filas, list) else 1} filas{'' if completa else ' cambiadas'} en {(time.perf_counter() - inicio) * 1000:.1f}ms")
+
+    # Saber si el snapshot supero su tiempo de vida
+    def vencido(self) -> bool:
+        return time.monotonic() - self.construido >= ttlCatalogo
+
+    # Asegurar que el snapshot este al dia con los cambios de este proceso
+    async def actualizar(self):
+        self.loop = asyncio.get_running_loop()
+
+        # Primera peticion o cambio propio: esperar la reconstruccion en curso
+        if self.recurso is None or self.versionContenido != self.version:
+            await asyncio.shield(self.programar())
+
+        # Solo vencio el tiempo de vida: se entrega el anterior y se refresca en segundo plano
+        elif self.vencido():
+            self.programar()
+
+    # Obtener la respuesta completa
+    async def obtener(self) -> Recurso:
+        await self.actualizar()
+        return self.recurso
+
+    # Obtener la respuesta de una fila por su ID (None si no esta en el snapshot)
+    async def obtenerItem(self, itemID: int) -> Recurso | None:
+        await self.actualizar()
+        return self.items.get(itemID)
+
+
+
+# Consulta del snapshot de productos
+async def consultarProductos(session) -> list[Producto]:
+    return (await session.exec(select(Producto).where(Producto.activo == True).order_by(Producto.id))).all()
+
+
+
+# Consulta de los productos cambiados del snapshot (los inactivos no llegan y salen de la lista)
+async def consultarProductosCambiados(session, ids: set[int]) -> list[Producto]:
+    return (await session.exec(select(Producto).where(Producto.activo == True, Producto.id.in_(ids)))).all()
+
+
+
+# Consulta del snapshot de categorias (la misma logica del endpoint)
+async def consultarCategoriasActivas(session) -> list[CategoriaRead]:
+    return await consultarCategorias(session, soloActivas=True)
+
+
+
+# Consulta del snapshot de la pagina de inicio
+async def consultarInicio(session) -> Inicio:
+    from ..services.inicio import consultarInicio
+    return await consultarInicio(session)
+
+
+
+# Funcion para crear la consulta de la ultima modificacion de unos modelos (una sola consulta)
+def consultaModificado(*modelos):
+    async def consultar(session) -> dt | None:
+        conexion = await session.connection()
+        fechas = (await conexion.execute(select(*(select(func.max(m.fechaActualizacion)).scalar_subquery() for m in modelos)))).one()
+        return max((fecha for fecha in fechas if fecha), default=None)
+    return consultar
+
+
+
+# Filtro de las categorias: solo cuentan los productos activos de cada una
+def cambioConteoCategorias(producto, campos: set[str] | None) -> bool:
+    return campos is None or bool(campos & {"activo", "categoriaID"})
+
+
+
+# Filtro de la pagina de inicio para pedidos: las ventas solo cuentan los pedidos pagados
+def cambioPedidoPagado(pedido, campos: set[str] | None) -> bool:
+    # Pedido creado o eliminado: solo si esta (o estaba) pagado
+    if campos is None:
+        return inspect(pedido).was_deleted or pedido.estado == EstadoPedido.PAGADO
+
+    # Cambio de estado desde o hacia PAGADO (los demas cambios de un pedido no mueven las ventas)
+    if "estado" in campos:
+        historia = inspect(pedido).attrs.estado.history
+        return EstadoPedido.PAGADO in (*historia.added, *historia.deleted)
+    return "fecha" in campos and pedido.estado == EstadoPedido.PAGADO
+
+
+
+# Snapshots compartidos por la app
+snapshotCatalogo = Snapshot(
+    "productos", {Producto: None}, consultarProductos, TypeAdapter(list[Producto]),
+    porID=True, consultarItems=consultarProductosCambiados, consultarModificado=consultaModificado(Producto)
+)
+snapshotCategorias = Snapshot(
+    "categorias", {Categoria: None, Producto: cambioConteoCategorias}, consultarCategoriasActivas, TypeAdapter(list[CategoriaRead]),
+    consultarModificado=consultaModificado(Categoria, Producto)
+)
+snapshotInicio = Snapshot("inicio", {Categoria: None, Producto: None, Pedido: cambioPedidoPagado}, consultarInicio, TypeAdapter(Inicio))
+snapshots = (snapshotCatalogo, snapshotCategorias, snapshotInicio)
+
+
+
+# Funcion para invalidar los snapshots afectados por un cambio de productos que no pasa por la sesion (UPDATE directo)
+def invalidarProductos(ids: set[int], campos: set[str] | None = None):
+    for snapshot in snapshots:
+        if snapshot.afectado(Producto, None, campos):
+            snapshot.invalidar(set(ids))
+
+
+
+# Funcion para obtener los campos con cambios de un objeto modificado
+def camposModificados(objeto) -> set[str]:
+    return {atributo.key for atributo in inspect(objeto).attrs if atributo.history.has_changes()}
+
+
+
+# Eventos de la sesion: detectar los snapshots afectados (y las filas cambiadas) y reconstruir tras el commit
+@event.listens_for(Session, "after_flush")
+def marcarCambiosCatalogo(session, contexto):
+    afectados = session.info.setdefault("snapshotsModificados", {})
+
+    # Los objetos que solo cambiaron una coleccion (como las variantes de un producto) no cuentan
+    cambios = [(objeto, None) for objeto in (*session.new, *session.deleted)]
+    cambios += [(objeto, camposModificados(objeto)) for objeto in session.dirty if session.is_modified(objeto, include_collections=False)]
+
+    for objeto, campos in cambios:
+        for snapshot in snapshots:
+            if not snapshot.afectado(type(objeto), objeto, campos):
+                continue
+            # Con porID se reconstruyen solo las filas cambiadas de su modelo (None: completo)
+            if snapshot.consultarItems and type(objeto) is snapshot.modeloItems and afectados.get(snapshot, set()) is not None:
+                afectados.setdefault(snapshot, set()).add(objeto.id)
+            else:
+                afectados[snapshot] = None
+
+
+
+@event.listens_for(Session, "after_commit")
+def invalidarCatalogo(session):
+    afectados = session.info.pop("snapshotsModificados", None)
+    for snapshot, ids in (afectados or {}).items():
+        snapshot.invalidar(ids)
+
+
+
+@event.listens_for(Session, "after_rollback")
+def descartarCambiosCatalogo(session):
+    session.info.pop("snapshotsModificados", None)
\ No newline at end of file
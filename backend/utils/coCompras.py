@@ -0,0 +1,91 @@
+import numpy as np
+
+"""
+    Cálculo vectorizado del índice de productos comprados juntos.
+
+    Cada par de productos se codifica en un entero de 64 bits (productoA << 32 | productoB), así
+    la matriz de co-compras es dispersa y se guarda como dos arreglos ordenados: las claves de
+    los pares y sus conteos. De ella se extraen los K vecinos más frecuentes de cada producto en
+    una matriz densa (productos x K), que es lo que se consulta al servir las recomendaciones.
+"""
+
+# Mascara de los 32 bits bajos (productoB) de una clave de par
+mascaraProducto = np.int64(0xFFFFFFFF)
+
+
+
+# Funcion para codificar pares de productos en claves de 64 bits
+def clavesPares(productosA: np.ndarray, productosB: np.ndarray) -> np.ndarray:
+    return (productosA.astype(np.int64) << 32) | productosB.astype(np.int64)
+
+
+
+# Funcion para contar los pares de productos comprados en un mismo pedido
+def contarPares(pedidos: np.ndarray, productos: np.ndarray, maximoLineas: int) -> tuple[np.ndarray, np.ndarray]:
+    # Una linea por pedido y producto, ordenadas por pedido (los pedidos quedan contiguos)
+    lineas = np.unique(clavesPares(pedidos, productos))
+    pedidos, productos = lineas >> 32, lineas & mascaraProducto
+
+    # Inicio y tamano de cada pedido; los de una linea no forman pares y los enormes se ignoran
+    inicios = np.flatnonzero(np.r_[True, pedidos[1:] != pedidos[:-1]])
+    tamanos = np.diff(np.r_[inicios, len(lineas)])
+    validos = (tamanos > 1) & (tamanos <= maximoLineas)
+    inicios, tamanos = inicios[validos], tamanos[validos]
+    if len(inicios) == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int32)
+
+    # Cada linea de un pedido se combina con todas las lineas de su pedido
+    desplazamientos = lambda grupos: np.arange(grupos.sum()) - np.repeat(np.cumsum(grupos) - grupos, grupos)
+    inicioLinea = np.repeat(inicios, tamanos)
+    tamanoLinea = np.repeat(tamanos, tamanos)
+    linea = inicioLinea + desplazamientos(tamanos)
+    izquierda = np.repeat(linea, tamanoLinea)
+    derecha = np.repeat(inicioLinea, tamanoLinea) + desplazamientos(tamanoLinea)
+    distintas = izquierda != derecha
+
+    claves, conteos = np.unique(clavesPares(productos[izquierda[distintas]], productos[derecha[distintas]]), return_counts=True)
+    return claves, conteos.astype(np.int32)
+
+
+
+# Funcion para sumar conteos nuevos a la matriz de co-compras (ambas con claves unicas y ordenadas)
+def sumarPares(claves: np.ndarray, conteos: np.ndarray, nuevasClaves: np.ndarray, nuevosConteos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    posiciones = np.searchsorted(claves, nuevasClaves)
+    existentes = posiciones < len(claves)
+    existentes[existentes] = claves[posiciones[existentes]] == nuevasClaves[existentes]
+
+    conteos = conteos.copy()
+    conteos[posiciones[existentes]] += nuevosConteos[existentes]
+    nuevos = ~existentes
+    return np.insert(claves, posiciones[nuevos], nuevasClaves[nuevos]), np.insert(conteos, posiciones[nuevos], nuevosConteos[nuevos])
+
+
+
+# Funcion para obtener las filas de la matriz de unos productos (ordenados)
+def filasDe(claves: np.ndarray, productos: np.ndarray) -> np.ndarray:
+    inicios = np.searchsorted(claves, productos.astype(np.int64) << 32)
+    finales = np.searchsorted(claves, (productos.astype(np.int64) + 1) << 32)
+    return np.concatenate([np.arange(inicio, final) for inicio, final in zip(inicios, finales)] or [np.empty(0, np.int64)])
+
+
+
+# Funcion para extraer los K vecinos mas frecuentes de cada producto: (productos, vecinos, conteos)
+def vecinosFrecuentes(claves: np.ndarray, conteos: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    productosA, productosB = claves >> 32, claves & mascaraProducto
+
+    # Orden por producto, luego por conteo descendente y por ID para desempatar
+    orden = np.lexsort((productosB, -conteos, productosA))
+    productosA, productosB, conteos = productosA[orden], productosB[orden], conteos[orden]
+
+    inicios = np.flatnonzero(np.r_[True, productosA[1:] != productosA[:-1]]) if len(orden) else np.empty(0, np.int64)
+    tamanos = np.diff(np.r_[inicios, len(orden)])
+    posicion = np.arange(len(orden)) - np.repeat(inicios, tamanos)
+    fila = np.repeat(np.arange(len(inicios)), tamanos)
+    primeros = posicion < k
+
+    # Matriz densa productos x K (0 = sin vecino)
+    vecinos = np.zeros((len(inicios), k), np.int32)
+    frecuencias = np.zeros((len(inicios), k), np.int32)
+    vecinos[fila[primeros], posicion[primeros]] = productosB[primeros]
+    frecuencias[fila[primeros], posicion[primeros]] = conteos[primeros]
+    return productosA[inicios], vecinos, frecuencias
\ No newline at end of file
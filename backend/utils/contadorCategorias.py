@@ -0,0 +1,90 @@
+from collections import Counter
+from sqlalchemy import event, update, bindparam, inspect
+from sqlalchemy.orm import Session
+from sqlmodel import select, func
+from ..models.producto import Producto
+from ..models.categoria import Categoria
+
+"""
+    Contador desnormalizado de productos activos por categoría (Categoria.productosActivos).
+
+    Los cambios hechos con el ORM (crear, mover de categoría, activar, desactivar o eliminar
+    un producto) se suman al contador en el mismo flush con un UPDATE por lote. Las escrituras
+    que no pasan por el ORM (importación masiva y actualización en lote) actualizan el contador
+    con sumarContadores o recalcularContadores en su misma transacción.
+"""
+
+# UPDATE que suma una diferencia al contador de una categoria (se ejecuta con varias filas)
+sumarContadores = (
+    update(Categoria)
+    .where(Categoria.id == bindparam("categoria"))
+    .values(productosActivos=Categoria.productosActivos + bindparam("diferencia"))
+)
+
+
+
+# Funcion para armar las filas de sumarContadores a partir de las diferencias por categoria
+def filasContadores(diferencias: Counter) -> list[dict]:
+    return [{"categoria": categoria, "diferencia": diferencia} for categoria, diferencia in diferencias.items() if categoria is not None and diferencia]
+
+
+
+# Funcion para armar el UPDATE que recuenta el contador desde la tabla de productos (todas si no se indican)
+def recalcularContadores(categorias: set[int] | None = None):
+    conteo = select(func.count(Producto.id)).where(Producto.categoriaID == Categoria.id, Producto.activo == True).scalar_subquery()
+    sentencia = update(Categoria).values(productosActivos=conteo)
+    if categorias is not None:
+        sentencia = sentencia.where(Categoria.id.in_(categorias))
+    return sentencia
+
+
+
+# Funcion para obtener el valor de un atributo antes del flush (None si cambio sin cargar el anterior)
+def valorPrevio(objeto, atributo: str):
+    historial = inspect(objeto).attrs[atributo].history
+    if not historial.has_changes():
+        return getattr(objeto, atributo)
+    return historial.deleted[0] if historial.deleted else None
+
+
+
+# Eventos de la sesion: sumar los cambios de productos activos al contador de su categoria
+@event.listens_for(Session, "after_flush")
+def actualizarContadores(session, contexto):
+    diferencias, recontarTodas = Counter(), False
+
+    # Productos nuevos y eliminados
+    for producto in session.new:
+        if isinstance(producto, Producto) and producto.activo:
+            diferencias[producto.categoriaID] += 1
+    for producto in session.deleted:
+        if isinstance(producto, Producto) and valorPrevio(producto, "activo"):
+            diferencias[valorPrevio(producto, "categoriaID")] -= 1
+
+    # Productos activados, desactivados o movidos de categoria
+    for producto in session.dirty:
+        if not isinstance(producto, Producto) or not any(
+            inspect(producto).attrs[atributo].history.has_changes() for atributo in ("activo", "categoriaID")
+        ):
+            continue
+
+        activo, categoria = valorPrevio(producto, "activo"), valorPrevio(producto, "categoriaID")
+        if activo is None or categoria is None:
+            # Sin el valor anterior (objeto expirado) no se sabe de que categoria salio
+            recontarTodas = True
+            continue
+        diferencias[categoria] -= int(activo)
+        diferencias[producto.categoriaID] += int(producto.activo)
+
+    # Las categorias son pocas: recontarlas todas es un UPDATE sobre el indice (categoriaID, activo)
+    filas = filasContadores(diferencias)
+    if recontarTodas:
+        session.connection().execute(recalcularContadores())
+    elif filas:
+        session.connection().execute(sumarContadores, filas)
+
+    # Las categorias cargadas en la sesion leen el contador de nuevo
+    afectadas = {fila["categoria"] for fila in filas}
+    for objeto in list(session.identity_map.values()):
+        if isinstance(objeto, Categoria) and (recontarTodas or objeto.id in afectadas):
+            session.expire(objeto, ["productosActivos"])
\ No newline at end of file
@@ -15,6 +15,14 @@ class EstadoCarrito(Enum):
 
 
 
+# Acciones de una edicion del carrito en lote
+class AccionCarrito(Enum):
+    AGREGAR = "AGREGAR" # Suma unidades (crea la linea si no existe)
+    CANTIDAD = "CANTIDAD" # Fija la cantidad de una linea existente
+    ELIMINAR = "ELIMINAR"
+
+
+
 # Estado de los pedidos
 class EstadoPedido(Enum):
     POR_PAGAR = "POR PAGAR"
@@ -45,4 +53,11 @@ class TipoTransaccion(Enum):
 class EstadoDiseno(Enum):
     ENVIADO = "ENVIADO"
     EN_PRODUCCION = "EN PRODUCCION"
-    TERMINADO = "TERMINADO"
\ No newline at end of file
+    TERMINADO = "TERMINADO"
+
+
+
+# Tipo de variante de un producto
+class TipoVariante(Enum):
+    COLOR = "COLOR"
+    TAMANO = "TAMAÑO"
\ No newline at end of file
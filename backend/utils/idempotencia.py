@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from datetime import datetime as dt, timedelta
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select, insert, update, delete, and_, func, exc
+from ..db.db import asyncEngine
+from ..models.cliente import Cliente
+from ..models.claveIdempotencia import ClaveIdempotencia
+
+"""
+    Soporte de Idempotency-Key para crear pedidos y pagos.
+
+    Cuando una petición a una ruta de rutasIdempotentes trae el encabezado Idempotency-Key,
+    se reclama la clave (cliente, ruta, clave) con un INSERT en claveidempotencia antes de
+    ejecutar el endpoint y al terminar se guarda su respuesta. Un reintento con la misma clave
+    recibe la respuesta guardada, con sus encabezados (Location, Set-Cookie...) y con
+    Idempotent-Replayed: true, sin volver a ejecutar nada, y
+    un duplicado que llega mientras la original sigue en curso espera a que termine.
+
+        - Misma clave con otro cuerpo: 422
+        - Errores 5xx o excepciones: la clave se libera para poder reintentar
+        - Original sin latido por más de 3 × IDEMPOTENCIA_LATIDO segundos (su proceso murió): se da por abandonada
+        - Cliente de la sesión que ya no existe: 404
+
+    Las claves vencen tras IDEMPOTENCIA_TTL segundos y se borran de a lotes al reclamar otras.
+"""
+
+# Rutas que aceptan Idempotency-Key
+rutasIdempotentes = {("POST", "/carrito/pedir"), ("POST", "/pagos/crear")}
+
+# Segundos que se guarda la respuesta de una clave
+ttlIdempotencia = float(os.getenv("IDEMPOTENCIA_TTL", 86400))
+
+# Segundos que un duplicado espera a la peticion original
+esperaIdempotencia = float(os.getenv("IDEMPOTENCIA_ESPERA", 30))
+
+# Segundos entre consultas mientras se espera a la original
+intervaloEspera = 0.05
+
+# Segundos entre latidos de la peticion original mientras esta en curso
+intervaloLatido = float(os.getenv("IDEMPOTENCIA_LATIDO", 5))
+
+# Segundos sin latido tras los que la original se da por abandonada
+vencimientoLatido = 3 * intervaloLatido
+
+# Segundos entre limpiezas de las claves vencidas
+intervaloLimpieza = 600
+
+# Largo maximo de la clave
+largoMaximoClave = 255
+
+# Encabezados de la respuesta que no se guardan (los vuelve a poner la respuesta repetida)
+encabezadosNoGuardados = {"content-length", "content-type", "date", "server"}
+
+# Momento de la ultima limpieza (monotonic)
+ultimaLimpieza = 0.0
+
+
+
+# Funcion para calcular la huella del cuerpo de la peticion
+async def huellaPeticion(request: Request) -> str:
+    cuerpo = await request.body()
+
+    # El separador multipart cambia en cada envio del navegador: no cuenta en la huella
+    tipo = request.headers.get("content-type", "")
+    if "boundary=" in tipo:
+        separador = tipo.split("boundary=", 1)[1].split(";")[0].strip('"')
+        cuerpo = cuerpo.replace(separador.encode(), b"")
+    return hashlib.sha256(cuerpo).hexdigest()
+
+
+
+# Funcion para reclamar una clave: None si queda reclamada, o la fila ya terminada con la misma clave
+async def reclamarClave(clienteID: int, ruta: str, clave: str, huella: str) -> ClaveIdempotencia | None:
+    tabla = ClaveIdempotencia.__table__
+    limite = time.monotonic() + esperaIdempotencia
+    while True:
+        ahora = dt.now()
+        try:
+            async with asyncEngine.begin() as conexion:
+                await conexion.execute(insert(tabla).values(
+                    clienteID=clienteID, ruta=ruta, clave=clave, huella=huella, fechaCreacion=ahora, fechaLatido=ahora
+                ))
+            return None
+        except exc.IntegrityError:
+            pass
+
+        async with asyncEngine.begin() as conexion:
+            fila = (await conexion.execute(
+                select(tabla).where(tabla.c.clienteID == clienteID, tabla.c.ruta == ruta, tabla.c.clave == clave)
+            )).first()
+
+            # Sin fila: la original libero la clave, o el INSERT fallo por otra causa (cliente borrado)
+            if fila is None:
+                if (await conexion.execute(select(Cliente.id).where(Cliente.id == clienteID))).first() is None:
+                    raise LookupError(clienteID)
+            elif fila.codigoEstado is not None:
+                return ClaveIdempotencia.model_validate(fila._mapping)
+
+            # La original dejo de dar latidos (el proceso murio): se da por abandonada
+            elif (fila.fechaLatido or fila.fechaCreacion) < (corte := dt.now() - timedelta(seconds=vencimientoLatido)):
+                await conexion.execute(delete(tabla).where(
+                    tabla.c.id == fila.id, tabla.c.codigoEstado.is_(None),
+                    func.coalesce(tabla.c.fechaLatido, tabla.c.fechaCreacion) < corte
+                ))
+
+        # Reintentar tras una pausa y hasta el limite de espera, sea cual sea el caso
+        if time.monotonic() >= limite:
+            raise TimeoutError(clave)
+        await asyncio.sleep(intervaloEspera)
+
+
+
+# Funcion para renovar el latido de una clave mientras la peticion original sigue en curso
+async def latir(filaClave):
+    tabla = ClaveIdempotencia.__table__
+    while True:
+        await asyncio.sleep(intervaloLatido)
+        try:
+            async with asyncEngine.begin() as conexion:
+                await conexion.execute(update(tabla).where(filaClave, tabla.c.codigoEstado.is_(None)).values(fechaLatido=dt.now()))
+        except exc.DBAPIError:
+            # Un fallo puntual no corta el latido: se intenta en el siguiente intervalo
+            continue
+
+
+
+# Funcion para borrar las claves vencidas (a lo sumo una vez cada intervaloLimpieza)
+async def limpiarClaves():
+    global ultimaLimpieza
+    if time.monotonic() - ultimaLimpieza < intervaloLimpieza:
+        return
+    ultimaLimpieza = time.monotonic()
+
+    tabla = ClaveIdempotencia.__table__
+    async with asyncEngine.begin() as conexion:
+        await conexion.execute(delete(tabla).where(tabla.c.fechaCreacion < dt.now() - timedelta(seconds=ttlIdempotencia)))
+
+
+
+# Middleware de idempotencia (va dentro de SessionMiddleware: usa el cliente de la sesion)
+async def idempotencia(request: Request, call_next):
+    clave = request.headers.get("idempotency-key", "").strip()
+    clienteID = request.session.get("clienteID")
+    ruta = request.url.path
+    if not clave or not clienteID or (request.method, ruta) not in rutasIdempotentes:
+        return await call_next(request)
+
+    if len(clave) > largoMaximoClave:
+        return JSONResponse({"detail": f"Idempotency-Key no puede tener más de {largoMaximoClave} caracteres"}, status_code=400)
+
+    huella = await huellaPeticion(request)
+    try:
+        guardada = await reclamarClave(clienteID, ruta, clave, huella)
+    except TimeoutError:
+        return JSONResponse({"detail": "La petición con esta Idempotency-Key sigue en proceso"}, status_code=409)
+    except LookupError:
+        return JSONResponse({"detail": "Cliente inactivo no encontrado"}, status_code=404)
+
+    # Reintento: devolver la respuesta guardada sin ejecutar el endpoint
+    if guardada:
+        if guardada.huella != huella:
+            return JSONResponse({"detail": "Idempotency-Key ya se usó con otra petición"}, status_code=422)
+        repetida = Response(
+            content=guardada.respuesta, status_code=guardada.codigoEstado,
+            media_type=guardada.tipoContenido, headers={"Idempotent-Replayed": "true"}
+        )
+        repetida.raw_headers += [(nombre.encode("latin-1"), valor.encode("latin-1")) for nombre, valor in json.loads(guardada.encabezados or "[]")]
+        return repetida
+
+    await limpiarClaves()
+    tabla = ClaveIdempotencia.__table__
+    filaClave = and_(tabla.c.clienteID == clienteID, tabla.c.ruta == ruta, tabla.c.clave == clave)
+    latido = asyncio.create_task(latir(filaClave))
+    try:
+        respuesta = await call_next(request)
+        cuerpo = b"".join([parte async for parte in respuesta.body_iterator])
+    except Exception:
+        # Liberar la clave para que el reintento ejecute de nuevo
+        async with asyncEngine.begin() as conexion:
+            await conexion.execute(delete(tabla).where(filaClave))
+        raise
+    finally:
+        latido.cancel()
+
+    # Guardar la respuesta (los errores del servidor liberan la clave)
+    async with asyncEngine.begin() as conexion:
+        if respuesta.status_code < 500:
+            encabezados = [
+                (nombre.decode("latin-1"), valor.decode("latin-1")) for nombre, valor in respuesta.raw_headers
+                if nombre.decode("latin-1") not in encabezadosNoGuardados
+            ]
+            await conexion.execute(update(tabla).where(filaClave).values(
+                codigoEstado=respuesta.status_code, respuesta=cuerpo.decode(),
+                tipoContenido=respuesta.headers.get("content-type"), encabezados=json.dumps(encabezados)
+            ))
+        else:
+            await conexion.execute(delete(tabla).where(filaClave))
+
+    # Los encabezados crudos conservan los repetidos (varios Set-Cookie)
+    final = Response(content=cuerpo, status_code=respuesta.status_code)
+    final.raw_headers += [(nombre, valor) for nombre, valor in respuesta.raw_headers if nombre != b"content-length"]
+    return final
\ No newline at end of file
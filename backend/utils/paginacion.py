@@ -0,0 +1,61 @@
+import json
+import base64
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+"""
+    Utilidades de paginación por cursor (keyset).
+
+    El cursor guarda el valor de la columna de orden y el ID de la última fila entregada,
+    así cada página se lee desde el índice sin OFFSET y su costo no depende de la
+    posición dentro del listado.
+"""
+
+# Funcion para codificar el cursor de la ultima fila de una pagina
+def codificarCursor(valor, ultimoID: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([valor, ultimoID]).encode()).decode().rstrip("=")
+
+
+
+# Funcion para saber si un valor del cursor corresponde al tipo de la columna de orden
+def valorValido(valor, columna) -> bool:
+    # Sin columna (orden por ID) el cursor no lleva valor
+    if columna is None:
+        return valor is None
+
+    # bool es subclase de int: no vale como numero; un float admite tambien enteros
+    tipo = columna.type.python_type
+    if isinstance(valor, bool):
+        return tipo is bool
+    return isinstance(valor, (int, float) if tipo is float else tipo)
+
+
+
+# Funcion para decodificar un cursor recibido del cliente (el valor debe ser del tipo de la columna)
+def decodificarCursor(cursor: str, columna=None) -> tuple:
+    try:
+        valor, ultimoID = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Cursor inválido")
+
+    if not valorValido(valor, columna) or type(ultimoID) is not int:
+        raise HTTPException(400, "Cursor inválido")
+    return valor, ultimoID
+
+
+
+# Funcion para aplicar el orden estable y el cursor a una consulta (columna=None ordena solo por ID)
+def paginarConsulta(consulta, columnaID, columna, descendente: bool, cursor: str | None, limite: int):
+    clave = [columnaID] if columna is None else [columna, columnaID]
+
+    if cursor:
+        valor, ultimoID = decodificarCursor(cursor, columna)
+        inicio = [ultimoID] if columna is None else [valor, ultimoID]
+        if descendente:
+            consulta = consulta.where(tuple_(*clave) < tuple_(*inicio))
+        else:
+            consulta = consulta.where(tuple_(*clave) > tuple_(*inicio))
+
+    # Se pide una fila extra para saber si hay una pagina siguiente
+    orden = [c.desc() for c in clave] if descendente else clave
+    return consulta.order_by(*orden).limit(limite + 1)
\ No newline at end of file
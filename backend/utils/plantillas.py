@@ -0,0 +1,11 @@
+from fastapi.templating import Jinja2Templates
+
+"""
+    Instancia compartida de plantillas Jinja2.
+
+    La aplicación y los routers usan el mismo entorno de plantillas, de modo que cada
+    plantilla se compila una sola vez y queda en la caché de Jinja2 para todas las rutas.
+"""
+
+# Indicar dónde están los templates
+templates = Jinja2Templates(directory="frontend/templates")
\ No newline at end of file
@@ -0,0 +1,237 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from sqlalchemy import event, select, inspect
+from sqlalchemy.orm import Session
+from ..db.db import engine
+from ..models.pedido import Pedido
+from ..models.detallePedido import DetallePedido
+from .enums import EstadoPedido
+
+"""
+    Índice de productos comprados juntos (venta cruzada del detalle de producto).
+
+    Se construye con los pedidos PAGADOS: por cada par de productos cuenta en cuántos pedidos
+    aparecen juntos y guarda en memoria los K vecinos más frecuentes de cada producto. El
+    cálculo es vectorizado con NumPy (utils/coCompras) y corre en un hilo aparte.
+
+    Cuando un pedido pasa a PAGADO en este proceso, sus líneas se suman al índice después del
+    commit sin reconstruirlo. Los pedidos pagados en otros workers se recogen en la
+    reconstrucción completa, cada RELACIONADOS_TTL segundos.
+
+    Las peticiones nunca esperan una reconstrucción completa: mientras no hay índice se responde
+    sin relacionados. Si construir o sumar falla, el índice queda vencido y se reintenta a los
+    RELACIONADOS_REINTENTO segundos (no en cada petición).
+"""
+
+# Vecinos que se guardan por producto
+vecinosPorProducto = int(os.getenv("RELACIONADOS_K", 20))
+
+# Segundos entre reconstrucciones completas del indice
+ttlRelacionados = float(os.getenv("RELACIONADOS_TTL", 3600))
+
+# Segundos de espera tras un fallo antes de reintentar la reconstruccion
+reintentoRelacionados = float(os.getenv("RELACIONADOS_REINTENTO", 30))
+
+# Pedidos con mas lineas que esto no cuentan (compras al por mayor, no afinidad entre productos)
+maximoLineasPedido = 50
+
+# Filas leidas por lote al construir el indice
+filasPorLote = 100000
+
+
+
+# Funcion para leer las lineas (pedidoID, productoID) de los pedidos pagados como arreglos
+def leerLineas(pedidos: list[int] | None = None):
+    import numpy as np
+
+    consulta = (
+        select(DetallePedido.pedidoID, DetallePedido.productoID)
+        .join(Pedido, Pedido.id == DetallePedido.pedidoID)
+        .where(Pedido.estado == EstadoPedido.PAGADO, DetallePedido.productoID.is_not(None))
+    )
+    if pedidos is not None:
+        consulta = consulta.where(DetallePedido.pedidoID.in_(pedidos))
+
+    with engine.connect() as conexion:
+        resultado = conexion.execution_options(yield_per=filasPorLote).execute(consulta)
+        lotes = [np.array(filas, dtype=np.int64) for filas in resultado.partitions()]
+
+    lineas = np.concatenate(lotes) if lotes else np.empty((0, 2), np.int64)
+    return lineas[:, 0], lineas[:, 1]
+
+
+
+# Indice en memoria (inmutable: cada actualizacion crea uno nuevo)
+class Indice:
+    def __init__(self, claves, conteos, productos, vecinos, frecuencias, pedidos, construido: float | None = None):
+        self.claves = claves
+        self.conteos = conteos
+        self.productos = productos
+        self.vecinos = vecinos
+        self.frecuencias = frecuencias
+        self.pedidos = pedidos
+        self.construido = construido or time.monotonic()
+
+    # Construir el indice completo desde la DB
+    @classmethod
+    def construir(cls) -> "Indice":
+        import numpy as np
+        from .coCompras import contarPares, vecinosFrecuentes
+
+        inicio = time.perf_counter()
+        pedidos, productos = leerLineas()
+        claves, conteos = contarPares(pedidos, productos, maximoLineasPedido)
+        indice = cls(claves, conteos, *vecinosFrecuentes(claves, conteos, vecinosPorProducto), np.unique(pedidos))
+        logging.info(f"Índice de relacionados: {len(pedidos)} líneas, {len(claves)} pares en {(time.perf_counter() - inicio) * 1000:.1f}ms")
+        return indice
+
+    # Sumar los pedidos pagados que aun no estan en el indice
+    def agregar(self, pedidosPagados: set[int]) -> "Indice":
+        import numpy as np
+        from .coCompras import contarPares, sumarPares, filasDe, vecinosFrecuentes
+
+        nuevos = np.array(sorted(pedidosPagados), dtype=np.int64)
+        nuevos = nuevos[~np.isin(nuevos, self.pedidos)]
+        if len(nuevos) == 0:
+            return self
+
+        pedidos, productos = leerLineas(nuevos.tolist())
+        nuevasClaves, nuevosConteos = contarPares(pedidos, productos, maximoLineasPedido)
+        claves, conteos = sumarPares(self.claves, self.conteos, nuevasClaves, nuevosConteos)
+
+        # Recalcular los vecinos solo de los productos de los pares nuevos
+        afectados = np.unique(nuevasClaves >> 32)
+        filas = filasDe(claves, afectados)
+        productosAfectados, vecinosAfectados, frecuenciasAfectadas = vecinosFrecuentes(claves[filas], conteos[filas], vecinosPorProducto)
+
+        # Reemplazar sus filas y agregar los productos que no tenian vecinos
+        posiciones = np.searchsorted(self.productos, productosAfectados)
+        existentes = posiciones < len(self.productos)
+        existentes[existentes] = self.productos[posiciones[existentes]] == productosAfectados[existentes]
+        vecinos, frecuencias = self.vecinos.copy(), self.frecuencias.copy()
+        vecinos[posiciones[existentes]] = vecinosAfectados[existentes]
+        frecuencias[posiciones[existentes]] = frecuenciasAfectadas[existentes]
+
+        nuevas = ~existentes
+        productosIndice = np.insert(self.productos, posiciones[nuevas], productosAfectados[nuevas])
+        vecinos = np.insert(vecinos, posiciones[nuevas], vecinosAfectados[nuevas], axis=0)
+        frecuencias = np.insert(frecuencias, posiciones[nuevas], frecuenciasAfectadas[nuevas], axis=0)
+
+        # Se conserva la fecha de construccion: las sumas no reemplazan la reconstruccion completa
+        return Indice(claves, conteos, productosIndice, vecinos, frecuencias, np.union1d(self.pedidos, pedidos), self.construido)
+
+    # Vecinos de un producto, del mas al menos comprado en conjunto
+    def vecinosDe(self, productoID: int) -> list[int]:
+        posicion = int(self.productos.searchsorted(productoID))
+        if posicion == len(self.productos) or self.productos[posicion] != productoID:
+            return []
+        return [int(vecino) for vecino in self.vecinos[posicion] if vecino]
+
+
+
+# Indice compartido por la app con sus actualizaciones pendientes
+class IndiceRelacionados:
+    def __init__(self):
+        self.indice: Indice | None = None
+        self.pendientes: set[int] = set()
+        self.lock = threading.Lock()
+        self.tarea: asyncio.Task | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.fallo: float | None = None
+
+    # Registrar pedidos pagados (seguro desde cualquier hilo)
+    def agregarPedidos(self, pedidos: set[int]):
+        with self.lock:
+            self.pendientes.update(pedidos)
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.programar)
+
+    # Programar el procesamiento (una tarea a la vez, sin contar sus consultas en la peticion)
+    def programar(self) -> asyncio.Task:
+        if self.tarea is None or self.tarea.done() or self.tarea.get_loop() is not asyncio.get_running_loop():
+            self.tarea = asyncio.get_running_loop().create_task(self.procesar(), context=contextvars.Context())
+        return self.tarea
+
+    # Saber si toca reconstruir el indice completo
+    def vencido(self) -> bool:
+        return self.indice is None or time.monotonic() - self.indice.construido >= ttlRelacionados
+
+    # Saber si se esta esperando para reintentar tras un fallo (el reintento ya esta programado)
+    def enEspera(self) -> bool:
+        return self.fallo is not None and time.monotonic() - self.fallo < reintentoRelacionados
+
+    # Construir o actualizar el indice en un hilo aparte
+    async def procesar(self):
+        try:
+            while self.vencido() or self.pendientes:
+                if self.vencido():
+                    self.indice = await asyncio.to_thread(Indice.construir)
+                else:
+                    # Los pedidos siguen pendientes hasta quedar en el indice (las lecturas esperan)
+                    with self.lock:
+                        pedidos = set(self.pendientes)
+                    self.indice = await asyncio.to_thread(self.indice.agregar, pedidos)
+                    with self.lock:
+                        self.pendientes -= pedidos
+            self.fallo = None
+        except Exception as e:
+            # Los pedidos sin sumar se recogen en la reconstruccion completa: el indice queda vencido
+            with self.lock:
+                self.pendientes.clear()
+            if self.indice:
+                self.indice.construido = float("-inf")
+
+            # Reintentar tras una pausa, no en cada peticion
+            self.fallo = time.monotonic()
+            asyncio.get_running_loop().call_later(reintentoRelacionados, self.programar)
+            logging.warning(f"No se pudo actualizar el índice de relacionados (reintento en {reintentoRelacionados:g}s): {e}")
+
+    # Obtener el indice al dia con los pedidos pagados en este proceso (None mientras no hay indice)
+    # esperarConstruccion: esperar tambien la reconstruccion completa (solo el calentamiento)
+    async def obtener(self, esperarConstruccion: bool = False) -> Indice | None:
+        self.loop = asyncio.get_running_loop()
+
+        # Pedidos propios por sumar a un indice existente: esperar (sumar unos pedidos es una consulta pequena)
+        if (self.indice is not None and self.pendientes) or esperarConstruccion:
+            await asyncio.shield(self.programar())
+
+        # Sin indice o vencido: se entrega lo que haya y se reconstruye en segundo plano
+        elif self.vencido() and not self.enEspera():
+            self.programar()
+
+        return self.indice
+
+
+
+# Indice compartido por la app
+indiceRelacionados = IndiceRelacionados()
+
+
+
+# Eventos de la sesion: detectar los pedidos que pasan a PAGADO y sumarlos tras el commit
+@event.listens_for(Session, "after_flush")
+def marcarPedidosPagados(session, contexto):
+    pagados = session.info.setdefault("pedidosPagados", set())
+    for objeto in (*session.new, *session.dirty):
+        if isinstance(objeto, Pedido) and objeto.estado == EstadoPedido.PAGADO and (
+            objeto in session.new or inspect(objeto).attrs.estado.history.has_changes()
+        ):
+            pagados.add(objeto.id)
+
+
+
+@event.listens_for(Session, "after_commit")
+def agregarPedidosPagados(session):
+    pagados = session.info.pop("pedidosPagados", None)
+    if pagados:
+        indiceRelacionados.agregarPedidos(pagados)
+
+
+
+@event.listens_for(Session, "after_rollback")
+def descartarPedidosPagados(session):
+    session.info.pop("pedidosPagados", None)
\ No newline at end of file
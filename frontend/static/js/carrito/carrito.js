@@ -132,92 +132,96 @@ function renderizarCarrito() {
 function asignarEventos() {
     // Cantidad de productos
     document.querySelectorAll('.quantity-btn.minus').forEach(btn => {
-        btn.addEventListener('click', async (e) => {
+        btn.addEventListener('click', (e) => {
             const id = parseInt(e.currentTarget.dataset.id);
             const item = carrito.find(i => i.id === id);
             // Si el item existe y su cantidad es mayor a 1, restar 1
             if (item && item.cantidad > 1) {
-                const nueva = item.cantidad - 1;
-                try {
-                    // Realizar la peticion al backend para actualizar la cantidad
-                    const resp = await fetch(`/carrito/actualizar-cantidad/${id}`, {
-                        method: 'PATCH',
-                        credentials: 'same-origin',
-                        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-                        body: new URLSearchParams({ cantidad: nueva })
-                    });
-                    // Si el usuario no esta autenticado, redirigir a la pagina de login
-                    if (resp.status === 401 || resp.status === 403) { window.location.href = '/ingresar'; return; }
-                    // Si el usuario no tiene permisos, redirigir a la pagina de inicio
-                    if (!resp.ok) throw new Error('HTTP ' + resp.status);
-
-                    // Actualizar el item en el DOM
-                    const d = await resp.json();
-                    item.cantidad = d.cantidad;
-                    item.subtotal = d.subtotal || (item.precio * item.cantidad);
-                    actualizarItemEnDOM(id);
-                    calcularTotal();
-                } catch (err) { alert('No se pudo actualizar la cantidad'); }
+                item.cantidad -= 1;
+                actualizarItemEnDOM(id);
+                calcularTotal();
+                programarCambio(id, { accion: 'CANTIDAD', cantidad: item.cantidad });
             }
         });
     });
 
     // Cantidad de productos
     document.querySelectorAll('.quantity-btn.plus').forEach(btn => {
-        btn.addEventListener('click', async (e) => {
+        btn.addEventListener('click', (e) => {
             const id = parseInt(e.currentTarget.dataset.id);
             const item = carrito.find(i => i.id === id);
             if (item) {
-                const nueva = item.cantidad + 1;
-                try {
-                    // Llamado del endpoint para actualizar la cantidad
-                    const resp = await fetch(`/carrito/actualizar-cantidad/${id}`, {
-                        method: 'PATCH',
-                        credentials: 'same-origin',
-                        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-                        body: new URLSearchParams({ cantidad: nueva })
-                    });
-                    // Si el usuario no esta autenticado, redirigir a la pagina de login
-                    if (resp.status === 401 || resp.status === 403) { window.location.href = '/ingresar'; return; }
-                    // Si el usuario no tiene permisos, redirigir a la pagina de inicio
-                    if (!resp.ok) throw new Error('HTTP ' + resp.status);
-
-                    // Actualizar el item en el DOM
-                    const d = await resp.json();
-                    item.cantidad = d.cantidad;
-                    item.subtotal = d.subtotal || (item.precio * item.cantidad);
-                    actualizarItemEnDOM(id);
-                    calcularTotal();
-                } catch (err) { alert('No se pudo actualizar la cantidad'); }
+                // Si la cantidad supera el stock, mostrar error
+                if (item.stock != null && item.cantidad + 1 > item.stock) { alert('No hay stock suficiente'); return; }
+                item.cantidad += 1;
+                actualizarItemEnDOM(id);
+                calcularTotal();
+                programarCambio(id, { accion: 'CANTIDAD', cantidad: item.cantidad });
             }
         });
     });
 
     // Eliminar un producto del carrito
     document.querySelectorAll('.remove-btn').forEach(btn => {
-        btn.addEventListener('click', async (e) => {
+        btn.addEventListener('click', (e) => {
             const id = parseInt(e.currentTarget.dataset.id);
-            try {
-
-                // Llamado del endpoint para eliminar el producto
-                const resp = await fetch(`/carrito/${id}`, { method: 'DELETE', credentials: 'same-origin' });
-                // Si el usuario no esta autenticado, redirigir a la pagina de login
-                if (resp.status === 401 || resp.status === 403) { window.location.href = '/ingresar'; return; }
-                // Si el usuario no tiene permisos, redirigir a la pagina de inicio
-                if (!resp.ok) throw new Error('HTTP ' + resp.status);
-
-                // Actualizar el carrito
-                carrito = carrito.filter(item => item.id !== id);
-                // ajustar pagina actual si quedó fuera de rango
-                const totalPaginas = Math.max(1, Math.ceil(carrito.length / itemsPorPagina));
-                if (paginaActual > totalPaginas) paginaActual = totalPaginas;
-                renderizarCarrito();
-                calcularTotal();
-            } catch (err) { alert('No se pudo eliminar el producto'); }
+
+            // Actualizar el carrito
+            carrito = carrito.filter(item => item.id !== id);
+            // ajustar pagina actual si quedó fuera de rango
+            const totalPaginas = Math.max(1, Math.ceil(carrito.length / itemsPorPagina));
+            if (paginaActual > totalPaginas) paginaActual = totalPaginas;
+            renderizarCarrito();
+            calcularTotal();
+            programarCambio(id, { accion: 'ELIMINAR' });
         });
     });
 }
 
+// Cambios pendientes por producto: se envian juntos a /carrito/lote tras una pausa sin clics
+let cambiosPendientes = new Map();
+let temporizadorCambios = null;
+const esperaCambios = 400;
+
+// Funcion para programar un cambio del carrito (el ultimo cambio de cada producto reemplaza al anterior)
+function programarCambio(id, operacion) {
+    cambiosPendientes.set(id, operacion);
+    clearTimeout(temporizadorCambios);
+    temporizadorCambios = setTimeout(enviarCambios, esperaCambios);
+}
+
+// Funcion para enviar los cambios pendientes en una sola peticion
+async function enviarCambios(alSalir = false) {
+    clearTimeout(temporizadorCambios);
+    if (cambiosPendientes.size === 0) return;
+    const operaciones = [...cambiosPendientes].map(([productoID, operacion]) => ({ productoID, ...operacion }));
+    cambiosPendientes = new Map();
+
+    try {
+        const resp = await fetch('/carrito/lote', {
+            method: 'PATCH',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(operaciones),
+            keepalive: alSalir
+        });
+        if (alSalir) return;
+        // Si el usuario no esta autenticado, redirigir a la pagina de login
+        if (resp.status === 401 || resp.status === 403) { window.location.href = '/ingresar'; return; }
+        if (!resp.ok) throw new Error('HTTP ' + resp.status);
+
+        // Si no hubo mas clics mientras tanto, mostrar el carrito que quedo guardado
+        if (cambiosPendientes.size === 0) aplicarVista(await resp.json());
+    } catch (err) {
+        if (alSalir) return;
+        alert('No se pudieron guardar los cambios del carrito');
+        cargarCarrito();
+    }
+}
+
+// Guardar los cambios pendientes si se sale de la pagina (por ejemplo al ir a pagar)
+window.addEventListener('pagehide', () => enviarCambios(true));
+
 // Actualizar un item del carrito
 function actualizarItemEnDOM(id) {
     const item = carrito.find(i => i.id === id);
@@ -233,7 +237,7 @@ function actualizarItemEnDOM(id) {
 // Cargar el carrito
 async function cargarCarrito() {
     try {
-        const resp = await fetch('/carrito/mi-carrito', { credentials: 'same-origin' });
+        const resp = await fetch('/carrito/vista', { credentials: 'same-origin' });
         // Si el usuario no esta autenticado, redirigir a la pagina de login
         if (resp.status === 401 || resp.status === 403) {
             window.location.href = '/ingresar';
@@ -250,58 +254,37 @@ async function cargarCarrito() {
         // Si el usuario no tiene permisos, redirigir a la pagina de inicio
         if (!resp.ok) throw new Error('HTTP ' + resp.status);
 
-        const datos = await resp.json();
-        // datos es un array de DetalleCarrito. Intentar mapear al formato usado por la UI
-        carrito = datos.map(d => {
-            const prod = d.producto || {};
-            return {
-                id: d.productoID,
-                detalleID: d.id,
-                nombre: prod.nombre || d.nombre || prod.titulo || 'Producto',
-                precio: d.precioUnidad || prod.precio || 0,
-                cantidad: d.cantidad || 1,
-                imagen: prod.imagenURL || (prod.imagen && prod.imagen.url) || '/static/img/UI/logo.png',
-                subtotal: d.subtotal || ((d.precioUnidad || prod.precio || 0) * (d.cantidad || 1))
-            };
-        });
-
-        // Si la respuesta del carrito no tiene la info completa del producto, intentar obtenerla desde la API de productos para mostrar nombre/imagen reales.
-        const necesitaFetch = carrito.filter(i => !i.nombre || i.nombre === 'Producto' || i.imagen === '/static/img/UI/logo.png');
-        if (necesitaFetch.length) {
-            // Llamado del endpoint para obtener la info del producto
-            await Promise.all(necesitaFetch.map(async (it) => {
-                try {
-                    // Si el producto no tiene precio, usar el precio del carrito
-                    const respProd = await fetch(`/productos/${it.id}`);
-                    // Si el producto no existe, usar el nombre del carrito
-                    if (!respProd.ok) return;
-                    const p = await respProd.json();
-                    if (!p) return;
-                    // Actualizar campos si vienen disponibles
-                    it.nombre = p.nombre || it.nombre;
-                    it.imagen = p.imagenURL || it.imagen;
-                    it.precio = (it.precio && it.precio > 0) ? it.precio : (p.precio || it.precio);
-                    it.subtotal = (it.precio * it.cantidad) || it.subtotal;
-                } catch (err) {
-                    console.warn('No se pudo obtener producto', it.id, err);
-                }
-            }));
-        }
-
-        // Si el carrito está vacío, mostrar mensaje
-        if (!carrito || carrito.length === 0) {
-            document.querySelector('.cart-items').innerHTML = '<div class="cart-loading">Tu carrito está vacío.</div>';
-            // Si el carrito tiene items, renderizar
-        } else {
-            renderizarCarrito();
-        }
-        // Calcular el total del carrito
-        calcularTotal();
+        // La vista trae cada linea con el nombre, la imagen y el stock del producto
+        aplicarVista(await resp.json());
     } catch (err) {
         document.querySelector('.cart-items').innerHTML = '<p>No se pudo cargar el carrito.</p>';
     }
 }
 
+// Funcion para mostrar la vista del carrito que devuelve el backend
+function aplicarVista(vista) {
+    carrito = vista.lineas.map(linea => ({
+        id: linea.productoID,
+        detalleID: linea.id,
+        nombre: linea.nombre,
+        precio: linea.precioUnidad,
+        cantidad: linea.cantidad,
+        stock: linea.stock,
+        imagen: linea.imagenURL || '/static/img/UI/logo.png',
+        subtotal: linea.subtotal
+    }));
+
+    // Si el carrito está vacío, mostrar mensaje
+    if (!carrito || carrito.length === 0) {
+        document.querySelector('.cart-items').innerHTML = '<div class="cart-loading">Tu carrito está vacío.</div>';
+        // Si el carrito tiene items, renderizar
+    } else {
+        renderizarCarrito();
+    }
+    // Calcular el total del carrito
+    calcularTotal();
+}
+
 // Cargar el carrito al cargar la pagina
 document.addEventListener('DOMContentLoaded', () => {
     cargarCarrito();
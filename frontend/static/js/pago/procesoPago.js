@@ -212,10 +212,19 @@ function checkoutApp() {
       const envioAplicado = this.subtotal < 30000;
       formData.append('aplicarEnvio', envioAplicado.toString());
 
-      fetch('/carrito/pedir', {
+      // La misma clave en los reintentos: el backend devuelve el pedido ya creado en vez de duplicarlo
+      const clave = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+      const pedir = (intentos) => fetch('/carrito/pedir', {
         method: 'POST',
+        headers: { 'Idempotency-Key': clave },
         body: formData
-      })
+      }).catch(error => {
+        // Reintentar solo los errores de red (sin respuesta del servidor)
+        if (intentos <= 1) throw error;
+        return new Promise(resolver => setTimeout(resolver, 1000)).then(() => pedir(intentos - 1));
+      });
+
+      pedir(3)
         .then(response => {
           if (!response.ok) throw new Error('No se pudo crear el pedido');
           return response.json();
@@ -1,6 +1,7 @@
 // Listas de productos, categorias y filtros
 let todosLosProductos = [];
 let categoriasDisponibles = [];
+let posicionVentas = new Map();
 let filtrosActivos = {
   categorias: [],
   precioMax: 75000,
@@ -24,24 +25,13 @@ function formatearPrecio(precio) {
 async function cargarDatosIniciales() {
   try {
 
-    // Respuestas de productos y categorias
-    const respuestaProductos = await fetch('/productos/');
-    if (!respuestaProductos.ok) throw new Error('Error al cargar productos');
-    todosLosProductos = await respuestaProductos.json();
-
-    const respuestaCategorias = await fetch('/categorias/');
-    if (respuestaCategorias.ok) {
-      categoriasDisponibles = await respuestaCategorias.json();
-    } else {
-      // Categorias por defecto si falla la carga de las reales
-      categoriasDisponibles = [
-        { id: 1, nombre: "Collares" },
-        { id: 2, nombre: "Pulseras" },
-        { id: 3, nombre: "Anillos" },
-        { id: 4, nombre: "Pendientes" },
-        { id: 5, nombre: "Conjuntos" }
-      ];
-    }
+    // Contenido de inicio (catalogo, categorias y mas vendidos) en una peticion
+    const respuestaInicio = await fetch('/api/inicio');
+    if (!respuestaInicio.ok) throw new Error('Error al cargar productos');
+    const inicio = await respuestaInicio.json();
+    todosLosProductos = inicio.productos;
+    categoriasDisponibles = inicio.categorias;
+    posicionVentas = new Map(inicio.masVendidos.map((producto, posicion) => [producto.id, posicion]));
 
     // Inicializar filtros
     inicializarFiltros();
@@ -217,7 +207,9 @@ function aplicarFiltros() {
   if (filtrosActivos.popularidad === 'novedades') {
     productosFiltrados.sort((a, b) => b.id - a.id);
   } else if (filtrosActivos.popularidad === 'populares') {
-    productosFiltrados.sort((a, b) => a.nombre.localeCompare(b.nombre));
+    // Primero los mas vendidos en su orden, luego el resto por nombre
+    const posicion = producto => posicionVentas.has(producto.id) ? posicionVentas.get(producto.id) : Infinity;
+    productosFiltrados.sort((a, b) => (posicion(a) - posicion(b)) || a.nombre.localeCompare(b.nombre));
   }
 
   if (filtrosActivos.orden === 'precio-asc') {
@@ -209,6 +209,9 @@ async function cargarProducto() {
     // Actualizar el estado de los controles según el stock
     actualizarEstadoStock();
 
+    // Productos comprados junto a este (no bloquea la carga del detalle)
+    cargarRelacionados(productoActualID);
+
   } catch (error) {
     console.error('Error cargando producto:', error);
     document.getElementById('titulo').textContent = 'Producto no disponible';
@@ -221,4 +224,44 @@ async function cargarProducto() {
   }
 }
 
+// Cargar los productos que se compran junto al actual
+async function cargarRelacionados(productoID) {
+  try {
+    const respuesta = await fetch(`/productos/${productoID}/relacionados`);
+    if (!respuesta.ok) return;
+    const relacionados = await respuesta.json();
+    if (!relacionados.length) return;
+
+    const grid = document.getElementById('grid-relacionados');
+    grid.innerHTML = '';
+    const formatoPrecio = new Intl.NumberFormat('es-CO', { style: 'currency', currency: 'COP' });
+
+    relacionados.forEach(producto => {
+      const tarjeta = document.createElement('a');
+      tarjeta.className = 'tarjeta-relacionado';
+      tarjeta.href = `/producto/${producto.id}`;
+
+      const imagen = document.createElement('img');
+      imagen.src = producto.imagenURL || '../../static/img/UI/logo.png';
+      imagen.alt = producto.nombre || 'Producto';
+      imagen.loading = 'lazy';
+
+      const nombre = document.createElement('span');
+      nombre.className = 'nombre-relacionado';
+      nombre.textContent = producto.nombre || '';
+
+      const precio = document.createElement('span');
+      precio.className = 'precio-relacionado';
+      precio.textContent = formatoPrecio.format(producto.precio || 0);
+
+      tarjeta.append(imagen, nombre, precio);
+      grid.appendChild(tarjeta);
+    });
+
+    document.getElementById('relacionados').classList.remove('hidden');
+  } catch (error) {
+    console.warn('No se pudieron cargar los productos relacionados', error);
+  }
+}
+
 document.addEventListener('DOMContentLoaded', cargarProducto);
\ No newline at end of file